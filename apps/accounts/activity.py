@@ -0,0 +1,37 @@
+from django.conf import settings
+
+from apps.core.background import BackgroundQueue
+
+
+class ActivityBuffer(BackgroundQueue):
+    """
+    In-process buffer for UserActivity rows.
+
+    Events are queued in memory and written with a single bulk_create once
+    the buffer reaches ``batch_size`` rows or ``flush_interval`` seconds have
+    passed.
+    """
+
+    thread_name = 'activity-log-writer'
+    failure_message = 'Failed to write %d user activity rows'
+
+    def __init__(self, batch_size=None, flush_interval=None):
+        if flush_interval is None:
+            flush_interval = getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 5)
+        super().__init__(flush_interval, batch_size or getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 100))
+
+    def enqueue(self, **fields):
+        """Queue one UserActivity row for the next flush"""
+        from .models import UserActivity
+
+        self.put(UserActivity(**fields))
+
+    def handle(self, items):
+        from .models import UserActivity
+
+        UserActivity.objects.bulk_create(items, batch_size=self.batch_size)
+        return len(items)
+
+
+activity_buffer = ActivityBuffer()
+activity_buffer.register_process_hooks()
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm
 from django.utils.translation import gettext_lazy as _
-from .models import User, UserActivity
+from .models import User, UserActivity, UserActivityArchive
 
 class UserAdmin(BaseUserAdmin):
     form = UserChangeForm
@@ -45,3 +45,4 @@ class UserActivityAdmin(admin.ModelAdmin):
 
 # Register the User model with the custom UserAdmin
 admin.site.register(User, UserAdmin)
+admin.site.register(UserActivityArchive, UserActivityAdmin)
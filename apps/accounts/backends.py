@@ -0,0 +1,11 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import get_cached_user
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose session user lookup goes through the versioned user cache"""
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
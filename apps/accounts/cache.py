@@ -0,0 +1,69 @@
+"""
+Cached user identities for the authentication backends.
+
+Each user has a version stamp in the cache that is replaced whenever the user
+row is saved or deleted (password change, deactivation, role change ...). A
+cached user is only used if it was stored under the current version, so a
+bump invalidates it everywhere the cache is shared, and is announced on the
+invalidation bus so other workers drop their local copy of the old stamp.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from apps.core.invalidation import bus
+from apps.core.replicas import use_primary
+
+
+def _version_key(user_id):
+    return f'auth:user-version:{user_id}'
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def bump_user_version(user_id):
+    """Invalidate the cached identity of ``user_id``"""
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+    bus.publish(keys=[_version_key(user_id)])
+
+
+def _create_version(version_key):
+    # add() so that a concurrent bump is never overwritten
+    cache.add(version_key, uuid.uuid4().hex, None)
+    return cache.get(version_key)
+
+
+def user_versions(user_ids):
+    """Current version stamps of ``user_ids``, read in one round trip; None ids are skipped"""
+    keys = {_version_key(user_id): user_id for user_id in user_ids if user_id is not None}
+    found = cache.get_many(list(keys))
+    for version_key in keys.keys() - found.keys():
+        found[version_key] = _create_version(version_key)
+    return {keys[version_key]: version for version_key, version in found.items()}
+
+
+def get_cached_user(user_id):
+    """Return the user with primary key ``user_id``, or None if there is no such user"""
+    version_key, user_key = _version_key(user_id), _user_key(user_id)
+    cached = cache.get_many([version_key, user_key])
+    version = cached.get(version_key)
+    entry = cached.get(user_key)
+    if version is not None and entry is not None and entry[0] == version:
+        return entry[1]
+
+    User = get_user_model()
+    try:
+        # Cached under the current version, so never from a replica that may lag behind the bump
+        with use_primary():
+            user = User._default_manager.get(pk=user_id)
+    except (User.DoesNotExist, ValueError):
+        return None
+
+    if version is None:
+        version = _create_version(version_key)
+    cache.set(user_key, (version, user), getattr(settings, 'USER_CACHE_TIMEOUT', 300))
+    return user
@@ -0,0 +1,13 @@
+from django_filters import rest_framework as filters
+
+from .models import UserActivity
+
+
+class UserActivityFilter(filters.FilterSet):
+    """Time-range filter for the activity log: ``?since=...&until=...`` (ISO 8601)"""
+    since = filters.IsoDateTimeFilter(field_name='timestamp', lookup_expr='gte')
+    until = filters.IsoDateTimeFilter(field_name='timestamp', lookup_expr='lt')
+
+    class Meta:
+        model = UserActivity
+        fields = ['since', 'until']
@@ -0,0 +1,49 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.serializers import CustomTokenObtainPairSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Django command to measure JWT login throughput and queries per login"""
+
+    help = 'Run repeated JWT logins for a throwaway user and report logins/sec and queries per login'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help='Number of logins to run')
+
+    def handle(self, *args, **options):
+        logins = options['logins']
+        password = uuid.uuid4().hex
+
+        # Everything runs in a transaction that is rolled back, so no rows are left behind
+        with transaction.atomic():
+            user = User.objects.create_user(
+                email=f'benchmark-{uuid.uuid4().hex[:12]}@example.com',
+                password=password,
+                first_name='Benchmark'
+            )
+            credentials = {'email': user.email, 'password': password}
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                for _ in range(logins):
+                    serializer = CustomTokenObtainPairSerializer(data=credentials)
+                    serializer.is_valid(raise_exception=True)
+                elapsed = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Logins:            {logins}')
+        self.stdout.write(f'Elapsed:           {elapsed:.3f}s')
+        self.stdout.write(f'Logins per second: {logins / elapsed:.1f}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Queries per login: {len(queries.captured_queries) / logins:.2f}'
+        ))
@@ -0,0 +1,176 @@
+import gzip
+import json
+import os
+from itertools import groupby
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.accounts import partitions
+from apps.accounts.models import UserActivity, UserActivityArchive
+
+FIELDS = ('id', 'user_id', 'action', 'timestamp', 'ip_address', 'user_agent')
+
+
+class Command(BaseCommand):
+    """Django command to apply the UserActivity retention policy"""
+
+    help = (
+        'Move UserActivity rows older than the retention window out of the live table. '
+        'On PostgreSQL whole monthly partitions are detached; elsewhere rows are moved '
+        'to the archive table. With --export the rows are written to gzipped NDJSON '
+        'files and removed from the database instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int,
+            default=getattr(settings, 'ACTIVITY_LOG_RETENTION_MONTHS', 6),
+            help='Number of whole months to keep in the live table'
+        )
+        parser.add_argument(
+            '--export', action='store_true',
+            help='Write expired rows to compressed archive files and delete them'
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=getattr(settings, 'ACTIVITY_LOG_ARCHIVE_DIR', 'archive/activity'),
+            help='Directory for the compressed archive files'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be done')
+
+    def handle(self, *args, **options):
+        self.options = options
+        now = timezone.now()
+        cutoff = partitions.add_months(partitions.month_start(now), -options['months'])
+        self.stdout.write(f'Retention cutoff: {cutoff.isoformat()}')
+
+        if options['export'] and not options['dry_run']:
+            os.makedirs(options['archive_dir'], exist_ok=True)
+
+        if partitions.is_partitioned(connection):
+            self.rotate_partitions(now, cutoff)
+        else:
+            self.rotate_rows(cutoff)
+
+    def rotate_partitions(self, now, cutoff):
+        if not self.options['dry_run']:
+            # Keep a couple of months ahead so new rows never land in the default partition
+            partitions.ensure_partitions(connection, now, partitions.add_months(now, 2))
+
+        expired = [
+            (name, True) for name, start in partitions.list_partitions(connection)
+            if partitions.add_months(start, 1) <= cutoff
+        ]
+        if self.options['export']:
+            # Partitions detached by runs without --export
+            expired += [(name, False) for name, start in partitions.list_detached(connection)]
+
+        for name, attached in expired:
+            if self.options['dry_run']:
+                self.stdout.write(f"Would {'export and drop' if self.options['export'] else 'detach'} {name}")
+                continue
+
+            if self.options['export']:
+                # Exported before it is dropped, so a failed export leaves the partition in place to retry
+                path = os.path.join(self.options['archive_dir'], f'{name}.ndjson.gz')
+                count = self.export_table(name, path)
+                with transaction.atomic():
+                    if attached:
+                        partitions.detach_partition(connection, name)
+                    partitions.drop_table(connection, name)
+                self.stdout.write(f'Exported {count} rows to {path} and dropped {name}')
+            else:
+                with transaction.atomic():
+                    partitions.detach_partition(connection, name)
+                self.stdout.write(f'Detached {name}')
+
+    def export_table(self, table, path):
+        columns = ', '.join(f'"{field}"' for field in FIELDS)
+
+        def rows(cursor):
+            while batch := cursor.fetchmany(self.options['batch_size']):
+                for row in batch:
+                    yield dict(zip(FIELDS, row))
+
+        with transaction.atomic():
+            # Server-side cursor so a month of rows is never held in memory at once
+            with connection.chunked_cursor() as cursor:
+                cursor.execute(f'SELECT {columns} FROM "{table}" ORDER BY "timestamp"')
+                return self.write_archive(path, rows(cursor))
+
+    def rotate_rows(self, cutoff):
+        expired = UserActivity.objects.filter(timestamp__lt=cutoff)
+        if self.options['dry_run']:
+            self.stdout.write(f'Would move {expired.count()} rows out of the live table')
+            return
+
+        if self.options['export']:
+            moved = self.export_rows(expired)
+            moved += self.export_rows(UserActivityArchive.objects.filter(timestamp__lt=cutoff))
+            self.stdout.write(self.style.SUCCESS(f'Exported {moved} rows to {self.options["archive_dir"]}'))
+            return
+
+        moved = 0
+        while True:
+            with transaction.atomic():
+                batch = list(expired.order_by('pk')[:self.options['batch_size']])
+                if not batch:
+                    break
+                UserActivityArchive.objects.bulk_create([
+                    UserActivityArchive(**{field: getattr(row, field) for field in FIELDS})
+                    for row in batch
+                ])
+                UserActivity.objects.filter(pk__in=[row.pk for row in batch]).delete()
+            moved += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Moved {moved} rows to the archive table'))
+
+    def export_rows(self, queryset):
+        """Write rows to one gzipped NDJSON file per month, then delete them in batches"""
+        exported = []
+
+        def month_of(row):
+            return partitions.partition_name(partitions.month_start(row['timestamp']))
+
+        def collect(rows):
+            for row in rows:
+                exported.append(row['id'])
+                yield row
+
+        rows = queryset.order_by('timestamp', 'pk').values(*FIELDS).iterator(chunk_size=self.options['batch_size'])
+        for name, month_rows in groupby(rows, key=month_of):
+            path = os.path.join(self.options['archive_dir'], f'{name}.ndjson.gz')
+            self.write_archive(path, collect(month_rows))
+
+        # Deleted only once every file is in place; a rerun merges into the existing files
+        for start in range(0, len(exported), self.options['batch_size']):
+            queryset.model.objects.filter(pk__in=exported[start:start + self.options['batch_size']]).delete()
+        return len(exported)
+
+    def write_archive(self, path, rows):
+        """
+        Write ``rows`` to the gzipped NDJSON file ``path`` and return how many
+        were new. Rows already in an existing file (from a run that failed
+        before deleting them) are kept once. The file is written under a
+        temporary name and renamed into place when complete.
+        """
+        partial = f'{path}.partial'
+        seen = set()
+        count = 0
+        with gzip.open(partial, 'wt', encoding='utf-8') as archive:
+            if os.path.exists(path):
+                with gzip.open(path, 'rt', encoding='utf-8') as previous:
+                    for line in previous:
+                        seen.add(json.loads(line)['id'])
+                        archive.write(line)
+            for row in rows:
+                if row['id'] in seen:
+                    continue
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                count += 1
+        os.replace(partial, path)
+        return count
@@ -0,0 +1,63 @@
+# Generated by Django 5.0 on 2026-10-19 14:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_useractivity_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="useractivity",
+            index=models.Index(
+                fields=["user", "-timestamp"], name="accounts_ua_user_ts_idx"
+            ),
+        ),
+        migrations.CreateModel(
+            name="UserActivityArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("action", models.CharField(max_length=255)),
+                (
+                    "timestamp",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("ip_address", models.GenericIPAddressField(blank=True, null=True)),
+                ("user_agent", models.TextField(blank=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_activities",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "User Activity (archived)",
+                "verbose_name_plural": "User Activities (archived)",
+                "ordering": ["-timestamp"],
+                "abstract": False,
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-timestamp"], name="accounts_uaa_user_ts_idx"
+                    ),
+                    models.Index(fields=["timestamp"], name="accounts_uaa_ts_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,92 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+
+# Frozen copy of the DDL apps.accounts.partitions ran when this migration was
+# written, so later changes to that module never change what it does.
+TABLE = 'accounts_useractivity'
+MONTHS_AHEAD = 2
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc) if value.tzinfo else value.replace(tzinfo=dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+        [TABLE]
+    )
+    return cursor.fetchone() is not None
+
+
+def partition_useractivity(apps, schema_editor):
+    """Turn accounts_useractivity into a monthly partitioned table on PostgreSQL"""
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    legacy = f'{TABLE}_legacy'
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_part_id_seq"')
+        cursor.execute(f'''
+            CREATE TABLE "{TABLE}" (
+                "id" bigint NOT NULL DEFAULT nextval('"{TABLE}_part_id_seq"'),
+                "action" varchar(255) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                "ip_address" inet NULL,
+                "user_agent" text NULL,
+                "user_id" bigint NOT NULL
+                    REFERENCES "accounts_user" ("id") DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY ("id", "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+        ''')
+        cursor.execute(f'ALTER SEQUENCE "{TABLE}_part_id_seq" OWNED BY "{TABLE}"."id"')
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+        cursor.execute(f'SELECT MIN("timestamp"), NOW() FROM "{legacy}"')
+        oldest, now = cursor.fetchone()
+
+        # One partition per month from the oldest row to MONTHS_AHEAD months from now
+        current = month_start(oldest or now)
+        last = add_months(month_start(now), MONTHS_AHEAD)
+        while current <= last:
+            end = add_months(current, 1)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{TABLE}_p{current.year:04d}_{current.month:02d}" '
+                f'PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{current.isoformat()}') TO ('{end.isoformat()}')"
+            )
+            current = end
+
+        cursor.execute(f'''
+            INSERT INTO "{TABLE}" ("id", "action", "timestamp", "ip_address", "user_agent", "user_id")
+            SELECT "id", "action", "timestamp", "ip_address", "user_agent", "user_id" FROM "{legacy}"
+        ''')
+        cursor.execute(
+            f'''SELECT setval('"{TABLE}_part_id_seq"', COALESCE(MAX("id"), 0) + 1, false) FROM "{TABLE}"'''
+        )
+        cursor.execute(f'DROP TABLE "{legacy}"')
+        cursor.execute(f'ALTER SEQUENCE "{TABLE}_part_id_seq" RENAME TO "{TABLE}_id_seq"')
+        # Recreated on the parent so that every partition gets it
+        cursor.execute(f'CREATE INDEX "accounts_ua_user_ts_idx" ON "{TABLE}" ("user_id", "timestamp" DESC)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_useractivity_archive"),
+    ]
+
+    operations = [
+        # Other databases keep the plain table and rely on UserActivityArchive
+        migrations.RunPython(partition_useractivity, migrations.RunPython.noop),
+    ]
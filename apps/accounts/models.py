@@ -1,7 +1,10 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Group, Permission
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from apps.core.models import ChangeTrackingMixin
+
 class UserManager(BaseUserManager):
     """Custom user model manager where email is the unique identifier."""
     def create_user(self, email, password=None, **extra_fields):
@@ -25,7 +28,7 @@ class UserManager(BaseUserManager):
             raise ValueError(_('Superuser must have is_superuser=True.'))
         return self.create_user(email, password, **extra_fields)
 
-class User(AbstractUser):
+class User(ChangeTrackingMixin, AbstractUser):
     class Role(models.TextChoices):
         ADMIN = 'ADMIN', 'Admin'
         TECHNICIAN = 'TECHNICIAN', 'Technician'
@@ -67,17 +70,42 @@ class User(AbstractUser):
     def is_viewer(self):
         return self.role == self.Role.VIEWER
 
-class UserActivity(models.Model):
-    """Model to track user activities"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
+class AbstractUserActivity(models.Model):
+    """Fields shared by the live activity log and its archive"""
     action = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the buffered row is written
+    timestamp = models.DateTimeField(default=timezone.now)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True, null=True)
     
     class Meta:
-        verbose_name_plural = 'User Activities'
+        abstract = True
         ordering = ['-timestamp']
     
     def __str__(self):
         return f"{self.user.email} - {self.action} at {self.timestamp}"
+
+class UserActivity(AbstractUserActivity):
+    """
+    Model to track user activities.
+    On PostgreSQL the table is partitioned by month (see partitions.py).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
+    
+    class Meta(AbstractUserActivity.Meta):
+        verbose_name_plural = 'User Activities'
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='accounts_ua_user_ts_idx'),
+        ]
+
+class UserActivityArchive(AbstractUserActivity):
+    """Activity rows moved out of the live table by the rotate_user_activity command"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_activities')
+    
+    class Meta(AbstractUserActivity.Meta):
+        verbose_name = 'User Activity (archived)'
+        verbose_name_plural = 'User Activities (archived)'
+        indexes = [
+            models.Index(fields=['user', '-timestamp'], name='accounts_uaa_user_ts_idx'),
+            models.Index(fields=['timestamp'], name='accounts_uaa_ts_idx'),
+        ]
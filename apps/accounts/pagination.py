@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ActivityCursorPagination(CursorPagination):
+    """
+    Keyset pagination over a user's activity, newest first.
+    Each page is an index range scan, however old the account is.
+    """
+    ordering = ('-timestamp', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
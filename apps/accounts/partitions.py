@@ -0,0 +1,186 @@
+"""
+Monthly range partitioning of the UserActivity table on PostgreSQL.
+
+The parent table ``accounts_useractivity`` is partitioned by ``timestamp``
+with one partition per calendar month (``accounts_useractivity_pYYYY_MM``)
+and a default partition that catches rows outside the known months. When
+a month's partition is created late, the rows of that month that already
+landed in the default partition are moved into it.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+
+TABLE = 'accounts_useractivity'
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_id_seq'
+USER_TIMESTAMP_INDEX = 'accounts_ua_user_ts_idx'
+
+
+def month_start(value):
+    """Return the first instant (UTC) of the month containing ``value``"""
+    value = value.astimezone(dt_timezone.utc) if value.tzinfo else value.replace(tzinfo=dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value, months):
+    """Return the first instant of the month ``months`` after ``value``'s month"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(start):
+    return f'{TABLE}_p{start.year:04d}_{start.month:02d}'
+
+
+def is_partitioned(connection):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def _monthly(names):
+    """``[(name, start)]`` for the names of monthly partition tables, oldest first"""
+    partitions = []
+    prefix = f'{TABLE}_p'
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        year, month = name[len(prefix):].split('_')
+        partitions.append((name, datetime(int(year), int(month), 1, tzinfo=dt_timezone.utc)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def list_partitions(connection):
+    """Return ``[(name, start)]`` for the attached monthly partitions, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s",
+            [TABLE]
+        )
+        return _monthly(row[0] for row in cursor.fetchall())
+
+
+def list_detached(connection):
+    """Return ``[(name, start)]`` for monthly partition tables detached earlier, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class "
+            "WHERE relkind = 'r' AND NOT relispartition AND starts_with(relname, %s)",
+            [f'{TABLE}_p']
+        )
+        return _monthly(row[0] for row in cursor.fetchall())
+
+
+def create_partition(connection, start):
+    """
+    Create the monthly partition starting at ``start`` if it does not exist.
+
+    PostgreSQL refuses a partition for a range the default partition holds
+    rows of, so such rows are first moved into a new table, which is then
+    attached as the partition. The default partition stays locked meanwhile.
+    """
+    name = partition_name(start)
+    end = add_months(start, 1)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute('SELECT to_regclass(%s)', [name])
+        if cursor.fetchone()[0] is not None:
+            return
+        cursor.execute(f'LOCK TABLE "{DEFAULT_PARTITION}" IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(
+            f'SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= %s AND "timestamp" < %s LIMIT 1',
+            [start, end]
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" {bounds}')
+            return
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(f'''
+            WITH moved AS (
+                DELETE FROM "{DEFAULT_PARTITION}" WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *
+            )
+            INSERT INTO "{name}" SELECT * FROM moved
+        ''', [start, end])
+        # Attaching adds the primary key, foreign key and indexes of the parent
+        cursor.execute(f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" {bounds}')
+
+
+def ensure_partitions(connection, start, end):
+    """
+    Create monthly partitions covering ``start`` up to and including ``end``'s
+    month, and every earlier month with rows waiting in the default partition.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN("timestamp") FROM "{DEFAULT_PARTITION}" WHERE "timestamp" < %s', [start])
+        stranded = cursor.fetchone()[0]
+    current = month_start(min(start, stranded) if stranded else start)
+    last = month_start(end)
+    while current <= last:
+        create_partition(connection, current)
+        current = add_months(current, 1)
+
+
+def detach_partition(connection, name):
+    """Detach a monthly partition; the rows stay in a standalone table of the same name"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+
+
+def drop_table(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+
+def convert_to_partitioned(connection, months_ahead=2):
+    """
+    Rebuild ``accounts_useractivity`` as a partitioned table.
+
+    The existing rows are copied into monthly partitions. The primary key
+    becomes ``(id, timestamp)`` because PostgreSQL requires the partition key
+    in every unique constraint; ``id`` is still drawn from a single sequence.
+    """
+    legacy = f'{TABLE}_legacy'
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_part_id_seq"')
+        cursor.execute(f'''
+            CREATE TABLE "{TABLE}" (
+                "id" bigint NOT NULL DEFAULT nextval('"{TABLE}_part_id_seq"'),
+                "action" varchar(255) NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                "ip_address" inet NULL,
+                "user_agent" text NULL,
+                "user_id" bigint NOT NULL
+                    REFERENCES "accounts_user" ("id") DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY ("id", "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+        ''')
+        cursor.execute(f'ALTER SEQUENCE "{TABLE}_part_id_seq" OWNED BY "{TABLE}"."id"')
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+        cursor.execute(f'SELECT MIN("timestamp"), NOW() FROM "{legacy}"')
+        oldest, now = cursor.fetchone()
+
+    ensure_partitions(connection, oldest or now, add_months(month_start(now), months_ahead))
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'''
+            INSERT INTO "{TABLE}" ("id", "action", "timestamp", "ip_address", "user_agent", "user_id")
+            SELECT "id", "action", "timestamp", "ip_address", "user_agent", "user_id" FROM "{legacy}"
+        ''')
+        cursor.execute(
+            f'''SELECT setval('"{TABLE}_part_id_seq"', COALESCE(MAX("id"), 0) + 1, false) FROM "{TABLE}"'''
+        )
+        cursor.execute(f'DROP TABLE "{legacy}"')
+        cursor.execute(f'ALTER SEQUENCE "{TABLE}_part_id_seq" RENAME TO "{SEQUENCE}"')
+        # Recreated on the parent so that every partition gets it
+        cursor.execute(f'CREATE INDEX "{USER_TIMESTAMP_INDEX}" ON "{TABLE}" ("user_id", "timestamp" DESC)')
@@ -0,0 +1,184 @@
+"""
+Revocation list for rotated refresh tokens.
+
+Revoked JTIs are kept in an expiring set, in Redis when ``REDIS_URL`` is set
+and in process memory otherwise. Every revocation is also recorded in a Bloom
+filter per refresh-token lifetime bucket, so checking a token that was never
+revoked (almost every refresh) is answered from a local copy of the filter
+without a round trip. Only Bloom hits are confirmed against the set.
+
+With Redis, each process refreshes its copy of the shared filter at most
+every ``TOKEN_REVOCATION_BLOOM_REFRESH`` seconds; revocations made by the
+same process are visible to it immediately.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+def bloom_positions(item, size, hashes):
+    """Bit positions of ``item`` (double hashing over one blake2b digest)"""
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], 'big')
+    second = int.from_bytes(digest[8:], 'big') | 1
+    return [(first + i * second) % size for i in range(hashes)]
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter whose bit layout matches Redis SETBIT/GETBIT"""
+
+    def __init__(self, size=2 ** 20, hashes=7, bits=None):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray(bits or b'').ljust(size // 8, b'\0')
+
+    def positions(self, item):
+        return bloom_positions(item, self.size, self.hashes)
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position // 8] |= 0x80 >> (position % 8)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position // 8] & (0x80 >> (position % 8))
+            for position in self.positions(item)
+        )
+
+
+class LocalRevocationBackend:
+    """In-process stand-in for the Redis backend, used when REDIS_URL is not set"""
+    remote = False
+
+    def __init__(self, bloom_size, bloom_hashes):
+        self.bloom_size = bloom_size
+        self.bloom_hashes = bloom_hashes
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._blooms = {}
+
+    def add(self, jti, ttl, bucket, bloom_ttl):
+        """Record ``jti`` as revoked; return False if it already was"""
+        now = time.monotonic()
+        with self._lock:
+            expires = self._revoked.get(jti)
+            if expires is not None and expires > now:
+                return False
+            self._revoked = {key: value for key, value in self._revoked.items() if value > now}
+            self._revoked[jti] = now + ttl
+            self._blooms = {key: value for key, value in self._blooms.items() if key >= bucket - 1}
+            if bucket not in self._blooms:
+                self._blooms[bucket] = BloomFilter(self.bloom_size, self.bloom_hashes)
+            self._blooms[bucket].add(jti)
+        return True
+
+    def contains(self, jti):
+        expires = self._revoked.get(jti)
+        return expires is not None and expires > time.monotonic()
+
+    def bloom(self, bucket):
+        """Return the bucket's Bloom filter, or None if nothing was revoked in it"""
+        return self._blooms.get(bucket)
+
+
+class RedisRevocationBackend:
+    """Revoked JTIs as expiring Redis keys plus one Redis bitmap per bucket"""
+    remote = True
+
+    def __init__(self, url, bloom_size, bloom_hashes):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.bloom_size = bloom_size
+        self.bloom_hashes = bloom_hashes
+
+    def add(self, jti, ttl, bucket, bloom_ttl):
+        if not self.client.set(f'jwt:revoked:{jti}', 1, ex=max(int(ttl), 1), nx=True):
+            return False
+        key = f'jwt:revoked-bloom:{bucket}'
+        pipeline = self.client.pipeline(transaction=False)
+        for position in bloom_positions(jti, self.bloom_size, self.bloom_hashes):
+            pipeline.setbit(key, position, 1)
+        pipeline.expire(key, int(bloom_ttl))
+        pipeline.execute()
+        return True
+
+    def contains(self, jti):
+        return bool(self.client.exists(f'jwt:revoked:{jti}'))
+
+    def bloom(self, bucket):
+        bits = self.client.get(f'jwt:revoked-bloom:{bucket}')
+        if bits is None:
+            return None
+        return BloomFilter(self.bloom_size, self.bloom_hashes, bits)
+
+
+class TokenRevocationList:
+    """Bloom-filter front check in front of a revocation backend"""
+
+    def __init__(self, backend, lifetime, refresh_interval=1.0):
+        self.backend = backend
+        # A token revoked in bucket N expires before bucket N + 2 starts
+        self.lifetime = max(int(lifetime), 1)
+        self.refresh_interval = refresh_interval
+        self._snapshots = {}
+
+    def _bucket(self, now):
+        return int(now // self.lifetime)
+
+    def _bloom(self, bucket):
+        if not self.backend.remote:
+            return self.backend.bloom(bucket)
+        snapshot = self._snapshots.get(bucket)
+        if snapshot is None or time.monotonic() - snapshot[1] > self.refresh_interval:
+            snapshot = (self.backend.bloom(bucket), time.monotonic())
+            self._snapshots = {
+                key: value for key, value in self._snapshots.items() if key >= bucket - 1
+            }
+            self._snapshots[bucket] = snapshot
+        return snapshot[0]
+
+    def revoke(self, jti, exp):
+        """
+        Revoke ``jti`` until its expiry time ``exp`` (a UNIX timestamp).
+        Returns False if it was already revoked, so callers can claim a token atomically.
+        """
+        now = time.time()
+        bucket = self._bucket(now)
+        claimed = self.backend.add(jti, max(exp - now, 1), bucket, 2 * self.lifetime)
+        if claimed and self.backend.remote:
+            # Make our own revocation visible here without waiting for the next refresh
+            if self._bloom(bucket) is None:
+                self._snapshots[bucket] = (
+                    BloomFilter(self.backend.bloom_size, self.backend.bloom_hashes), time.monotonic()
+                )
+            self._bloom(bucket).add(jti)
+        return claimed
+
+    def is_revoked(self, jti):
+        bucket = self._bucket(time.time())
+        blooms = [self._bloom(b) for b in (bucket, bucket - 1)]
+        if not any(bloom is not None and jti in bloom for bloom in blooms):
+            return False
+        return self.backend.contains(jti)
+
+
+def _build_revocation_list():
+    size = getattr(settings, 'TOKEN_REVOCATION_BLOOM_BITS', 2 ** 20)
+    hashes = getattr(settings, 'TOKEN_REVOCATION_BLOOM_HASHES', 7)
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    if redis_url:
+        backend = RedisRevocationBackend(redis_url, size, hashes)
+    else:
+        backend = LocalRevocationBackend(size, hashes)
+    return TokenRevocationList(
+        backend,
+        jwt_settings.REFRESH_TOKEN_LIFETIME.total_seconds(),
+        getattr(settings, 'TOKEN_REVOCATION_BLOOM_REFRESH', 1.0),
+    )
+
+
+revocation_list = _build_revocation_list()
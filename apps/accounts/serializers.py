@@ -1,9 +1,15 @@
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
 
+from .models import UserActivity
+from .revocation import revocation_list
+
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
@@ -55,6 +61,25 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         data['user'] = UserSerializer(self.user).data
         return data
 
+class RevokingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that honours BLACKLIST_AFTER_ROTATION through the
+    revocation list instead of the token_blacklist app's database tables.
+    """
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        jti = refresh[jwt_settings.JTI_CLAIM]
+        if revocation_list.is_revoked(jti):
+            raise InvalidToken('Token is blacklisted')
+
+        data = super().validate(attrs)
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS and jwt_settings.BLACKLIST_AFTER_ROTATION:
+            # Claiming the old token atomically stops two concurrent refreshes from both succeeding
+            if not revocation_list.revoke(jti, refresh['exp']):
+                raise InvalidToken('Token is blacklisted')
+        return data
+
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
     new_password = serializers.CharField(required=True, validators=[validate_password])
@@ -87,3 +112,9 @@ class UpdateProfileSerializer(serializers.ModelSerializer):
             
         instance.save()
         return instance
+
+class UserActivitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserActivity
+        fields = ('action', 'timestamp', 'ip_address', 'user_agent')
+        read_only_fields = fields
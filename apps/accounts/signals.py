@@ -1,4 +1,4 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -6,7 +6,8 @@ from django.db import transaction
 from django.contrib.auth.signals import user_logged_in as auth_user_logged_in
 from django.contrib.auth.signals import user_logged_out as auth_user_logged_out
 
-from .models import UserActivity
+from .activity import activity_buffer
+from .cache import bump_user_version
 
 User = get_user_model()
 
@@ -23,11 +24,14 @@ def log_user_activity(user, action, request=None):
             ip_address = request.META.get('REMOTE_ADDR')
         user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]  # Truncate if too long
     
-    # Use transaction.on_commit to ensure the activity is only logged if the transaction succeeds
+    # Use transaction.on_commit to ensure the activity is only logged if the transaction succeeds.
+    # Rows are buffered and written in batches instead of one INSERT per event.
+    timestamp = timezone.now()
     transaction.on_commit(
-        lambda: UserActivity.objects.create(
+        lambda: activity_buffer.enqueue(
             user=user,
             action=action,
+            timestamp=timestamp,
             ip_address=ip_address,
             user_agent=user_agent
         )
@@ -41,15 +45,8 @@ def user_created_or_updated(sender, instance, created, **kwargs):
     else:
         action = 'User account updated'
     
-    # Get the request if available
-    from django.core.handlers.wsgi import WSGIRequest
-    request = None
-    for entry in reversed(WSGIRequest.__mro__):
-        if hasattr(entry, 'META') and hasattr(entry, 'user'):
-            request = entry
-            break
-    
-    log_user_activity(instance, action, request)
+    # Model signals carry no request, so there is no client address to record
+    log_user_activity(instance, action)
 
 @receiver(auth_user_logged_in)
 def user_logged_in(sender, request, user, **kwargs):
@@ -63,14 +60,22 @@ def user_logged_out(sender, request, user, **kwargs):
         log_user_activity(user, 'User logged out', request)
 
 @receiver(pre_save, sender=User)
-def user_password_changed(sender, instance, **kwargs):
+def user_password_changed(sender, instance, update_fields=None, **kwargs):
     """Log when a user changes their password"""
     if not instance.pk:
         return  # New user, not a password change
+    if update_fields is not None and 'password' not in update_fields:
+        return  # e.g. the last_login update made on every token issue
     
-    try:
-        old_password = User.objects.get(pk=instance.pk).password
-        if old_password != instance.password:
-            log_user_activity(instance, 'Password changed')
-    except User.DoesNotExist:
-        pass  # User doesn't exist yet
+    # Compare against the value the instance was loaded with instead of re-reading the row
+    if instance.has_changed('password'):
+        log_user_activity(instance, 'Password changed')
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the cached identity so saves, password changes and deactivation apply at once"""
+    user_id = instance.pk
+    bump_user_version(user_id)
+    # Bump again after commit so a request that read the old row meanwhile cannot re-cache it
+    transaction.on_commit(lambda: bump_user_version(user_id))
@@ -1,9 +1,24 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+import gzip
 import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from .activity import ActivityBuffer
+from .models import UserActivity, UserActivityArchive
+from .revocation import LocalRevocationBackend, TokenRevocationList
+from .signals import log_user_activity
 
 User = get_user_model()
 
@@ -105,3 +120,249 @@ class PasswordResetTests(APITestCase):
             content_type='application/json'
         )
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class ActivityBufferTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='buffer@example.com',
+            password='testpass123',
+            first_name='Buffer'
+        )
+        self.buffer = ActivityBuffer(batch_size=3, flush_interval=0)
+
+    def test_events_are_held_until_flush(self):
+        """Test queued events are written with a single bulk insert"""
+        self.buffer.enqueue(user=self.user, action='User logged in')
+        self.buffer.enqueue(user=self.user, action='User logged out')
+        self.assertEqual(UserActivity.objects.filter(user=self.user).count(), 0)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(UserActivity.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_full_batch_is_flushed(self):
+        """Test reaching the batch size flushes the buffer"""
+        for _ in range(3):
+            self.buffer.enqueue(user=self.user, action='User logged in')
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(UserActivity.objects.filter(user=self.user).count(), 3)
+
+    def test_log_user_activity_keeps_event_time(self):
+        """Test buffered rows keep the time of the event, not of the flush"""
+        with mock.patch('apps.accounts.signals.activity_buffer', self.buffer):
+            with self.captureOnCommitCallbacks(execute=True):
+                before = timezone.now()
+                log_user_activity(self.user, 'User logged in')
+        self.assertEqual(self.buffer.flush(), 1)
+        activity = UserActivity.objects.get(user=self.user)
+        self.assertGreaterEqual(activity.timestamp, before)
+        self.assertLessEqual(activity.timestamp, timezone.now())
+
+class ChangeTrackingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='tracked@example.com',
+            password='testpass123',
+            first_name='Tracked'
+        )
+
+    def test_changed_fields_without_query(self):
+        """Test changes are detected against the loaded values"""
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(user.has_changed('password'))
+            user.role = User.Role.TECHNICIAN
+            self.assertEqual(user.changed_fields, {'role'})
+            self.assertEqual(user.get_loaded_value('role'), User.Role.VIEWER)
+
+    def test_snapshot_is_refreshed_after_save(self):
+        """Test a saved instance reports no pending changes"""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('anotherpass456')
+        self.assertTrue(user.has_changed('password'))
+        user.save()
+        self.assertFalse(user.has_changed('password'))
+
+    def test_password_change_logged_without_select(self):
+        """Test the pre_save password check does not re-read the user"""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('anotherpass456')
+        with mock.patch('apps.accounts.signals.log_user_activity') as log:
+            with self.assertNumQueries(1):
+                user.save(update_fields=['password'])
+        log.assert_any_call(user, 'Password changed')
+
+    def test_jwt_login_queries(self):
+        """Test a JWT login reads the user once and writes last_login once"""
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                reverse('accounts:login'),
+                data=json.dumps({'email': 'tracked@example.com', 'password': 'testpass123'}),
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+class RotateUserActivityTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='rotate@example.com',
+            password='testpass123',
+            first_name='Rotate'
+        )
+        now = timezone.now()
+        self.recent = UserActivity.objects.create(user=self.user, action='recent', timestamp=now)
+        self.expired = UserActivity.objects.create(
+            user=self.user, action='expired', timestamp=now - timedelta(days=400)
+        )
+
+    def test_expired_rows_move_to_archive(self):
+        """Test rows older than the retention window leave the live table"""
+        call_command('rotate_user_activity', months=6, stdout=StringIO())
+        self.assertEqual(list(UserActivity.objects.values_list('action', flat=True)), ['recent'])
+        archived = UserActivityArchive.objects.get()
+        self.assertEqual((archived.pk, archived.action), (self.expired.pk, 'expired'))
+
+    def test_export_writes_compressed_ndjson(self):
+        """Test --export writes the expired rows to gzipped NDJSON and deletes them"""
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command(
+                'rotate_user_activity', months=6, export=True,
+                archive_dir=archive_dir, stdout=StringIO()
+            )
+            files = os.listdir(archive_dir)
+            self.assertEqual(len(files), 1)
+            with gzip.open(os.path.join(archive_dir, files[0]), 'rt') as archive:
+                rows = [json.loads(line) for line in archive]
+        self.assertEqual([row['action'] for row in rows], ['expired'])
+        self.assertFalse(UserActivityArchive.objects.exists())
+        self.assertEqual(UserActivity.objects.count(), 1)
+
+    def test_export_retry_does_not_duplicate_rows(self):
+        """Test rerunning an export that failed before deleting its rows keeps each row once"""
+        older = UserActivity.objects.create(
+            user=self.user, action='older', timestamp=self.expired.timestamp - timedelta(seconds=1)
+        )
+        with tempfile.TemporaryDirectory() as archive_dir:
+            options = {'months': 6, 'export': True, 'archive_dir': archive_dir, 'stdout': StringIO()}
+            with mock.patch('django.db.models.query.QuerySet.delete', side_effect=OSError('disk full')):
+                with self.assertRaises(OSError):
+                    call_command('rotate_user_activity', **options)
+            self.assertEqual(UserActivity.objects.count(), 3)
+
+            UserActivity.objects.create(user=self.user, action='late', timestamp=self.expired.timestamp)
+            call_command('rotate_user_activity', **options)
+            files = os.listdir(archive_dir)
+            self.assertEqual(len(files), 1)
+            with gzip.open(os.path.join(archive_dir, files[0]), 'rt') as archive:
+                rows = [json.loads(line) for line in archive]
+        self.assertEqual([row['action'] for row in rows], ['older', 'expired', 'late'])
+        self.assertEqual(rows[0]['id'], older.pk)
+        self.assertEqual(UserActivity.objects.count(), 1)
+
+class UserActivityViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='activity@example.com',
+            password='testpass123',
+            first_name='Activity'
+        )
+        self.client.force_authenticate(self.user)
+        self.now = timezone.now()
+        UserActivity.objects.bulk_create([
+            UserActivity(user=self.user, action=f'event {i}', timestamp=self.now - timedelta(hours=i))
+            for i in range(5)
+        ])
+        self.url = reverse('accounts:user_activity')
+
+    def test_cursor_pagination(self):
+        """Test the activity log is returned in cursor pages, newest first"""
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['action'] for row in response.data['results']], ['event 0', 'event 1'])
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([row['action'] for row in response.data['results']], ['event 2', 'event 3'])
+
+    def test_time_range_filter(self):
+        """Test since/until limit the log to a time range"""
+        response = self.client.get(self.url, {
+            'since': (self.now - timedelta(hours=3, minutes=30)).isoformat(),
+            'until': (self.now - timedelta(minutes=30)).isoformat(),
+        })
+        self.assertEqual(
+            [row['action'] for row in response.data['results']],
+            ['event 1', 'event 2', 'event 3']
+        )
+
+    def test_ndjson_stream(self):
+        """Test the whole log can be streamed as NDJSON"""
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['action'] for line in lines], [f'event {i}' for i in range(5)])
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='cached@example.com',
+            password='testpass123',
+            first_name='Cached'
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = reverse('accounts:profile')
+
+    def test_repeat_requests_skip_user_query(self):
+        """Test an authenticated request needs no query once the user is cached"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['email'], 'cached@example.com')
+
+    def test_deactivation_applies_immediately(self):
+        """Test saving the user invalidates the cached identity"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_role_change_is_visible(self):
+        """Test a role change is picked up on the next request"""
+        self.client.get(self.url)
+        self.user.role = User.Role.TECHNICIAN
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).data['role'], User.Role.TECHNICIAN)
+
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='revoke@example.com',
+            password='testpass123',
+            first_name='Revoke'
+        )
+        self.url = reverse('accounts:token_refresh')
+
+    def test_rotated_refresh_token_is_revoked(self):
+        """Test a refresh token cannot be used again after rotation"""
+        refresh = str(RefreshToken.for_user(self.user))
+        response = self.client.post(self.url, {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('refresh', response.data)
+
+        response = self.client.post(self.url, {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bloom_filter_answers_unrevoked_tokens(self):
+        """Test the backend set is only consulted for Bloom filter hits"""
+        revocations = TokenRevocationList(LocalRevocationBackend(2 ** 12, 4), lifetime=3600)
+        revocations.revoke('revoked-jti', time.time() + 60)
+        with mock.patch.object(revocations.backend, 'contains', wraps=revocations.backend.contains) as contains:
+            self.assertFalse(revocations.is_revoked('fresh-jti'))
+            contains.assert_not_called()
+            self.assertTrue(revocations.is_revoked('revoked-jti'))
+            contains.assert_called_once_with('revoked-jti')
+        self.assertFalse(revocations.revoke('revoked-jti', time.time() + 60))
@@ -1,8 +1,7 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
-    UserRegistrationView, UserLoginView, UserProfileView,
+    UserRegistrationView, UserLoginView, RevokingTokenRefreshView, UserProfileView,
     ChangePasswordView, UserActivityView, CustomPasswordResetConfirm,
     CustomPasswordResetRequest
 )
@@ -14,7 +13,7 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
     path('login/', UserLoginView.as_view(), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='welcome'), name='logout'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', RevokingTokenRefreshView.as_view(), name='token_refresh'),
     
     # Password reset endpoints
     path('password/reset/', CustomPasswordResetRequest.as_view(), name='password_reset'),
@@ -1,16 +1,24 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import get_user_model, update_session_auth_hash
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django_rest_passwordreset.views import ResetPasswordConfirm, ResetPasswordRequestToken
 
+from apps.core.renderers import NDJSONRenderer, ndjson_lines
+from apps.core.throttling import IPTokenBucketThrottle
 from .serializers import (
     UserSerializer, RegisterSerializer, CustomTokenObtainPairSerializer,
-    ChangePasswordSerializer, UpdateProfileSerializer
+    ChangePasswordSerializer, UpdateProfileSerializer, UserActivitySerializer,
+    RevokingTokenRefreshSerializer
 )
+from .filters import UserActivityFilter
+from .pagination import ActivityCursorPagination
 from .models import UserActivity
+from .signals import log_user_activity
 
 User = get_user_model()
 
@@ -21,12 +29,23 @@ class UserRegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'register'
 
 class UserLoginView(TokenObtainPairView):
     """
     Authenticate a user and return JWT tokens.
     """
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'login'
+
+class RevokingTokenRefreshView(TokenRefreshView):
+    """
+    Exchange a refresh token for a new access token.
+    With rotation enabled the old refresh token is revoked.
+    """
+    serializer_class = RevokingTokenRefreshSerializer
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
     """
@@ -79,22 +98,27 @@ class ChangePasswordView(APIView):
 class UserActivityView(generics.ListAPIView):
     """
     Get the activity log for the current user.
+
+    Results are cursor paginated, newest first, and can be limited with
+    ``?since=`` / ``?until=``. With ``?format=ndjson`` the whole (filtered) log
+    is streamed as newline-delimited JSON through a server-side cursor.
     """
-    serializer_class = None  # We'll use a custom response
+    serializer_class = UserActivitySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ActivityCursorPagination
+    filterset_class = UserActivityFilter
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
 
     def get_queryset(self):
-        return UserActivity.objects.filter(user=self.request.user).order_by('-timestamp')
+        return UserActivity.objects.filter(user=self.request.user).order_by('-timestamp', '-id')
     
     def list(self, request, *args, **kwargs):
-        activities = self.get_queryset()
-        data = [{
-            'action': activity.action,
-            'timestamp': activity.timestamp,
-            'ip_address': activity.ip_address,
-            'user_agent': activity.user_agent
-        } for activity in activities]
-        return Response(data)
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            rows = self.filter_queryset(self.get_queryset()).values(
+                *UserActivitySerializer.Meta.fields
+            ).iterator(chunk_size=2000)
+            return StreamingHttpResponse(ndjson_lines(rows), content_type=NDJSONRenderer.media_type)
+        return super().list(request, *args, **kwargs)
 
 class CustomPasswordResetConfirm(ResetPasswordConfirm):
     """
@@ -105,26 +129,16 @@ class CustomPasswordResetConfirm(ResetPasswordConfirm):
         if response.status_code == status.HTTP_200_OK:
             # Log password reset activity
             user = User.objects.get(email=request.data.get('email'))
-            UserActivity.objects.create(
-                user=user,
-                action='Password reset successful',
-                ip_address=self.get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
-            )
+            log_user_activity(user, 'Password reset successful', request)
         return response
-    
-    def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
 
 class CustomPasswordResetRequest(ResetPasswordRequestToken):
     """
     Custom password reset request view.
     """
+    throttle_classes = [IPTokenBucketThrottle]
+    throttle_scope = 'password_reset'
+
     def post(self, request, *args, **kwargs):
         response = super().post(request, *args, **kwargs)
         if response.status_code == status.HTTP_200_OK:
@@ -132,20 +146,8 @@ class CustomPasswordResetRequest(ResetPasswordRequestToken):
             email = request.data.get('email')
             try:
                 user = User.objects.get(email=email)
-                UserActivity.objects.create(
-                    user=user,
-                    action='Password reset requested',
-                    ip_address=self.get_client_ip(request),
-                    user_agent=request.META.get('HTTP_USER_AGENT', '')
-                )
+                log_user_activity(user, 'Password reset requested', request)
             except User.DoesNotExist:
                 pass  # Don't reveal if user exists or not
         return response
-    
-    def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+
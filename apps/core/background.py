@@ -0,0 +1,102 @@
+"""
+In-process queues drained by a background thread.
+
+``BackgroundQueue`` holds items in memory and hands them to ``handle`` in
+one batch every ``flush_interval`` seconds, or as soon as ``batch_size``
+items are waiting, so a request only ever appends to a list. Each gunicorn
+worker owns its own queue: ``register_process_hooks`` resets it in forked
+children and flushes it when the process exits. With ``flush_interval`` 0
+there is no thread and full batches are handled inline.
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundQueue:
+    """Base class: subclasses implement ``handle(items)``"""
+
+    thread_name = 'background-queue'
+    # Logged with the batch size when ``handle`` raises
+    failure_message = 'Failed to handle %d queued items'
+
+    def __init__(self, flush_interval, batch_size=1):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = []
+        self._worker = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def handle(self, items):
+        """Process one batch of items and return how many were handled"""
+        raise NotImplementedError
+
+    def put(self, item):
+        """Queue ``item`` for the next flush"""
+        if self._pid != os.getpid():
+            self._reset()
+
+        with self._lock:
+            self._pending.append(item)
+            full = len(self._pending) >= self.batch_size
+
+        if not self.flush_interval:
+            # No background worker: flush inline once the batch is full
+            if full:
+                self.flush()
+            return
+
+        self._ensure_worker()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Handle every queued item in one batch; return the number handled"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                return self.handle(batch)
+            except Exception:
+                # Queued work is best-effort; never let it take the worker down
+                logger.exception(self.failure_message, len(batch))
+                return 0
+
+    def register_process_hooks(self):
+        """Flush at exit, and start forked children with an empty queue"""
+        atexit.register(self.flush)
+        if hasattr(os, 'register_at_fork'):
+            # Items queued in the gunicorn master must not be handled twice by its workers
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            close_old_connections()
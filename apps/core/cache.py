@@ -0,0 +1,272 @@
+"""
+Two-tier cache backend.
+
+Reads are served from a bounded in-process LRU when possible and fall back
+to a shared tier (Redis in production, configured as its own cache alias)
+that every worker sees. Writes and deletes go to both tiers. Local entries
+live at most ``LOCAL_TIMEOUT`` seconds, which bounds how stale one worker
+can be after another worker changes a key.
+
+Entries can be stored with ``tags``. Each tag has a version in the cache;
+``invalidate_tags`` replaces it, so every entry stored under the old
+version turns into a miss at O(1) cost. Tag versions are cached locally as
+well, so other workers need to be told to drop theirs; that is what
+``apps.core.invalidation`` does.
+
+``get_or_set`` is single-flight: within a process one thread recomputes a
+missing key while the others wait for it, and across workers the first one
+to take a short lock in the shared tier recomputes while the rest poll for
+the value. An expiring dashboard key therefore costs one set of queries,
+not one per request in flight.
+"""
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+
+# What tagged entries are stored as: the value plus the tag versions it was computed under
+TaggedValue = namedtuple('TaggedValue', ['value', 'tags'])
+
+
+def tag_key(tag):
+    return f'tag-version:{tag}'
+
+
+class LocalLRU:
+    """Thread-safe LRU with per-entry expiry; values are pickled like LocMemCache does"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires, pickled = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def set(self, key, value, timeout):
+        """Store ``value`` for ``timeout`` seconds (None: no expiry)"""
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._data[key] = (expires, pickled)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TwoTierCache(BaseCache):
+    """
+    Cache backend with a local LRU in front of a shared cache alias.
+
+    OPTIONS:
+        SHARED: alias of the shared tier (default ``'shared'``)
+        LOCAL_MAX_ENTRIES: size of the local LRU (default 1000)
+        LOCAL_TIMEOUT: max seconds an entry is served locally (default 5)
+        LOCK_TIMEOUT: seconds a recomputation lock is held at most (default 10)
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self._shared_alias = options.get('SHARED', 'shared')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 10)
+        self.local = LocalLRU(options.get('LOCAL_MAX_ENTRIES', 1000))
+        self._flights_lock = threading.Lock()
+        self._flights = {}
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    def _local_timeout(self, timeout):
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _remember(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Copy a value into the local tier"""
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            return
+        self.local.set(self.make_and_validate_key(key, version), value, self._local_timeout(timeout))
+
+    def _forget(self, key, version=None):
+        self.local.delete(self.make_and_validate_key(key, version))
+
+    def evict_local(self, key, version=None):
+        """Drop ``key`` from this process only (the shared tier is left alone)"""
+        self._forget(key, version)
+
+    def tag_versions(self, tags):
+        """Return ``{tag: version}``, creating versions for tags that have none"""
+        keys = {tag_key(tag): tag for tag in tags}
+        found = self._get_many_raw(keys)
+        for key in keys.keys() - found.keys():
+            self.shared.add(key, uuid.uuid4().hex, None)
+            found[key] = self.shared.get(key)
+            self._remember(key, found[key], None)
+        return {keys[key]: value for key, value in found.items()}
+
+    def invalidate_tags(self, tags):
+        """Invalidate every entry stored under any of ``tags``"""
+        for tag in tags:
+            self.set(tag_key(tag), uuid.uuid4().hex, None)
+
+    def _unwrap(self, value):
+        """Return the value of a raw entry, or _MISSING if its tags were invalidated since"""
+        if not isinstance(value, TaggedValue):
+            return value
+        if self.tag_versions(value.tags) != value.tags:
+            return _MISSING
+        return value.value
+
+    def _get_raw(self, key, version=None):
+        value = self.local.get(self.make_and_validate_key(key, version))
+        if value is not _MISSING:
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            self._remember(key, value, version=version)
+        return value
+
+    def _get_many_raw(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self.local.get(self.make_and_validate_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self._remember(key, value, version=version)
+            found.update(shared)
+        return found
+
+    def get(self, key, default=None, version=None):
+        value = self._get_raw(key, version)
+        if value is _MISSING:
+            return default
+        value = self._unwrap(value)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        for key, value in self._get_many_raw(keys, version).items():
+            value = self._unwrap(value)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, tags=None):
+        if tags:
+            value = TaggedValue(value, self.tag_versions(tags))
+        self.shared.set(key, value, timeout, version=version)
+        self._remember(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._remember(key, value, timeout, version)
+        else:
+            self._forget(key, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._forget(key, version)
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._forget(key, version)
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        if self.local.get(self.make_and_validate_key(key, version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._forget(key, version)
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None, tags=None):
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            self.set(key, default, timeout, version, tags)
+            return default
+
+        # One thread per process per key; the others wait and re-read
+        flight_key = self.make_and_validate_key(key, version)
+        with self._flights_lock:
+            flight = self._flights.setdefault(flight_key, threading.Lock())
+        with flight:
+            try:
+                value = self.get(key, _MISSING, version=version)
+                if value is _MISSING:
+                    value = self._compute_once(key, default, timeout, version, tags)
+            finally:
+                with self._flights_lock:
+                    if self._flights.get(flight_key) is flight:
+                        del self._flights[flight_key]
+        return value
+
+    def _compute_once(self, key, compute, timeout, version, tags):
+        """Recompute ``key`` in one worker; the others poll the shared tier for the result"""
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while not self.shared.add(lock_key, token, self.lock_timeout, version=version):
+            time.sleep(delay)
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                return value
+            if time.monotonic() >= deadline:
+                # The lock holder died or is too slow; compute without it
+                break
+            delay = min(delay * 2, 0.2)
+        try:
+            value = compute()
+            self.set(key, value, timeout, version, tags)
+        finally:
+            if self.shared.get(lock_key, version=version) == token:
+                self.shared.delete(lock_key, version=version)
+        return value
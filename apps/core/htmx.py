@@ -0,0 +1,3 @@
+def is_htmx(request):
+    """True for requests made by HTMX, which only need the fragment that changed"""
+    return request.headers.get('HX-Request') == 'true'
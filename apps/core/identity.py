@@ -0,0 +1,109 @@
+"""
+Request-scoped identity map.
+
+Within one request every ``(model, pk)`` is loaded at most once: permission
+checks, ``get_object()`` and history writers all receive the same instance.
+Foreign keys of mapped instances are wired to other mapped instances (for
+example ``issue.created_by`` to ``request.user``) so following them does not
+query either. A mapped instance is only handed out through filters it is
+known to match: another queryset's filters cost one EXISTS query. The map
+lives on the request and goes away with it.
+"""
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject, empty
+
+
+class IdentityMap:
+    def __init__(self):
+        self._objects = {}
+        # WHERE clauses each mapped instance was loaded or checked through
+        self._matched = {}
+
+    def _key(self, model, pk):
+        return (model._meta.concrete_model, str(pk))
+
+    def get(self, model, pk):
+        return self._objects.get(self._key(model, pk))
+
+    def add(self, obj):
+        """Register ``obj`` (the first instance registered for a key wins) and return the mapped instance"""
+        key = self._key(type(obj), obj.pk)
+        obj = self._objects.setdefault(key, obj)
+        self.attach_related(obj)
+        return obj
+
+    def discard(self, obj):
+        key = self._key(type(obj), obj.pk)
+        self._objects.pop(key, None)
+        self._matched.pop(key, None)
+
+    def attach_related(self, obj):
+        """Point unloaded foreign keys of ``obj`` at instances already in the map"""
+        for field in obj._meta.concrete_fields:
+            if not field.many_to_one or field.is_cached(obj):
+                continue
+            related_pk = getattr(obj, field.attname)
+            if related_pk is None:
+                continue
+            related = self.get(field.related_model, related_pk)
+            if related is not None:
+                field.set_cached_value(obj, related)
+
+    def load(self, queryset, pk):
+        """
+        Return the instance with ``pk`` from the map, querying ``queryset`` on a
+        miss. On a hit the instance must also match the filters of ``queryset``
+        (for example a manager hiding soft-deleted rows); unless it already did,
+        that is checked with one EXISTS query, raising DoesNotExist if not.
+        """
+        key = self._key(queryset.model, pk)
+        where = queryset.query.where
+        matched = self._matched.setdefault(key, set())
+        obj = self._objects.get(key)
+        if obj is None:
+            obj = self.add(queryset.get(pk=pk))
+        elif where and where not in matched and not queryset.filter(pk=pk).exists():
+            raise queryset.model.DoesNotExist(f'{queryset.model._meta.object_name} {pk} does not match the query.')
+        matched.add(where.clone())
+        return obj
+
+
+def get_identity_map(request):
+    """Return the identity map of ``request``, creating it (seeded with the user) on first use"""
+    identity_map = getattr(request, '_identity_map', None)
+    if identity_map is None:
+        identity_map = request._identity_map = IdentityMap()
+        user = getattr(request, 'user', None)
+        if isinstance(user, SimpleLazyObject):
+            if user._wrapped is empty:
+                user._setup()
+            user = user._wrapped
+        if user is not None and user.is_authenticated:
+            identity_map.add(user)
+    return identity_map
+
+
+def get_mapped_object_or_404(request, queryset, pk):
+    """Identity-mapped replacement for ``django.shortcuts.get_object_or_404(queryset, pk=pk)``"""
+    if not hasattr(queryset, 'get'):
+        queryset = queryset._default_manager.all()
+    try:
+        return get_identity_map(request).load(queryset, pk)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+
+
+class IdentityMapObjectMixin:
+    """
+    SingleObjectMixin that resolves ``get_object()`` through the request's
+    identity map, so calling it from ``test_func``, ``get``/``post`` and
+    ``form_valid`` costs a single SELECT.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        if pk is None:
+            return super().get_object(queryset)
+        return get_mapped_object_or_404(self.request, queryset, pk)
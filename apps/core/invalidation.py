@@ -0,0 +1,144 @@
+"""
+Cross-worker cache invalidation bus.
+
+The local tier of ``TwoTierCache`` is private to each process, so a change
+made in one gunicorn worker has to be announced to the others. ``invalidate``
+deletes keys from the shared tier, bumps tag versions and publishes a message;
+every process subscribed to the bus then drops its local copies of those keys
+and tag versions. With ``REDIS_URL`` set the bus is a Redis pub/sub channel;
+otherwise an in-process stand-in delivers messages synchronously.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import tag_key
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'cache:invalidate'
+
+
+class LocalInvalidationBus:
+    """Delivers messages to the handlers of this process only"""
+
+    def __init__(self):
+        self._handlers = []
+
+    def subscribe(self, handler):
+        self._handlers.append(handler)
+
+    def publish(self, keys=(), tags=()):
+        for handler in self._handlers:
+            handler(list(keys), list(tags))
+
+
+class RedisInvalidationBus:
+    """
+    Publishes messages on a Redis channel. A daemon thread per process
+    listens on the channel and runs the handlers; it is started again in
+    forked children, even ones that never publish, and reconnects after
+    connection errors.
+    """
+
+    def __init__(self, url=None, channel=CHANNEL, client=None):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.channel = channel
+        self._handlers = []
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, handler):
+        self._handlers.append(handler)
+        self._ensure_listener()
+
+    def publish(self, keys=(), tags=()):
+        self._ensure_listener()
+        self.client.publish(self.channel, json.dumps({'keys': list(keys), 'tags': list(tags)}))
+
+    def restart_listener(self):
+        """Start a listener for this process; the parent's thread did not survive the fork"""
+        self._reset()
+        if self._handlers:
+            self._ensure_listener()
+
+    def _ensure_listener(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if self._listener is not None and self._listener.is_alive():
+            return
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(
+                target=self._run, name='cache-invalidation-listener', daemon=True
+            )
+            self._listener.start()
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    for handler in self._handlers:
+                        handler(payload.get('keys', []), payload.get('tags', []))
+            except Exception:
+                # Local entries still expire after LOCAL_TIMEOUT while we reconnect
+                logger.exception('Cache invalidation listener failed; reconnecting')
+                time.sleep(1)
+
+
+def _build_bus():
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    return RedisInvalidationBus(redis_url) if redis_url else LocalInvalidationBus()
+
+
+bus = _build_bus()
+
+
+def evict_local(keys, tags, cache=cache):
+    """Bus handler: drop this process's copies of ``keys`` and of the ``tags`` versions"""
+    if not hasattr(cache, 'evict_local'):
+        return
+    for key in keys:
+        cache.evict_local(key)
+    for tag in tags:
+        cache.evict_local(tag_key(tag))
+
+
+def invalidate(keys=(), tags=()):
+    """Invalidate ``keys`` and every entry tagged with one of ``tags``, in all workers"""
+    keys, tags = list(keys), list(tags)
+    if keys:
+        cache.delete_many(keys)
+    if tags and hasattr(cache, 'invalidate_tags'):
+        cache.invalidate_tags(tags)
+    bus.publish(keys, tags)
+
+
+bus.subscribe(evict_local)
+
+
+def _restart_listener_after_fork():
+    if isinstance(bus, RedisInvalidationBus):
+        bus.restart_listener()
+
+
+if hasattr(os, 'register_at_fork'):
+    # gunicorn --preload workers that only read must still evict their local tier
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
@@ -0,0 +1,47 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.core.outbox import dispatch_batch, purge_dispatched
+
+
+class Command(BaseCommand):
+    """Django command to deliver outbox events to their handlers"""
+
+    help = (
+        'Claim pending outbox events in batches with SELECT ... FOR UPDATE SKIP LOCKED and '
+        'deliver them to the registered handlers. Several dispatchers can run side by side.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--once', action='store_true', help='Deliver what is pending and exit')
+        parser.add_argument(
+            '--purge', action='store_true',
+            help='Delete events delivered more than OUTBOX_RETENTION_HOURS ago and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            hours = getattr(settings, 'OUTBOX_RETENTION_HOURS', 72)
+            purged = purge_dispatched(timezone.now() - timedelta(hours=hours), batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Purged {purged} delivered events'))
+            return
+
+        interval = getattr(settings, 'OUTBOX_POLL_INTERVAL', 1)
+        total = 0
+        while True:
+            close_old_connections()
+            delivered = dispatch_batch(batch_size=options['batch_size'])
+            total += delivered
+            if delivered:
+                # A full or partial batch: more may be waiting
+                continue
+            if options['once']:
+                break
+            time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(f'Delivered {total} events'))
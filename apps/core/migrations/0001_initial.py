@@ -0,0 +1,84 @@
+# Generated by Django 5.0 on 2026-10-19 15:40
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("topic", models.CharField(max_length=100, verbose_name="topic")),
+                (
+                    "aggregate_type",
+                    models.CharField(max_length=50, verbose_name="aggregate type"),
+                ),
+                (
+                    "aggregate_id",
+                    models.CharField(max_length=64, verbose_name="aggregate id"),
+                ),
+                (
+                    "payload",
+                    models.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="payload",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="available at"
+                    ),
+                ),
+                (
+                    "dispatched_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="dispatched at"
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="attempts"),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="last error")),
+            ],
+            options={
+                "verbose_name": "outbox event",
+                "verbose_name_plural": "outbox events",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("dispatched_at__isnull", True)),
+                        fields=["id"],
+                        name="core_outbox_pending_idx",
+                    ),
+                    models.Index(
+                        condition=models.Q(("dispatched_at__isnull", True)),
+                        fields=["aggregate_type", "aggregate_id", "id"],
+                        name="core_outbox_aggregate_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,202 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models import Q
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class ChangeTrackingMixin:
+    """
+    Remember the field values a model instance was loaded with.
+
+    ``from_db`` keeps a snapshot of the loaded values so that signal handlers
+    and views can ask which fields changed without re-reading the row. The
+    snapshot is refreshed after every save, once the post_save handlers have
+    run.
+    """
+
+    # Concrete field names to track; None tracks every concrete field.
+    tracked_fields = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        tracked = instance._tracked_attnames()
+        instance._loaded_values = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in tracked and value is not models.DEFERRED
+        }
+        return instance
+
+    def _tracked_attnames(self):
+        return {
+            field.attname
+            for field in self._meta.concrete_fields
+            if self.tracked_fields is None or field.name in self.tracked_fields
+        }
+
+    def _current_value(self, attname):
+        value = getattr(self, attname)
+        if isinstance(value, FieldFile):
+            return value.name
+        return value
+
+    def _attname(self, field_name):
+        return self._meta.get_field(field_name).attname
+
+    def _snapshot(self, attnames=None):
+        loaded = getattr(self, '_loaded_values', {})
+        deferred = self.get_deferred_fields()
+        if attnames is None:
+            attnames = self._tracked_attnames()
+        for attname in attnames:
+            if attname not in deferred:
+                loaded[attname] = self._current_value(attname)
+        self._loaded_values = loaded
+
+    def is_tracked(self, field_name):
+        """Return True if the loaded value of ``field_name`` is known"""
+        return self._attname(field_name) in getattr(self, '_loaded_values', {})
+
+    def get_loaded_value(self, field_name, default=None):
+        """Return the value ``field_name`` had when the instance was loaded or saved"""
+        return getattr(self, '_loaded_values', {}).get(self._attname(field_name), default)
+
+    def has_changed(self, field_name):
+        """
+        Return True if ``field_name`` differs from its loaded value.
+        Fields whose loaded value is unknown are reported as changed.
+        """
+        attname = self._attname(field_name)
+        loaded = getattr(self, '_loaded_values', {})
+        if attname not in loaded:
+            return True
+        return loaded[attname] != self._current_value(attname)
+
+    @property
+    def changed_fields(self):
+        """Names of the tracked fields that differ from their loaded values"""
+        loaded = getattr(self, '_loaded_values', {})
+        return {
+            field.name
+            for field in self._meta.concrete_fields
+            if field.attname in loaded and loaded[field.attname] != self._current_value(field.attname)
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            self._snapshot({self._attname(name) for name in update_fields} & self._tracked_attnames())
+        else:
+            self._snapshot()
+
+    save.alters_data = True
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is not None:
+            self._snapshot({self._attname(name) for name in fields} & self._tracked_attnames())
+        else:
+            self._snapshot()
+
+
+class AtomicWriteMixin:
+    """
+    Run ``save`` and ``delete`` in a transaction, so rows written by their
+    signal handlers (outbox events in particular) commit or roll back
+    together with the change itself.
+    """
+
+    def _write_db(self, using):
+        return using or router.db_for_write(type(self), instance=self)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=self._write_db(kwargs.get('using')), savepoint=False):
+            super().save(*args, **kwargs)
+
+    save.alters_data = True
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=self._write_db(using), savepoint=False):
+            return super().delete(using=using, keep_parents=keep_parents)
+
+    delete.alters_data = True
+
+
+class ConcurrentUpdateError(Exception):
+    """A versioned instance was saved from a copy older than the stored row"""
+
+    def __init__(self, instance):
+        super().__init__(f'{instance._meta.label} {instance.pk} changed after version {instance.version}')
+        self.instance = instance
+
+
+class VersionedMixin:
+    """
+    Optimistic concurrency control for models with an integer ``version``.
+
+    Saving a stored instance runs ``UPDATE ... WHERE version = N`` with the
+    version the instance carries and writes N + 1, so a save based on a
+    stale copy changes nothing and raises ConcurrentUpdateError instead of
+    overwriting the newer row. No lock is held between reading and writing.
+    Callers in a transaction catch the error outside an ``atomic()`` block
+    of their own. Queryset ``update()`` calls are not versioned.
+    """
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields and 'version' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'version']
+        super().save(*args, **kwargs)
+
+    save.alters_data = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        version_field = self._meta.get_field('version')
+        values = [value for value in values if value[0] is not version_field]
+        values.append((version_field, None, self.version + 1))
+        if super()._do_update(base_qs.filter(version=self.version), using, pk_val, values, update_fields, forced_update):
+            self.version += 1
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise ConcurrentUpdateError(self)
+        return False
+
+
+class OutboxEvent(models.Model):
+    """
+    A change event written in the same transaction as the change; the outbox
+    dispatcher delivers it to the registered handlers afterwards.
+    """
+    topic = models.CharField(_('topic'), max_length=100)
+    # Events of one aggregate are delivered in id order
+    aggregate_type = models.CharField(_('aggregate type'), max_length=50)
+    aggregate_id = models.CharField(_('aggregate id'), max_length=64)
+    payload = models.JSONField(_('payload'), encoder=DjangoJSONEncoder, default=dict)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    # Retries are pushed back by moving this forward
+    available_at = models.DateTimeField(_('available at'), default=timezone.now)
+    dispatched_at = models.DateTimeField(_('dispatched at'), null=True, blank=True)
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    last_error = models.TextField(_('last error'), blank=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = _('outbox event')
+        verbose_name_plural = _('outbox events')
+        indexes = [
+            # Pending events in delivery order
+            models.Index(fields=['id'], condition=Q(dispatched_at__isnull=True), name='core_outbox_pending_idx'),
+            # Earlier pending events of the same aggregate
+            models.Index(
+                fields=['aggregate_type', 'aggregate_id', 'id'],
+                condition=Q(dispatched_at__isnull=True),
+                name='core_outbox_aggregate_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.aggregate_type}:{self.aggregate_id} (#{self.pk})"
@@ -0,0 +1,195 @@
+"""
+Transactional outbox.
+
+Changes publish events by inserting ``OutboxEvent`` rows in the transaction
+that makes the change, so an event exists if and only if its change
+committed. ``dispatch_batch`` claims pending rows with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of dispatchers can run
+side by side, and hands them to the handlers registered for their topic.
+
+Delivery is at least once, and handlers must be idempotent. Events of one
+aggregate are delivered in order: an event is only claimed once every
+earlier event of its aggregate has been delivered, and a failing event is
+retried with exponential backoff while the events after it wait.
+"""
+import fnmatch
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Exists, Min, OuterRef, Q
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+_handlers = []
+
+METRICS_PREFIX = 'outbox:metrics:'
+
+
+def metrics_cache():
+    # The shared tier, so every worker reads the same counters at once
+    return caches['shared']
+
+
+def register(pattern):
+    """Decorator: deliver events whose topic matches the glob ``pattern`` to the function"""
+    def decorator(handler):
+        _handlers.append((pattern, handler))
+        return handler
+    return decorator
+
+
+def unregister(handler):
+    """Stop delivering events to ``handler``"""
+    _handlers[:] = [(pattern, registered) for pattern, registered in _handlers if registered is not handler]
+
+
+def handlers_for(topic):
+    """Handlers registered for ``topic``, in registration order"""
+    return [handler for pattern, handler in _handlers if fnmatch.fnmatchcase(topic, pattern)]
+
+
+def publish(topic, aggregate_type, aggregate_id, payload):
+    """Write one event; call it inside the transaction that makes the change"""
+    return OutboxEvent.objects.create(
+        topic=topic, aggregate_type=aggregate_type, aggregate_id=str(aggregate_id), payload=payload
+    )
+
+
+def publish_many(events):
+    """Write ``(topic, aggregate_type, aggregate_id, payload)`` events with one INSERT"""
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=topic, aggregate_type=aggregate_type, aggregate_id=str(aggregate_id), payload=payload)
+        for topic, aggregate_type, aggregate_id, payload in events
+    ])
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt: 2, 4, 8... seconds up to OUTBOX_MAX_RETRY_DELAY"""
+    return timedelta(seconds=min(2 ** attempts, getattr(settings, 'OUTBOX_MAX_RETRY_DELAY', 300)))
+
+
+def claimable(now):
+    """Pending events that are due and have no undelivered predecessor in their aggregate"""
+    earlier = OutboxEvent.objects.filter(
+        dispatched_at__isnull=True,
+        aggregate_type=OuterRef('aggregate_type'),
+        aggregate_id=OuterRef('aggregate_id'),
+        id__lt=OuterRef('id'),
+    )
+    return OutboxEvent.objects.filter(
+        dispatched_at__isnull=True, available_at__lte=now
+    ).exclude(Exists(earlier))
+
+
+def claim(now, batch_size):
+    """
+    Lock up to ``batch_size`` events in delivery order: the oldest pending
+    event of as many aggregates as other dispatchers have not locked, then
+    the events queued behind them. Other dispatchers never claim those,
+    since their aggregate still has an undelivered event.
+    """
+    heads = list(claimable(now).order_by('id').select_for_update(skip_locked=True)[:batch_size])
+    room = batch_size - len(heads)
+    if not heads or not room:
+        return heads
+    same_aggregate = Q()
+    for head in heads:
+        same_aggregate |= Q(aggregate_type=head.aggregate_type, aggregate_id=head.aggregate_id, id__gt=head.id)
+    followers = list(
+        OutboxEvent.objects.filter(same_aggregate, dispatched_at__isnull=True, available_at__lte=now)
+        .order_by('id').select_for_update()[:room]
+    )
+    return sorted(heads + followers, key=lambda event: event.id)
+
+
+def dispatch_batch(batch_size=None, now=None):
+    """
+    Claim up to ``batch_size`` events, deliver them and return how many were
+    delivered. Claimed rows stay locked until the batch commits.
+    """
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    now = now or timezone.now()
+    delivered, failed = [], []
+    with transaction.atomic():
+        events = claim(now, batch_size)
+        blocked = set()
+        for event in events:
+            aggregate = (event.aggregate_type, event.aggregate_id)
+            if aggregate in blocked:
+                # An earlier event of this aggregate failed; keep the order
+                continue
+            try:
+                # A handler's failed queries only roll back this event
+                with transaction.atomic():
+                    for handler in handlers_for(event.topic):
+                        handler(event)
+            except Exception as exc:
+                logger.exception('Outbox handler failed for event %s', event.pk)
+                event.attempts += 1
+                event.last_error = repr(exc)[:2000]
+                event.available_at = now + retry_delay(event.attempts)
+                failed.append(event)
+                blocked.add(aggregate)
+            else:
+                event.dispatched_at = timezone.now()
+                delivered.append(event)
+        OutboxEvent.objects.bulk_update(delivered, ['dispatched_at'])
+        OutboxEvent.objects.bulk_update(failed, ['attempts', 'last_error', 'available_at'])
+    record_metrics(delivered, failed)
+    return len(delivered)
+
+
+def _incr(name, delta):
+    key = METRICS_PREFIX + name
+    metrics_cache().add(key, 0, None)
+    metrics_cache().incr(key, delta)
+
+
+def record_metrics(delivered, failed):
+    """Count deliveries and failures and remember the lag of the last batch, for every worker"""
+    if delivered:
+        _incr('delivered', len(delivered))
+        lag = max((event.dispatched_at - event.created_at).total_seconds() for event in delivered)
+        metrics_cache().set_many({
+            METRICS_PREFIX + 'last_batch_lag': lag,
+            METRICS_PREFIX + 'last_dispatched_at': delivered[-1].dispatched_at,
+        }, None)
+    if failed:
+        _incr('failed', len(failed))
+
+
+def outbox_metrics():
+    """Delivery counters, the lag of the last batch and the age of the oldest pending event"""
+    pending = OutboxEvent.objects.filter(dispatched_at__isnull=True).aggregate(
+        count=Count('id'), oldest=Min('created_at')
+    )
+    names = ('delivered', 'failed', 'last_batch_lag', 'last_dispatched_at')
+    values = metrics_cache().get_many([METRICS_PREFIX + name for name in names])
+    metrics = {name: values.get(METRICS_PREFIX + name) for name in names}
+    metrics['delivered'] = metrics['delivered'] or 0
+    metrics['failed'] = metrics['failed'] or 0
+    metrics['pending'] = pending['count']
+    metrics['oldest_pending_age'] = (
+        (timezone.now() - pending['oldest']).total_seconds() if pending['oldest'] else 0
+    )
+    return metrics
+
+
+def purge_dispatched(older_than, batch_size=None):
+    """Delete events delivered before ``older_than`` in batches; return how many"""
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    purged = 0
+    while True:
+        ids = list(
+            OutboxEvent.objects.filter(dispatched_at__lt=older_than)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return purged
+        purged += OutboxEvent.objects.filter(id__in=ids).delete()[0]
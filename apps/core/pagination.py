@@ -0,0 +1,162 @@
+"""
+Keyset (cursor) pagination for server-rendered views and the API.
+
+A cursor holds the ordering values of the last row of a page, so fetching
+the next page is an indexed range scan however deep the reader scrolls,
+and rows inserted meanwhile do not shift later pages. Nullable ordering
+fields sort their NULLs last in either direction.
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+KeysetPage = namedtuple('KeysetPage', ['rows', 'next_cursor'])
+
+
+def _json_value(value):
+    # Full precision: DjangoJSONEncoder would drop microseconds and break ties
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def encode_cursor(values):
+    data = json.dumps([_json_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the values stored in ``cursor``, or None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _after(model, ordering, values):
+    """Q selecting the rows that come after ``values`` in ``ordering``"""
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        field = model._meta.get_field(name.lstrip('-'))
+        if value is None:
+            # NULLs sort last, so only other NULLs can follow on this field
+            equal &= Q(**{f'{field.name}__isnull': True})
+            continue
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        later = Q(**{f'{field.name}__{lookup}': value})
+        if field.null:
+            later |= Q(**{f'{field.name}__isnull': True})
+        condition |= equal & later
+        equal &= Q(**{field.name: value})
+    return condition
+
+
+def _order_by(model, ordering):
+    """``ordering`` as order_by() arguments, with NULLs last on nullable fields"""
+    expressions = []
+    for name in ordering:
+        field = model._meta.get_field(name.lstrip('-'))
+        if not field.null:
+            expressions.append(name)
+        elif name.startswith('-'):
+            expressions.append(F(field.name).desc(nulls_last=True))
+        else:
+            expressions.append(F(field.name).asc(nulls_last=True))
+    return expressions
+
+
+def keyset_page(queryset, cursor, page_size, ordering=('-created_at', '-id')):
+    """
+    Return one page of ``queryset`` in ``ordering`` starting after ``cursor``.
+
+    ``ordering`` must end with a unique field. An invalid cursor yields the
+    first page.
+    """
+    model = queryset.model
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(ordering):
+        try:
+            values = [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(ordering, values)
+            ]
+        except ValidationError:
+            values = None
+        else:
+            queryset = queryset.filter(_after(model, ordering, values))
+
+    rows = list(queryset.order_by(*_order_by(model, ordering))[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([
+            getattr(last, model._meta.get_field(name.lstrip('-')).attname) for name in ordering
+        ])
+    return KeysetPage(rows, next_cursor)
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF pagination over ``keyset_page``, for orderings whose leading fields
+    tie heavily, such as the technician queue. CursorPagination suits feeds
+    ordered by a timestamp (activity, comments, history); this class keeps
+    every ordering field in the cursor, so a page stays a single range scan
+    on a composite index whatever the ties.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page = keyset_page(
+            queryset, request.query_params.get(self.cursor_query_param),
+            self.get_page_size(request), self.ordering
+        )
+        self.next_cursor = page.next_cursor
+        return page.rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
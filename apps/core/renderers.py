@@ -0,0 +1,30 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON, one object per line.
+
+    Views normally stream NDJSON themselves with ``ndjson_lines``; the renderer
+    is what lets content negotiation accept ``?format=ndjson`` or an
+    ``Accept: application/x-ndjson`` header.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if isinstance(data, dict):
+            data = data.get('results', [data])
+        return ''.join(ndjson_lines(data)).encode(self.charset)
+
+
+def ndjson_lines(rows):
+    """Yield each row as one line of JSON"""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,109 @@
+"""
+Read replicas with read-your-writes stickiness.
+
+``ReplicaRouter`` sends the reads of a request to a random alias in
+``DATABASE_REPLICAS`` and every write to ``default``. Reads stay on the
+primary:
+
+* inside a transaction on the primary, where they must see its writes;
+* for the rest of a request once it has written anything;
+* for ``DATABASE_PRIMARY_STICKY_SECONDS`` after such a request, while the
+  client sends back the cookie ``PrimaryStickinessMiddleware`` set, so it
+  sees its own changes even if the replicas lag behind;
+* outside requests: management commands and workers write and read back
+  in loops, so they only ever use the primary;
+* inside ``use_primary()``. Values cached until the next write must be
+  read there: filled from a lagging replica just after a write
+  invalidated them, they would stay stale until they expire.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_COOKIE = 'use_primary'
+
+
+class _RequestState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar('replica_request_state', default=None)
+_forced = ContextVar('replica_use_primary', default=False)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+@contextmanager
+def use_primary():
+    """Send every read in the block to the primary"""
+    token = _forced.set(True)
+    try:
+        yield
+    finally:
+        _forced.reset(token)
+
+
+def reads_from_primary():
+    """True if reads in the current context must go to the primary"""
+    state = _state.get()
+    return (
+        state is None or state.pinned or _forced.get()
+        or connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+class ReplicaRouter:
+    """Database router for a primary (``default``) and its read replicas"""
+
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if not aliases or reads_from_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema by replication
+        return db not in replicas()
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Let ReplicaRouter route the reads of each request, and pin clients whose
+    request wrote to the primary for ``DATABASE_PRIMARY_STICKY_SECONDS``.
+    Install it above SessionMiddleware so session saves count as writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState(pinned=PRIMARY_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and replicas():
+            response.set_cookie(
+                PRIMARY_COOKIE, '1',
+                max_age=getattr(settings, 'DATABASE_PRIMARY_STICKY_SECONDS', 10),
+                secure=request.is_secure(), httponly=True, samesite='Lax'
+            )
+        return response
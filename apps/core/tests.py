@@ -0,0 +1,398 @@
+import json
+import os
+import select
+import threading
+import time
+from unittest import mock, skipUnless
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .background import BackgroundQueue
+from .cache import TwoTierCache
+from apps.issues.models import Issue, IssueComment
+from .invalidation import LocalInvalidationBus, RedisInvalidationBus, evict_local
+from .models import OutboxEvent
+from .outbox import dispatch_batch, outbox_metrics, publish, register, unregister
+from .replicas import PRIMARY_COOKIE, ReplicaRouter
+from .throttling import LocalBucketStore, bucket_store, throttle_metrics
+
+User = get_user_model()
+
+THROTTLE_SETTINGS = {
+    'DEFAULT_AUTHENTICATION_CLASSES': ('apps.accounts.authentication.CachedJWTAuthentication',),
+    'DEFAULT_THROTTLE_RATES': {'login': '2/min', 'issue_create': '1/min'},
+}
+
+
+class TokenBucketTests(TestCase):
+    def test_bucket_refills_over_time(self):
+        """Test a bucket admits a burst, rejects, then refills"""
+        store = LocalBucketStore()
+        self.assertTrue(store.take('k', 2, 100, 'scope')[0])
+        self.assertTrue(store.take('k', 2, 100, 'scope')[0])
+        self.assertFalse(store.take('k', 2, 100, 'scope')[0])
+        time.sleep(0.02)
+        self.assertTrue(store.take('k', 2, 100, 'scope')[0])
+        self.assertEqual(store.metrics(), {'scope:admitted': 3, 'scope:rejected': 1})
+
+    def test_empty_bucket_rejects(self):
+        """Test an exhausted bucket rejects and counts the rejection"""
+        store = LocalBucketStore()
+        store.take('k', 1, 0.001, 'scope')
+        allowed, tokens = store.take('k', 1, 0.001, 'scope')
+        self.assertFalse(allowed)
+        self.assertLess(tokens, 1)
+        self.assertEqual(store.metrics(), {'scope:admitted': 1, 'scope:rejected': 1})
+
+    def test_full_buckets_are_swept(self):
+        """Test buckets that have refilled to capacity are dropped on write"""
+        store = LocalBucketStore(sweep_at=3)
+        store.take('slow', 1, 0.001, 'scope')
+        store.take('a', 1, 100, 'scope')
+        time.sleep(0.02)
+        store.take('b', 1, 100, 'scope')
+        self.assertEqual(set(store._buckets), {'slow', 'b'})
+        self.assertFalse(store.take('slow', 1, 0.001, 'scope')[0])
+
+
+@override_settings(REST_FRAMEWORK=THROTTLE_SETTINGS)
+class ThrottledEndpointTests(APITestCase):
+    def setUp(self):
+        bucket_store.clear()
+        self.addCleanup(bucket_store.clear)
+
+    def test_login_rejected_before_database(self):
+        """Test a throttled login returns 429 without touching the database"""
+        url = reverse('accounts:login')
+        credentials = json.dumps({'email': 'nobody@example.com', 'password': 'wrong-password'})
+        for _ in range(2):
+            response = self.client.post(url, credentials, content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(url, credentials, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(throttle_metrics(), {'login:admitted': 2, 'login:rejected': 1})
+
+    def test_forwarded_for_does_not_pick_the_bucket(self):
+        """Test a spoofed X-Forwarded-For only counts when proxies are configured"""
+        url = reverse('accounts:login')
+        credentials = json.dumps({'email': 'nobody@example.com', 'password': 'wrong-password'})
+
+        def login_from(addresses):
+            return [
+                self.client.post(
+                    url, credentials, content_type='application/json', HTTP_X_FORWARDED_FOR=address
+                ).status_code
+                for address in addresses
+            ]
+
+        addresses = ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+        self.assertEqual(login_from(addresses)[-1], status.HTTP_429_TOO_MANY_REQUESTS)
+        bucket_store.clear()
+        with override_settings(REST_FRAMEWORK=dict(THROTTLE_SETTINGS, NUM_PROXIES=1)):
+            self.assertNotIn(status.HTTP_429_TOO_MANY_REQUESTS, login_from(addresses))
+
+    def test_anonymous_issue_create_throttled(self):
+        """Test only issue creation is throttled on the issues API"""
+        url = reverse('api-issues:issue-list')
+        self.assertEqual(self.client.post(url, {'title': 'Pothole'}).status_code, status.HTTP_201_CREATED)
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {'title': 'Pothole again'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+
+class RecordingQueue(BackgroundQueue):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+        self.handled = threading.Event()
+
+    def handle(self, items):
+        if items == ['boom']:
+            raise ValueError('boom')
+        self.batches.append(items)
+        self.handled.set()
+        return len(items)
+
+
+class BackgroundQueueTests(TestCase):
+    def test_worker_handles_full_batches(self):
+        """Test a full batch wakes the thread, which hands it to handle at once"""
+        queue = RecordingQueue(flush_interval=60, batch_size=2)
+        queue.put('a')
+        queue.put('b')
+        self.assertTrue(queue.handled.wait(5))
+        self.assertEqual((queue.batches, len(queue)), ([['a', 'b']], 0))
+
+    def test_failures_and_forks_drop_the_batch(self):
+        """Test a failing batch is logged and dropped, and a reset empties the queue"""
+        queue = RecordingQueue(flush_interval=0, batch_size=2)
+        queue.put('boom')
+        with self.assertLogs('apps.core.background', 'ERROR'):
+            self.assertEqual(queue.flush(), 0)
+        queue.put('a')
+        queue._reset()
+        self.assertEqual((len(queue), queue.flush()), (0, 0))
+
+
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.addCleanup(caches['shared'].clear)
+
+    def make_cache(self, **options):
+        """A cache as one worker process sees it; all of them share caches['shared']"""
+        return TwoTierCache('', {'OPTIONS': {'SHARED': 'shared', **options}})
+
+    def test_local_tier_bounded_by_timeout_and_size(self):
+        """Test local entries expire after LOCAL_TIMEOUT and are evicted in LRU order"""
+        cache = self.make_cache(LOCAL_TIMEOUT=0.05, LOCAL_MAX_ENTRIES=2)
+        cache.set('a', 1)
+        caches['shared'].set('a', 2)
+        self.assertEqual(cache.get('a'), 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.get('a'), 2)
+
+        cache.set('b', 1)
+        cache.set('c', 1)
+        self.assertEqual(len(cache.local), 2)
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 2, 'b': 1, 'c': 1})
+
+    def test_delete_reaches_both_tiers(self):
+        """Test delete() removes the shared value and this worker's copy"""
+        cache = self.make_cache()
+        cache.set('key', 'value')
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+        self.assertIsNone(caches['shared'].get('key'))
+
+    def test_get_or_set_is_single_flight(self):
+        """Test concurrent misses across threads and workers compute a value once"""
+        workers = [self.make_cache(), self.make_cache()]
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'open': 3}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda cache=cache: results.append(cache.get_or_set('counts', compute, 60)))
+            for cache in workers * 4
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'open': 3}] * 8)
+        self.assertIsNone(caches['shared'].get('counts:lock'))
+
+    def test_get_or_set_recomputes_after_stale_lock(self):
+        """Test a lock left by a dead worker only delays recomputation until it times out"""
+        cache = self.make_cache(LOCK_TIMEOUT=0.1)
+        caches['shared'].set('counts:lock', 'dead-worker', 60)
+        self.assertEqual(cache.get_or_set('counts', lambda: 5, 60), 5)
+
+    def test_tag_invalidation_reaches_other_workers_through_bus(self):
+        """Test a tag bumped in one worker is evicted from another worker's local tier"""
+        first, second = self.make_cache(LOCAL_TIMEOUT=60), self.make_cache(LOCAL_TIMEOUT=60)
+        bus = LocalInvalidationBus()
+        for worker in (first, second):
+            bus.subscribe(lambda keys, tags, worker=worker: evict_local(keys, tags, cache=worker))
+
+        first.set('counts', {'open': 1}, 60, tags=['issues'])
+        self.assertEqual(second.get('counts'), {'open': 1})
+
+        first.invalidate_tags(['issues'])
+        # Without the bus the second worker keeps its local copy of the old tag version
+        self.assertEqual(second.get('counts'), {'open': 1})
+        bus.publish(tags=['issues'])
+        self.assertIsNone(second.get('counts'))
+        self.assertIsNone(first.get('counts'))
+
+    @skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_forked_worker_listens_without_publishing(self):
+        """Test a forked worker that never publishes still receives invalidations"""
+        channel_r, channel_w = os.pipe()
+        result_r, result_w = os.pipe()
+        bus = RedisInvalidationBus(client=PipePubSubClient(channel_r))
+        # Like the gunicorn master with --preload: subscribed, but its listener never started
+        with mock.patch.object(bus, '_ensure_listener'):
+            bus.subscribe(lambda keys, tags: os.write(result_w, json.dumps([keys, tags]).encode()))
+
+        with mock.patch('apps.core.invalidation.bus', bus):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    time.sleep(5)
+                finally:
+                    os._exit(0)
+        self.addCleanup(os.waitpid, pid, 0)
+        self.addCleanup(os.kill, pid, 9)
+        os.write(channel_w, b'{"keys": ["issues:list"], "tags": ["issues"]}\n')
+        self.assertTrue(select.select([result_r], [], [], 5)[0])
+        self.assertEqual(json.loads(os.read(result_r, 1024)), [['issues:list'], ['issues']])
+
+
+class PipePubSubClient:
+    """Stands in for a Redis client: messages are lines read from a pipe"""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def pubsub(self, **options):
+        return self
+
+    def subscribe(self, channel):
+        pass
+
+    def listen(self):
+        with os.fdopen(self.fd, 'rb') as stream:
+            for line in stream:
+                yield {'data': line}
+
+
+@override_settings(ISSUE_SLA_HOURS={})
+class OutboxTests(TestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.addCleanup(caches['shared'].clear)
+        self.delivered = []
+
+    def handle(self, pattern, handler):
+        register(pattern)(handler)
+        self.addCleanup(unregister, handler)
+
+    def topics(self):
+        return list(OutboxEvent.objects.values_list('topic', flat=True))
+
+    def test_events_written_with_the_change(self):
+        """Test issue and comment writes publish events, and rolled back writes do not"""
+        user = User.objects.create_user(email='reporter@example.com', password='testpass123')
+        issue = Issue.objects.create(title='Pothole', created_by=user)
+        issue.status = Issue.Status.IN_PROGRESS
+        issue.save(update_fields=['status', 'updated_at'])
+        IssueComment.objects.create(issue=issue, author=user, content='On my way')
+        self.assertEqual(self.topics(), ['issue.created', 'issue.updated', 'issue.comment.created'])
+        self.assertEqual(OutboxEvent.objects.get(topic='issue.updated').payload['changed'], ['status'])
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Issue.objects.create(title='Crack', created_by=user)
+            raise RuntimeError
+        issue_id = issue.pk
+        issue.delete()
+        self.assertEqual(self.topics()[3:], ['issue.deleted'])
+        self.assertEqual(set(OutboxEvent.objects.values_list('aggregate_id', flat=True)), {str(issue_id)})
+
+    def test_dispatch_keeps_aggregate_order_across_retries(self):
+        """Test a failed event is retried later and holds back its aggregate only"""
+        failures = ['fail once']
+
+        def deliver(event):
+            if event.payload['n'] == 1 and failures:
+                raise ValueError(failures.pop())
+            self.delivered.append((event.aggregate_id, event.payload['n']))
+
+        self.handle('test.*', deliver)
+        for aggregate_id, n in (('a', 1), ('a', 2), ('b', 3)):
+            publish('test.event', 'test', aggregate_id, {'n': n})
+
+        self.assertEqual(dispatch_batch(), 1)
+        self.assertEqual(self.delivered, [('b', 3)])
+        failed = OutboxEvent.objects.get(payload__n=1)
+        self.assertEqual((failed.attempts, failed.dispatched_at), (1, None))
+        self.assertIn('fail once', failed.last_error)
+        # Backing off: nothing is due yet
+        self.assertEqual(dispatch_batch(), 0)
+
+        self.assertEqual(dispatch_batch(now=timezone.now() + timedelta(minutes=1)), 2)
+        self.assertEqual(self.delivered, [('b', 3), ('a', 1), ('a', 2)])
+        self.assertFalse(OutboxEvent.objects.filter(dispatched_at__isnull=True).exists())
+
+    def test_metrics_endpoint(self):
+        """Test the metrics count delivered, failed and pending events for admins only"""
+        self.handle('test.*', lambda event: None)
+        publish('test.event', 'test', 'a', {})
+        publish('other.event', 'test', 'b', {})
+        dispatch_batch(batch_size=1)
+        metrics = outbox_metrics()
+        self.assertEqual((metrics['delivered'], metrics['failed'], metrics['pending']), (1, 0, 1))
+        self.assertGreaterEqual(metrics['last_batch_lag'], 0)
+
+        url = reverse('outbox-metrics')
+        admin = User.objects.create_superuser(email='admin@example.com', password='testpass123')
+        self.assertIn(self.client.get(url).status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(url).json()['pending'], 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_PRIMARY_STICKY_SECONDS=10)
+class ReplicaRouterTests(TransactionTestCase):
+    """Test reads go to the replica unless the client just wrote; TestCase transactions would pin them to the primary"""
+
+    # The replica alias only exists while these tests run, so the runner never sets it up
+    databases = {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        # A second connection to the test database stands in for a replica. As a
+        # test mirror of default it is never flushed or created on its own.
+        default = connections['default'].settings_dict
+        connections.settings['replica'] = dict(default, TEST=dict(default['TEST'], MIRROR='default'))
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.databases = {'default'}
+
+    def setUp(self):
+        Issue.objects.create(title='Pothole')
+
+    def list_issues(self):
+        """Return the listed titles and the number of queries run on the replica"""
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(reverse('api-issues:issue-list'))
+        return sorted(issue['title'] for issue in response.json()['results']), len(replica)
+
+    def test_routing_outside_requests(self):
+        """Test code outside requests only uses the primary, and replicas get no migrations"""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Issue), 'default')
+        self.assertEqual(router.db_for_write(Issue), 'default')
+        self.assertFalse(router.allow_migrate('replica', 'issues'))
+
+    def test_clients_read_their_writes(self):
+        """Test a client that wrote reads from the primary until its cookie expires"""
+        titles, replica_queries = self.list_issues()
+        self.assertEqual(titles, ['Pothole'])
+        self.assertGreater(replica_queries, 0)
+
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.post(reverse('api-issues:issue-list'), {'title': 'Crack'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica), 0)
+        self.assertEqual(response.cookies[PRIMARY_COOKIE]['max-age'], 10)
+        self.assertEqual(self.list_issues(), (['Crack', 'Pothole'], 0))
+
+        del self.client.cookies[PRIMARY_COOKIE]
+        self.assertGreater(self.list_issues()[1], 0)
@@ -0,0 +1,199 @@
+"""
+Token-bucket throttling for DRF views.
+
+Views opt in with ``throttle_classes`` and a ``throttle_scope``. The bucket
+size and refill rate come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``:
+``'10/min'`` allows a burst of 10 requests, refilled at 10 per minute. The
+per-user throttle reads the ``<scope>_user`` rate. Scopes without a rate are
+not throttled.
+
+Buckets live in Redis when ``REDIS_URL`` is set (updated atomically by a Lua
+script) and in a lock-protected in-process store otherwise. Throttles run
+before the view handler, so rejected requests never reach password hashing
+or INSERTs.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+if allowed == 1 then
+    redis.call('HINCRBY', KEYS[2], ARGV[4] .. ':admitted', 1)
+else
+    redis.call('HINCRBY', KEYS[2], ARGV[4] .. ':rejected', 1)
+end
+return {allowed, tostring(tokens)}
+"""
+
+METRICS_KEY = 'throttle:metrics'
+
+
+class LocalBucketStore:
+    """In-process token buckets; one lock makes each take() atomic
+
+    A bucket that has refilled to capacity is the same as a missing one, so
+    once the store holds ``sweep_at`` buckets every full one is dropped.
+    """
+
+    def __init__(self, sweep_at=10000):
+        self.sweep_at = sweep_at
+        self._next_sweep = sweep_at
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._metrics = Counter()
+
+    def take(self, key, capacity, rate, scope):
+        """Take one token; return ``(allowed, tokens_left)``"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # The third field is when the bucket will be full again
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            self._metrics[f'{scope}:{"admitted" if allowed else "rejected"}'] += 1
+            if len(self._buckets) >= self._next_sweep:
+                self._sweep(now)
+        return allowed, tokens
+
+    def _sweep(self, now):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        # Keep sweeps amortised when most buckets are still refilling
+        self._next_sweep = max(self.sweep_at, 2 * len(self._buckets))
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._metrics)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._metrics.clear()
+            self._next_sweep = self.sweep_at
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker, one Redis round trip per check"""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key, capacity, rate, scope):
+        allowed, tokens = self.script(
+            keys=[f'throttle:bucket:{key}', METRICS_KEY],
+            args=[capacity, rate, time.time(), scope],
+        )
+        return bool(allowed), float(tokens)
+
+    def metrics(self):
+        return {
+            field.decode(): int(value)
+            for field, value in self.client.hgetall(METRICS_KEY).items()
+        }
+
+    def clear(self):
+        self.client.delete(METRICS_KEY)
+
+
+def _build_store():
+    redis_url = getattr(settings, 'REDIS_URL', None)
+    return RedisBucketStore(redis_url) if redis_url else LocalBucketStore()
+
+
+bucket_store = _build_store()
+
+
+def parse_rate(rate):
+    """Parse ``'N/period'`` into ``(N, seconds)``, as DRF's own throttles do"""
+    num, period = rate.split('/')
+    return int(num), {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[period[0]]
+
+
+def throttle_metrics():
+    """Admitted and rejected request counts per scope, e.g. ``{'login:rejected': 3}``"""
+    return bucket_store.metrics()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class; subclasses decide what identifies a bucket"""
+    rate_suffix = ''
+
+    def get_ident_key(self, request):
+        raise NotImplementedError('.get_ident_key() must be overridden')
+
+    def get_rate(self, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return None, None
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope + self.rate_suffix)
+        if rate is None:
+            return scope, None
+        return scope, parse_rate(rate)
+
+    def allow_request(self, request, view):
+        scope, rate = self.get_rate(view)
+        if rate is None:
+            return True
+        ident = self.get_ident_key(request)
+        if ident is None:
+            return True
+
+        capacity, duration = rate
+        self.refill_rate = capacity / duration
+        metric_scope = scope + self.rate_suffix
+        allowed, self.tokens = bucket_store.take(
+            f'{metric_scope}:{ident}', capacity, self.refill_rate, metric_scope
+        )
+        return allowed
+
+    def wait(self):
+        return (1 - self.tokens) / self.refill_rate
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """
+    One bucket per client address. X-Forwarded-For is only used when
+    ``NUM_PROXIES`` says how many of its entries trusted proxies added;
+    otherwise clients could pick a new bucket per request by sending it.
+    """
+
+    def get_ident_key(self, request):
+        if api_settings.NUM_PROXIES is None:
+            return f"ip:{request.META.get('REMOTE_ADDR')}"
+        return f'ip:{self.get_ident(request)}'
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """One bucket per authenticated user; anonymous requests are left to the IP bucket"""
+    rate_suffix = '_user'
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return None
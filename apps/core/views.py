@@ -0,0 +1,26 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .outbox import outbox_metrics
+from .throttling import throttle_metrics
+
+
+class ThrottleMetricsView(APIView):
+    """
+    Admitted and rejected request counts per throttle scope.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(throttle_metrics())
+
+
+class OutboxMetricsView(APIView):
+    """
+    Delivered, failed and pending outbox events and the dispatcher lag.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(outbox_metrics())
@@ -0,0 +1,65 @@
+"""
+Denormalized activity counters on ``Issue``.
+
+``comment_count``, ``attachment_count`` and ``last_activity_at`` let lists
+show "N comments, M attachments, last active at X" without joining the
+comment, attachment and history tables. They are changed only through
+``F()`` updates issued here, so concurrent writers never overwrite each
+other, and ``Issue.save`` leaves them out of its UPDATE. The
+``reconcile_issue_activity`` command repairs any drift.
+"""
+from django.db.models import Count, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Issue, IssueAttachment, IssueChangeSet, IssueComment, IssueHistory
+
+
+def record_activity(issue_id, comments=0, attachments=0, at=None):
+    """
+    Adjust the counters of one issue with a single UPDATE. ``at`` moves
+    ``last_activity_at`` forward, never back; removals pass None.
+    """
+    updates = {}
+    if comments:
+        updates['comment_count'] = F('comment_count') + comments
+    if attachments:
+        updates['attachment_count'] = F('attachment_count') + attachments
+    if at is not None:
+        # Coalesce: Greatest is NULL on SQLite if any argument is
+        updates['last_activity_at'] = Greatest(Coalesce(F('last_activity_at'), Value(at)), Value(at))
+    if updates:
+        Issue.objects.filter(pk=issue_id).update(**updates)
+
+
+def _grouped(model, issue_ids, timestamp):
+    """``(issue_id, row count, latest timestamp)`` for the rows of ``model``"""
+    return (
+        model.objects.filter(issue_id__in=issue_ids).order_by()
+        .values_list('issue_id').annotate(Count('id'), Max(timestamp))
+    )
+
+
+def actual_activity(issue_ids):
+    """
+    Return ``{issue_id: (comment_count, attachment_count, last_activity_at)}``
+    for ``issue_ids`` as computed from the related tables, with one grouped
+    query per table.
+    """
+    activity = {issue_id: [0, 0, None] for issue_id in issue_ids}
+
+    def touch(issue_id, timestamp):
+        current = activity[issue_id][2]
+        if timestamp is not None and (current is None or timestamp > current):
+            activity[issue_id][2] = timestamp
+
+    for issue_id, count, latest in _grouped(IssueComment, issue_ids, 'created_at'):
+        activity[issue_id][0] = count
+        touch(issue_id, latest)
+    for issue_id, count, latest in _grouped(IssueAttachment, issue_ids, 'uploaded_at'):
+        activity[issue_id][1] = count
+        touch(issue_id, latest)
+    # Legacy history rows count until convert_issue_history has moved them
+    for model in (IssueChangeSet, IssueHistory):
+        for issue_id, _count, latest in _grouped(model, issue_ids, 'changed_at'):
+            touch(issue_id, latest)
+    return {issue_id: tuple(values) for issue_id, values in activity.items()}
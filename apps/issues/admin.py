@@ -2,14 +2,15 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
-from .models import Issue, IssueComment, IssueAttachment, IssueHistory
+from .deletion import delete_issue
+from .models import ArchivedIssue, Issue, IssueComment, IssueAttachment, IssueChangeSet, IssueHistory
 
 @admin.register(Issue)
 class IssueAdmin(admin.ModelAdmin):
     list_display = ('title', 'status', 'priority', 'created_by', 'assigned_to', 'created_at', 'updated_at')
     list_filter = ('status', 'priority', 'created_at', 'updated_at')
     search_fields = ('title', 'description', 'location')
-    readonly_fields = ('created_at', 'updated_at', 'created_by')
+    readonly_fields = ('created_at', 'updated_at', 'created_by', 'comment_count', 'attachment_count', 'last_activity_at')
     fieldsets = (
         (None, {
             'fields': ('title', 'description', 'status', 'priority')
@@ -20,6 +21,10 @@ class IssueAdmin(admin.ModelAdmin):
         (_('Location'), {
             'fields': ('location', 'latitude', 'longitude')
         }),
+        (_('Activity'), {
+            'fields': ('comment_count', 'attachment_count', 'last_activity_at'),
+            'classes': ('collapse',)
+        }),
         (_('Timestamps'), {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -30,6 +35,14 @@ class IssueAdmin(admin.ModelAdmin):
         if not obj.pk:
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+    
+    def delete_model(self, request, obj):
+        # Removed in the background like deletions from the site
+        delete_issue(obj)
+    
+    def delete_queryset(self, request, queryset):
+        for issue in queryset:
+            delete_issue(issue)
 
 class IssueCommentInline(admin.StackedInline):
     model = IssueComment
@@ -113,3 +126,35 @@ class HistoryAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         return False
+
+@admin.register(IssueChangeSet)
+class ChangeSetAdmin(admin.ModelAdmin):
+    list_display = ('issue', 'changed_fields', 'changed_by', 'changed_at')
+    list_filter = ('changed_at', 'changed_by')
+    search_fields = ('issue__title',)
+    readonly_fields = ('issue', 'changed_by', 'changed_at', 'changes')
+    
+    def changed_fields(self, obj):
+        return ', '.join(obj.changes)
+    changed_fields.short_description = _('Fields')
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedIssue)
+class ArchivedIssueAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'priority', 'closed_at', 'archived_at')
+    search_fields = ('title', 'description', 'location')
+    readonly_fields = (
+        'id', 'title', 'description', 'location', 'priority', 'created_by_id',
+        'created_at', 'closed_at', 'archived_at', 'document',
+    )
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
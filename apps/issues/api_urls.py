@@ -7,12 +7,18 @@ app_name = 'api-issues'
 urlpatterns = [
     # API endpoints for issues
     path('', views.IssueListCreateAPIView.as_view(), name='issue-list'),
+    path('queue/', views.IssueQueueAPIView.as_view(), name='my-queue'),
     path('<int:pk>/', views.issue_detail, name='issue-detail'),
-    path('<int:pk>/update/', views.issue_update, name='issue-update'),
+    path('<int:pk>/update/', views.IssueUpdateAPIView.as_view(), name='issue-update'),
     path('<int:pk>/delete/', views.issue_delete, name='issue-delete'),
+    path('<int:pk>/comments/', views.IssueCommentListAPIView.as_view(), name='issue-comments'),
+    path('<int:pk>/history/', views.IssueHistoryListAPIView.as_view(), name='issue-history'),
     path('<int:issue_id>/comments/add/', views.add_comment, name='add-comment'),
     path('<int:issue_id>/attachments/upload/', views.upload_attachment, name='upload-attachment'),
     path('<int:pk>/status/', views.update_issue_status, name='update-status'),
+    # Closed issues moved out by archive_closed_issues
+    path('archive/', views.ArchivedIssueSearchAPIView.as_view(), name='archive-search'),
+    path('archive/<int:pk>/', views.ArchivedIssueDetailAPIView.as_view(), name='archived-issue-detail'),
 ]
 
 urlpatterns = format_suffix_patterns(urlpatterns)
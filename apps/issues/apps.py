@@ -4,3 +4,7 @@ class IssuesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.issues'
     verbose_name = 'Issue Management'
+    
+    def ready(self):
+        # Import signals to register them
+        import apps.issues.signals  # noqa
@@ -0,0 +1,101 @@
+"""
+Cold archival of closed issues.
+
+``archive_closed_issues`` moves issues that have been closed, with no
+activity, for ``ISSUE_ARCHIVE_AFTER_DAYS`` out of the hot tables, one
+locked batch per transaction. Each becomes a single ArchivedIssue row under
+its own id, holding the issue with its comments, attachments and history as
+one JSON document, and the issue is handed to apps.issues.deletion, which
+removes its hot rows in the background. Attachment files stay in storage;
+the document keeps their paths.
+
+Archived issues are read by primary key (``archived_issue``) or found by a
+sequential scan over title, description and location
+(``search_archive``), the slow path.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, prefetch_related_objects
+from django.utils import timezone
+
+from .deletion import mark_deleted
+from .events import issues_archived
+from .models import ArchivedIssue, Issue
+
+
+def _row(instance):
+    # get_prep_value turns files into their storage paths
+    return {
+        field.attname: field.get_prep_value(field.value_from_object(instance))
+        for field in instance._meta.concrete_fields
+    }
+
+
+def archive_document(issue):
+    """The issue and its related rows; related managers should be prefetched"""
+    return {
+        'issue': _row(issue),
+        'comments': [_row(comment) for comment in issue.comments.all()],
+        'attachments': [_row(attachment) for attachment in issue.attachments.all()],
+        'change_sets': [_row(change_set) for change_set in issue.change_sets.all()],
+        # Rows convert_issue_history has not moved yet
+        'history': [_row(row) for row in issue.history.all()],
+    }
+
+
+def archivable(cutoff):
+    """Closed issues with no change and no activity since ``cutoff``"""
+    return Issue.objects.filter(status=Issue.Status.CLOSED, updated_at__lt=cutoff).filter(
+        Q(last_activity_at__isnull=True) | Q(last_activity_at__lt=cutoff)
+    )
+
+
+def archive_batch(cutoff, batch_size):
+    """Archive up to ``batch_size`` issues in one transaction and return how many"""
+    with transaction.atomic():
+        issues = list(
+            archivable(cutoff).order_by('pk').select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not issues:
+            return 0
+        prefetch_related_objects(issues, 'comments', 'attachments', 'change_sets', 'history')
+        now = timezone.now()
+        ArchivedIssue.objects.bulk_create([
+            ArchivedIssue(
+                id=issue.pk, title=issue.title, description=issue.description,
+                location=issue.location, priority=issue.priority,
+                created_by_id=issue.created_by_id, created_at=issue.created_at,
+                closed_at=issue.updated_at, archived_at=now, document=archive_document(issue)
+            )
+            for issue in issues
+        ])
+        mark_deleted(issues, delete_files=False)
+        issues_archived([issue.pk for issue in issues], now)
+    return len(issues)
+
+
+def archive_closed_issues(cutoff=None, batch_size=None):
+    """Archive every archivable issue, a batch per transaction; return how many"""
+    if cutoff is None:
+        cutoff = timezone.now() - timedelta(days=getattr(settings, 'ISSUE_ARCHIVE_AFTER_DAYS', 730))
+    batch_size = batch_size or getattr(settings, 'ISSUE_ARCHIVE_BATCH_SIZE', 100)
+    archived = 0
+    while True:
+        count = archive_batch(cutoff, batch_size)
+        if not count:
+            return archived
+        archived += count
+
+
+def archived_issue(pk):
+    """The archived issue with id ``pk``, or None"""
+    return ArchivedIssue.objects.filter(pk=pk).first()
+
+
+def search_archive(query):
+    """Archived issues whose title, description or location contain ``query``"""
+    return ArchivedIssue.objects.filter(
+        Q(title__icontains=query) | Q(description__icontains=query) | Q(location__icontains=query)
+    )
@@ -0,0 +1,108 @@
+"""
+Cache tags and the query cache for issue data.
+
+Anything cached from issue queries should be stored with ``ISSUES_TAG`` (or
+a narrower tag below) so that the save signals in ``apps.issues.signals``
+can invalidate it in every worker. A tag works as a generation counter:
+bumping it is one write, however many entries were stored under it.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.accounts.cache import user_versions
+from apps.core.invalidation import invalidate
+from apps.core.replicas import use_primary
+
+# Every cached value derived from more than one issue
+ISSUES_TAG = 'issues'
+
+# Query parameters that select issue list results, in IssueListView order
+LIST_FILTERS = ('status', 'priority', 'q', 'assigned_to_me', 'created_by_me')
+LIST_FLAGS = ('assigned_to_me', 'created_by_me')
+
+
+def issue_tag(issue_id):
+    """Tag for cached values derived from a single issue and its history"""
+    return f'issue:{issue_id}'
+
+
+def status_tag(status):
+    """Tag for cached values derived only from issues with ``status``"""
+    return f'issues:status:{status}'
+
+
+def invalidate_now_and_on_commit(tags):
+    """Bump ``tags`` in every worker, and again once the current transaction commits"""
+    invalidate(tags=tags)
+    # Again after commit so a worker that read the old rows meanwhile cannot keep them cached
+    transaction.on_commit(lambda: invalidate(tags=tags))
+
+
+def issues_generation():
+    """Current version of ``ISSUES_TAG``; template fragments built from many issues vary on it"""
+    return cache.tag_versions([ISSUES_TAG])[ISSUES_TAG]
+
+
+def with_user_versions(issues):
+    """
+    Set ``issue.user_versions`` to the version stamps of the reporter and
+    assignee; the issue_row fragment varies on it, so renamed users get fresh rows.
+    """
+    versions = user_versions({user_id for issue in issues for user_id in (issue.created_by_id, issue.assigned_to_id)})
+    for issue in issues:
+        issue.user_versions = f'{versions.get(issue.created_by_id)}:{versions.get(issue.assigned_to_id)}'
+    return issues
+
+
+def normalize_list_filters(params, user):
+    """Return the list filters in ``params`` as a sorted tuple of ``(name, value)``"""
+    filters = {}
+    for name in LIST_FILTERS:
+        value = params.get(name, '').strip()
+        if not value:
+            continue
+        if name in LIST_FLAGS:
+            # The view only checks these for truthiness; they depend on who is asking
+            filters[name] = '1'
+            filters['user'] = str(user.pk)
+        elif name == 'q':
+            # icontains ignores case
+            filters[name] = value.lower()
+        else:
+            filters[name] = value
+    return tuple(sorted(filters.items()))
+
+
+def issue_list_tags(filters):
+    """
+    Lists restricted to one status only change when an issue enters or leaves
+    that status; every other list changes on any issue write.
+    """
+    status = dict(filters).get('status')
+    return [status_tag(status)] if status else [ISSUES_TAG]
+
+
+def cached_issue_ids(queryset, params, user):
+    """
+    Return the ordered primary keys matched by an issue list ``queryset``.
+
+    The result is shared by every request with the same normalized filters
+    until an issue write bumps one of its tags.
+    """
+    filters = normalize_list_filters(params, user)
+    digest = hashlib.sha1(json.dumps(filters).encode()).hexdigest()
+    def fetch():
+        # Kept until the next issue write, so never from a replica that may lag behind it
+        with use_primary():
+            return list(queryset.values_list('pk', flat=True))
+
+    return cache.get_or_set(
+        f'issues:list:{digest}',
+        fetch,
+        getattr(settings, 'ISSUE_LIST_CACHE_TIMEOUT', 300),
+        tags=issue_list_tags(filters)
+    )
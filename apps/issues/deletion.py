@@ -0,0 +1,122 @@
+"""
+Background deletion of issues.
+
+Deleting an issue with thousands of history rows and attachments in one
+cascade holds its locks for as long as the cascade takes. ``delete_issue``
+only marks the issue deleted, so ``Issue.objects`` stops returning it, and
+queues an IssueDeletion. ``purge_deleted_issues`` (the
+``run_issue_deletions`` command) then removes the issue's comments, change
+sets, legacy history and attachments ``ISSUE_DELETION_BATCH_SIZE`` rows per
+transaction, and the issue last. Attachment files are deleted once their
+rows are committed, by a pool of ``ISSUE_DELETION_FILE_WORKERS`` threads,
+unless the deletion keeps them as archival does.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import ISSUES_TAG, invalidate_now_and_on_commit, issue_tag, status_tag
+from .events import issue_deleted
+from .models import Issue, IssueAttachment, IssueChangeSet, IssueComment, IssueDeletion, IssueHistory
+
+logger = logging.getLogger(__name__)
+
+_purging = ContextVar('issue_purging', default=False)
+
+# Rows removed before the issue itself, in this order
+RELATED_MODELS = (IssueComment, IssueChangeSet, IssueHistory, IssueAttachment)
+
+
+def is_purging():
+    """True while rows of deleted issues are being removed"""
+    return _purging.get()
+
+
+def mark_deleted(issues, delete_files=True):
+    """Hide ``issues`` from Issue.objects and queue their removal; return the time"""
+    now = timezone.now()
+    ids = [issue.pk for issue in issues]
+    with transaction.atomic():
+        Issue.objects.filter(pk__in=ids).update(deleted_at=now)
+        IssueDeletion.objects.bulk_create(
+            [IssueDeletion(issue_id=issue_id, requested_at=now, delete_files=delete_files) for issue_id in ids],
+            ignore_conflicts=True
+        )
+        invalidate_now_and_on_commit(
+            sorted({ISSUES_TAG, *map(issue_tag, ids), *(status_tag(issue.status) for issue in issues)})
+        )
+    for issue in issues:
+        issue.deleted_at = now
+    return now
+
+
+def delete_issue(issue):
+    """Delete ``issue``: gone for readers on return, its rows removed in the background"""
+    with transaction.atomic():
+        mark_deleted([issue])
+        issue_deleted(issue.pk)
+
+
+def purge_batch(batch_size):
+    """
+    Remove up to ``batch_size`` rows of one deleted issue, or the issue once
+    nothing else is left, in one transaction. Return ``(rows, file names to
+    delete)``, or None when no deletion is waiting.
+    """
+    with transaction.atomic():
+        deletion = (
+            IssueDeletion.objects.select_for_update(skip_locked=True)
+            .order_by('requested_at', 'pk').first()
+        )
+        if deletion is None:
+            return None
+        token = _purging.set(True)
+        try:
+            for model in RELATED_MODELS:
+                ids = list(
+                    model.objects.filter(issue_id=deletion.issue_id)
+                    .order_by('pk').values_list('pk', flat=True)[:batch_size]
+                )
+                if not ids:
+                    continue
+                files = []
+                if model is IssueAttachment and deletion.delete_files:
+                    files = [name for name in model.objects.filter(pk__in=ids).values_list('file', flat=True) if name]
+                return model.objects.filter(pk__in=ids).delete()[0], files
+            # Takes the IssueDeletion and anything else still pointing at the issue with it
+            return Issue.all_objects.filter(pk=deletion.issue_id).delete()[0], []
+        finally:
+            _purging.reset(token)
+
+
+def delete_file(name):
+    """Delete an attachment file from storage; failures leave an orphan file behind"""
+    try:
+        IssueAttachment._meta.get_field('file').storage.delete(name)
+    except Exception:
+        logger.exception('Could not delete attachment file %s', name)
+
+
+def purge_deleted_issues(batch_size=None):
+    """
+    Remove every deleted issue batch by batch and return the number of rows
+    removed. Must not run inside a transaction: files go as soon as the batch
+    that removed their rows returns.
+    """
+    batch_size = batch_size or getattr(settings, 'ISSUE_DELETION_BATCH_SIZE', 500)
+    workers = getattr(settings, 'ISSUE_DELETION_FILE_WORKERS', 8)
+    removed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='issue-files') as pool:
+        while True:
+            result = purge_batch(batch_size)
+            if result is None:
+                return removed
+            rows, files = result
+            removed += rows
+            # Deleted while the next batch runs
+            for name in files:
+                pool.submit(delete_file, name)
@@ -0,0 +1,86 @@
+"""
+Issue change events for the transactional outbox.
+
+Every event of an issue, its comments, attachments and history shares the
+aggregate ``('issue', issue_id)``, so consumers see them in commit order.
+"""
+from apps.core.outbox import publish, publish_many
+from .models import Issue
+
+AGGREGATE = 'issue'
+
+# Bookkeeping and derived fields whose changes alone publish no event
+SILENT_FIELDS = frozenset({'updated_at', 'version', *Issue.RANK_FIELDS.values()})
+
+
+def issue_payload(issue):
+    return {
+        'id': issue.pk,
+        'title': issue.title,
+        'status': issue.status,
+        'priority': issue.priority,
+        'created_by': issue.created_by_id,
+        'assigned_to': issue.assigned_to_id,
+        'due_date': issue.due_date,
+        'updated_at': issue.updated_at,
+        'version': issue.version,
+    }
+
+
+def issue_created(issue):
+    publish('issue.created', AGGREGATE, issue.pk, issue_payload(issue))
+
+
+def issue_updated(issue, changed):
+    """Publish the names of the ``changed`` fields along with the new state"""
+    changed = sorted(set(changed) - SILENT_FIELDS)
+    if changed:
+        publish('issue.updated', AGGREGATE, issue.pk, dict(issue_payload(issue), changed=changed))
+
+
+def issues_breached(issues, breached_at):
+    """Publish one SLA breach event per issue with a single INSERT"""
+    publish_many([
+        ('issue.sla_breached', AGGREGATE, issue.pk, {'id': issue.pk, 'due_date': issue.due_date, 'breached_at': breached_at})
+        for issue in issues
+    ])
+
+
+def issues_archived(issue_ids, archived_at):
+    """Publish one archival event per issue with a single INSERT"""
+    publish_many([
+        ('issue.archived', AGGREGATE, issue_id, {'id': issue_id, 'archived_at': archived_at})
+        for issue_id in issue_ids
+    ])
+
+
+def issue_deleted(issue_id):
+    publish('issue.deleted', AGGREGATE, issue_id, {'id': issue_id})
+
+
+def comment_event(action, comment):
+    publish(f'issue.comment.{action}', AGGREGATE, comment.issue_id, {
+        'id': comment.pk,
+        'issue': comment.issue_id,
+        'author': comment.author_id,
+        'created_at': comment.created_at,
+    })
+
+
+def attachment_event(action, attachment):
+    publish(f'issue.attachment.{action}', AGGREGATE, attachment.issue_id, {
+        'id': attachment.pk,
+        'issue': attachment.issue_id,
+        'uploaded_by': attachment.uploaded_by_id,
+        'file_name': attachment.file_name,
+    })
+
+
+def change_set_created(change_set):
+    publish('issue.changeset.created', AGGREGATE, change_set.issue_id, {
+        'id': change_set.pk,
+        'issue': change_set.issue_id,
+        'changed_by': change_set.changed_by_id,
+        'changed_at': change_set.changed_at,
+        'changes': change_set.changes,
+    })
@@ -7,6 +7,9 @@ from .models import Issue, IssueComment, IssueAttachment
 User = get_user_model()
 
 class IssueForm(forms.ModelForm):
+    # Version of the issue the edit started from; saving fails if it changed since
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+    
     class Meta:
         model = Issue
         fields = [
@@ -56,6 +59,14 @@ class IssueForm(forms.ModelForm):
         # Format the datetime for the datetime-local input
         if self.instance.due_date:
             self.initial['due_date'] = self.instance.due_date.strftime('%Y-%m-%dT%H:%M')
+        
+        if self.instance.pk:
+            self.initial['version'] = self.instance.version
+    
+    def save(self, commit=True):
+        if self.cleaned_data.get('version') is not None:
+            self.instance.version = self.cleaned_data['version']
+        return super().save(commit)
 
 class IssueCommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from .models import IssueChangeSet
+
+# Bookkeeping fields that never get a history row
+UNTRACKED_FIELDS = ('updated_at', 'created_at', 'version')
+
+# Legacy rows of one user written this close together came from one edit
+LEGACY_EDIT_WINDOW = timedelta(seconds=1)
+
+
+def record_changes(issue, user, changes):
+    """
+    Store ``(field, old_value, new_value)`` ``changes`` as one IssueChangeSet
+    row and return it, or None if nothing changed. Its post_save handlers
+    invalidate the issue's cache, move its last activity and publish it.
+    """
+    if not changes:
+        return None
+    return IssueChangeSet.objects.create(
+        issue=issue,
+        changed_by=user,
+        changes={field: [old_value, new_value] for field, old_value, new_value in changes}
+    )
+
+
+def group_legacy_rows(rows, window=LEGACY_EDIT_WINDOW):
+    """
+    Build unsaved change sets from legacy IssueHistory ``rows`` ordered by
+    issue, changed_at and id: consecutive rows of one issue and user written
+    within ``window`` of the first of them, each field once, become one
+    change set.
+    """
+    change_sets = []
+    current = None
+    for row in rows:
+        if (
+            current is None
+            or row.issue_id != current.issue_id
+            or row.changed_by_id != current.changed_by_id
+            or row.changed_at - current.changed_at > window
+            or row.field in current.changes
+        ):
+            current = IssueChangeSet(issue_id=row.issue_id, changed_by_id=row.changed_by_id, changed_at=row.changed_at)
+            change_sets.append(current)
+        current.changes[row.field] = [row.old_value, row.new_value]
+    return change_sets
+
+
+def form_changes(issue, form, identity_map):
+    """
+    Return ``(field, old_value, new_value)`` for every field changed by ``form``.
+
+    Old values come from the values ``issue`` was loaded with, so the row is
+    not read again; related users are resolved through ``identity_map``.
+    """
+    return _changes(issue, form.changed_data, form.cleaned_data, identity_map)
+
+
+def data_changes(issue, data, identity_map):
+    """``form_changes`` for the validated ``data`` of a serializer updating ``issue``"""
+    changed = [
+        field for field, value in data.items()
+        if getattr(value, 'pk', value) != issue.get_loaded_value(field)
+    ]
+    return _changes(issue, changed, data, identity_map)
+
+
+def _changes(issue, fields, values, identity_map):
+    changes = []
+    for field in fields:
+        if field in UNTRACKED_FIELDS:
+            continue
+        model_field = issue._meta.get_field(field)
+        old_value = issue.get_loaded_value(field)
+        if model_field.many_to_one and old_value is not None:
+            old_value = identity_map.load(model_field.related_model._default_manager.all(), old_value)
+        changes.append((field, str(old_value), str(values[field])))
+    return changes
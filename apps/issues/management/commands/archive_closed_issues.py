@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.issues.archive import archivable, archive_closed_issues
+
+
+class Command(BaseCommand):
+    """Django command to move long closed issues out of the hot tables"""
+
+    help = (
+        'Move issues closed with no activity for ISSUE_ARCHIVE_AFTER_DAYS into the archived '
+        'issue table, with their comments, attachments and history, a batch per transaction. '
+        'run_issue_deletions then removes their hot rows. Safe to interrupt and run again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Archive issues closed longer than this')
+        parser.add_argument('--batch-size', type=int, default=None, help='Issues per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many would be archived')
+
+    def handle(self, *args, **options):
+        days = options['days'] or getattr(settings, 'ISSUE_ARCHIVE_AFTER_DAYS', 730)
+        cutoff = timezone.now() - timedelta(days=days)
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Would archive {archivable(cutoff).count()} issues.'))
+            return
+        archived = archive_closed_issues(cutoff=cutoff, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} issues.'))
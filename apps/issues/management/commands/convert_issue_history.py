@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.invalidation import invalidate
+from apps.issues.cache import issue_tag
+from apps.issues.history import group_legacy_rows
+from apps.issues.models import IssueChangeSet, IssueHistory
+
+
+class Command(BaseCommand):
+    """Django command to move legacy per-field history rows into change sets"""
+
+    help = (
+        'Group the legacy one-row-per-field IssueHistory rows into one IssueChangeSet per edit '
+        'and delete them, a batch of issues per transaction. Safe to interrupt and run again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Issues per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be converted')
+
+    def handle(self, *args, **options):
+        converted = created = 0
+        last_issue_id = 0
+        while True:
+            with transaction.atomic():
+                issue_ids = list(
+                    IssueHistory.objects.filter(issue_id__gt=last_issue_id).order_by('issue_id')
+                    .values_list('issue_id', flat=True).distinct()[:options['batch_size']]
+                )
+                if not issue_ids:
+                    break
+                last_issue_id = issue_ids[-1]
+                rows = list(
+                    IssueHistory.objects.filter(issue_id__in=issue_ids)
+                    .order_by('issue_id', 'changed_at', 'id').select_for_update()
+                )
+                change_sets = group_legacy_rows(rows)
+                if not options['dry_run']:
+                    IssueChangeSet.objects.bulk_create(change_sets)
+                    IssueHistory.objects.filter(pk__in=[row.pk for row in rows]).delete()
+            if not options['dry_run']:
+                invalidate(tags=[issue_tag(issue_id) for issue_id in issue_ids])
+            converted += len(rows)
+            created += len(change_sets)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Issues {issue_ids[0]}-{issue_ids[-1]}: {len(rows)} rows, {len(change_sets)} change sets')
+
+        verb = 'Would convert' if options['dry_run'] else 'Converted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {converted} history rows into {created} change sets.'))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.invalidation import invalidate
+from apps.issues.activity import actual_activity
+from apps.issues.cache import ISSUES_TAG, issue_tag
+from apps.issues.models import Issue
+
+
+class Command(BaseCommand):
+    """Django command to repair drift in the denormalized issue activity counters"""
+
+    help = (
+        'Recompute comment_count, attachment_count and last_activity_at of every issue '
+        'from the comment, attachment and history tables and fix the issues that drifted. '
+        'Issues are processed in primary key order, one locked batch per transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be fixed')
+
+    def handle(self, *args, **options):
+        checked = fixed = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                # Locking the rows makes concurrent F() updates wait until the batch is written
+                batch = list(
+                    Issue.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .select_for_update().only('pk', *Issue.ACTIVITY_FIELDS)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                actual = actual_activity([issue.pk for issue in batch])
+                drifted = []
+                for issue in batch:
+                    values = actual[issue.pk]
+                    if values != tuple(getattr(issue, field) for field in Issue.ACTIVITY_FIELDS):
+                        for field, value in zip(Issue.ACTIVITY_FIELDS, values):
+                            setattr(issue, field, value)
+                        drifted.append(issue)
+                if drifted and not options['dry_run']:
+                    Issue.objects.bulk_update(drifted, Issue.ACTIVITY_FIELDS)
+            if drifted and not options['dry_run']:
+                invalidate(tags=[ISSUES_TAG] + [issue_tag(issue.pk) for issue in drifted])
+            checked += len(batch)
+            fixed += len(drifted)
+            if options['verbosity'] > 1:
+                for issue in drifted:
+                    self.stdout.write(f'Issue {issue.pk}: {issue.comment_count} comments, '
+                                      f'{issue.attachment_count} attachments, '
+                                      f'last activity {issue.last_activity_at}')
+
+        verb = 'Would fix' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} issues. {verb} {fixed}.'))
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.issues.deletion import purge_deleted_issues
+
+
+class Command(BaseCommand):
+    """Django command to remove deleted and archived issues from the hot tables"""
+
+    help = (
+        'Remove the comments, history and attachments of deleted issues in bounded batches, '
+        'then the issues, deleting attachment files in a thread pool. Several workers can '
+        'run side by side.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows removed per transaction')
+        parser.add_argument('--once', action='store_true', help='Remove what is pending and exit')
+
+    def handle(self, *args, **options):
+        interval = getattr(settings, 'ISSUE_DELETION_POLL_INTERVAL', 1)
+        total = 0
+        while True:
+            close_old_connections()
+            removed = purge_deleted_issues(batch_size=options['batch_size'])
+            total += removed
+            if options['once']:
+                break
+            if not removed:
+                time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(f'Removed {total} rows'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from apps.issues.sla import scan_breaches
+
+
+class Command(BaseCommand):
+    """Django command to report issues that breached their SLA since the last run"""
+
+    help = (
+        'Sweep the due_date index from the stored watermark up to now, mark open issues '
+        'that fell due as breached and send their breach events in batches. Meant to be '
+        'run every minute or so from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--since',
+            help='ISO datetime to sweep from instead of the watermark (already reported issues are skipped)'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f'Invalid datetime: {options["since"]}')
+        breached = scan_breaches(batch_size=options['batch_size'], since=since)
+        self.stdout.write(self.style.SUCCESS(f'Reported {breached} SLA breaches'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.0 on 2026-10-19 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="issuecomment",
+            index=models.Index(
+                fields=["issue", "-created_at", "-id"],
+                name="issues_comment_issue_ts_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="issuehistory",
+            index=models.Index(
+                fields=["issue", "-changed_at", "-id"],
+                name="issues_history_issue_ts_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0 on 2026-10-19 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Existing issues start without activity; run reconcile_issue_activity afterwards
+
+    dependencies = [
+        ("issues", "0002_comment_history_page_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="issue",
+            name="attachment_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="attachment count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="comment_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="comment count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="last_activity_at",
+            field=models.DateTimeField(
+                editable=False, null=True, verbose_name="last activity at"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0 on 2026-10-19 14:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Choice values in declaration order at the time of this migration
+STATUSES = ["open", "in_progress", "resolved", "closed"]
+PRIORITIES = ["low", "medium", "high", "critical"]
+
+
+def fill_ranks(apps, schema_editor):
+    Issue = apps.get_model("issues", "Issue")
+    for rank, status in enumerate(STATUSES):
+        Issue.objects.filter(status=status).update(status_rank=rank)
+    for rank, priority in enumerate(PRIORITIES):
+        Issue.objects.filter(priority=priority).update(priority_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0003_issue_activity_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="issue",
+            name="priority_rank",
+            field=models.PositiveSmallIntegerField(
+                default=1, editable=False, verbose_name="priority rank"
+            ),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="status_rank",
+            field=models.PositiveSmallIntegerField(
+                default=0, editable=False, verbose_name="status rank"
+            ),
+        ),
+        migrations.RunPython(fill_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(
+                condition=models.Q(("status__in", ["open", "in_progress"])),
+                fields=["assigned_to", "-priority_rank", "due_date", "created_at", "id"],
+                name="issues_issue_queue_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.0 on 2026-10-19 14:55
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# ISSUE_SLA_HOURS defaults when this migration was written, frozen so the
+# backfill does not depend on the settings active when it runs
+SLA_HOURS = {"critical": 4, "high": 24, "medium": 72, "low": 168}
+
+
+def fill_due_dates(apps, schema_editor):
+    # Issues created without a due date are due when their SLA target runs out
+    Issue = apps.get_model("issues", "Issue")
+    for priority, hours in SLA_HOURS.items():
+        Issue.objects.filter(due_date__isnull=True, priority=priority).update(
+            due_date=models.F("created_at") + timedelta(hours=hours)
+        )
+
+
+def seed_watermark(apps, schema_editor):
+    # The first scan starts from now instead of reporting every old overdue issue
+    SLAWatermark = apps.get_model("issues", "SLAWatermark")
+    SLAWatermark.objects.get_or_create(name="sla", defaults={"scanned_until": timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0004_issue_rank_columns"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SLAWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=50, unique=True, verbose_name="name"),
+                ),
+                (
+                    "scanned_until",
+                    models.DateTimeField(null=True, verbose_name="scanned until"),
+                ),
+            ],
+            options={
+                "verbose_name": "SLA watermark",
+                "verbose_name_plural": "SLA watermarks",
+            },
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="sla_breached_at",
+            field=models.DateTimeField(
+                editable=False, null=True, verbose_name="SLA breached at"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(fields=["due_date", "id"], name="issues_issue_due_idx"),
+        ),
+        migrations.RunPython(fill_due_dates, migrations.RunPython.noop),
+        migrations.RunPython(seed_watermark, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.0 on 2026-10-19 16:30
+
+import apps.core.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0005_sla_breaches"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IssueChangeSet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "changed_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="changed at",
+                    ),
+                ),
+                ("changes", models.JSONField(default=dict, verbose_name="changes")),
+                (
+                    "changed_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="issue_change_sets",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="changed by",
+                    ),
+                ),
+                (
+                    "issue",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="change_sets",
+                        to="issues.issue",
+                        verbose_name="issue",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "change set",
+                "verbose_name_plural": "change sets",
+                "ordering": ["-changed_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["issue", "-changed_at", "-id"],
+                        name="issues_changeset_issue_ts_idx",
+                    )
+                ],
+            },
+            bases=(apps.core.models.AtomicWriteMixin, models.Model),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.0 on 2026-10-19 16:55
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0006_issue_change_sets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedIssue",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="id"
+                    ),
+                ),
+                ("title", models.CharField(max_length=200, verbose_name="title")),
+                (
+                    "description",
+                    models.TextField(blank=True, verbose_name="description"),
+                ),
+                (
+                    "location",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="location"
+                    ),
+                ),
+                (
+                    "priority",
+                    models.CharField(
+                        choices=[
+                            ("low", "Low"),
+                            ("medium", "Medium"),
+                            ("high", "High"),
+                            ("critical", "Critical"),
+                        ],
+                        max_length=20,
+                        verbose_name="priority",
+                    ),
+                ),
+                (
+                    "created_by_id",
+                    models.BigIntegerField(null=True, verbose_name="created by"),
+                ),
+                ("created_at", models.DateTimeField(verbose_name="created at")),
+                ("closed_at", models.DateTimeField(verbose_name="closed at")),
+                (
+                    "archived_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="archived at"
+                    ),
+                ),
+                (
+                    "document",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="document",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "archived issue",
+                "verbose_name_plural": "archived issues",
+                "ordering": ["-closed_at"],
+            },
+        ),
+    ]
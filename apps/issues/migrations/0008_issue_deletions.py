@@ -0,0 +1,53 @@
+# Generated by Django 5.0 on 2026-10-19 17:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0007_archived_issue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="issue",
+            name="deleted_at",
+            field=models.DateTimeField(
+                editable=False, null=True, verbose_name="deleted at"
+            ),
+        ),
+        migrations.CreateModel(
+            name="IssueDeletion",
+            fields=[
+                (
+                    "issue",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="deletion",
+                        serialize=False,
+                        to="issues.issue",
+                        verbose_name="issue",
+                    ),
+                ),
+                (
+                    "requested_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="requested at"
+                    ),
+                ),
+                (
+                    "delete_files",
+                    models.BooleanField(default=True, verbose_name="delete files"),
+                ),
+            ],
+            options={
+                "verbose_name": "issue deletion",
+                "verbose_name_plural": "issue deletions",
+                "ordering": ["requested_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-19 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0008_issue_deletions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="issue",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=1, editable=False, verbose_name="version"
+            ),
+        ),
+    ]
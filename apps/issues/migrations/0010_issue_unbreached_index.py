@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-19 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("issues", "0009_issue_version"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(
+                condition=models.Q(("sla_breached_at__isnull", True)),
+                fields=["updated_at", "id"],
+                name="issues_issue_unbreached_idx",
+            ),
+        ),
+    ]
@@ -1,10 +1,25 @@
-from django.db import models
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 
+from apps.core.models import AtomicWriteMixin, ChangeTrackingMixin, VersionedMixin
+
 User = get_user_model()
 
-class Issue(models.Model):
+class IssueManager(models.Manager):
+    """Issues that are not deleted; Issue.all_objects includes those still being removed"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+class Issue(AtomicWriteMixin, ChangeTrackingMixin, VersionedMixin, models.Model):
     class Status(models.TextChoices):
         OPEN = 'open', _('Open')
         IN_PROGRESS = 'in_progress', _('In Progress')
@@ -17,6 +32,9 @@ class Issue(models.Model):
         HIGH = 'high', _('High')
         CRITICAL = 'critical', _('Critical')
     
+    # Statuses that still need work; a technician's queue holds only these
+    OPEN_STATUSES = (Status.OPEN, Status.IN_PROGRESS)
+    
     title = models.CharField(_('title'), max_length=200)
     description = models.TextField(_('description'), blank=True)
     status = models.CharField(
@@ -52,16 +70,116 @@ class Issue(models.Model):
     location = models.CharField(_('location'), max_length=255, blank=True)
     latitude = models.DecimalField(_('latitude'), max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(_('longitude'), max_digits=9, decimal_places=6, null=True, blank=True)
+    # Position of status/priority in its choices, set on save, so urgency sorts on an index
+    status_rank = models.PositiveSmallIntegerField(_('status rank'), default=0, editable=False)
+    priority_rank = models.PositiveSmallIntegerField(_('priority rank'), default=1, editable=False)
+    # Denormalized activity, maintained by apps.issues.activity
+    comment_count = models.PositiveIntegerField(_('comment count'), default=0, editable=False)
+    attachment_count = models.PositiveIntegerField(_('attachment count'), default=0, editable=False)
+    # Time of the latest comment, attachment or history row; None until there is one
+    last_activity_at = models.DateTimeField(_('last activity at'), null=True, editable=False)
+    # When the SLA scanner reported the issue overdue; cleared when the due date moves
+    sla_breached_at = models.DateTimeField(_('SLA breached at'), null=True, editable=False)
+    # When the issue was deleted; apps.issues.deletion removes it and its rows in the background
+    deleted_at = models.DateTimeField(_('deleted at'), null=True, editable=False)
+    # Incremented by every save; a save from an older version fails (VersionedMixin)
+    version = models.PositiveIntegerField(_('version'), default=1, editable=False)
+    
+    objects = IssueManager()
+    all_objects = models.Manager()
+    
+    # Only ever changed with F() updates; a full save must not write back stale copies
+    ACTIVITY_FIELDS = ('comment_count', 'attachment_count', 'last_activity_at')
+    # Only ever written by apps.issues.sla, for the same reason
+    SLA_FIELDS = ('sla_breached_at',)
+    # Only ever written by apps.issues.deletion
+    DELETION_FIELDS = ('deleted_at',)
+    # Text field -> integer rank column mirroring it
+    RANK_FIELDS = {'status': 'status_rank', 'priority': 'priority_rank'}
+    # Technician work queue: most urgent first, then earliest due, then oldest
+    QUEUE_ORDERING = ('-priority_rank', 'due_date', 'created_at', 'id')
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = _('issue')
         verbose_name_plural = _('issues')
+        indexes = [
+            # Open issues of one assignee in QUEUE_ORDERING
+            models.Index(
+                fields=['assigned_to', '-priority_rank', 'due_date', 'created_at', 'id'],
+                condition=Q(status__in=['open', 'in_progress']),
+                name='issues_issue_queue_idx'
+            ),
+            # Range sweeps of the SLA scanner
+            models.Index(fields=['due_date', 'id'], name='issues_issue_due_idx'),
+            # Unreported issues updated (e.g. reopened) since the SLA scanner's last run
+            models.Index(
+                fields=['updated_at', 'id'],
+                condition=Q(sla_breached_at__isnull=True),
+                name='issues_issue_unbreached_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
+    
+    def sla_target(self):
+        """Time the SLA allows for an issue of this priority, or None"""
+        hours = getattr(settings, 'ISSUE_SLA_HOURS', {}).get(self.priority)
+        return timedelta(hours=hours) if hours is not None else None
+    
+    @property
+    def is_overdue(self):
+        """True if the issue still needs work and its due date has passed"""
+        return (
+            self.due_date is not None
+            and self.status in self.OPEN_STATUSES
+            and self.due_date <= timezone.now()
+        )
+    
+    @classmethod
+    def rank_of(cls, field_name, value):
+        """Rank of ``value`` among the choices of ``field_name`` (declaration order)"""
+        return [choice for choice, _label in cls._meta.get_field(field_name).choices].index(value)
+    
+    def save(self, *args, **kwargs):
+        deferred = self.get_deferred_fields()
+        if self._state.adding and self.due_date is None:
+            target = self.sla_target()
+            if target is not None:
+                self.due_date = timezone.now() + target
+        update_fields = kwargs.get('update_fields')
+        due_date_moved = (
+            not self._state.adding and 'due_date' not in deferred
+            and (update_fields is None or 'due_date' in update_fields)
+            and self.is_tracked('due_date') and self.has_changed('due_date')
+        )
+        for field_name, rank_field in self.RANK_FIELDS.items():
+            if field_name not in deferred:
+                setattr(self, rank_field, self.rank_of(field_name, getattr(self, field_name)))
+        if update_fields is not None:
+            # Writing a text field writes its rank too
+            kwargs['update_fields'] = list(update_fields) + [
+                rank_field for field_name, rank_field in self.RANK_FIELDS.items()
+                if field_name in update_fields and rank_field not in update_fields
+            ]
+        if (not self._state.adding and not args and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.ACTIVITY_FIELDS + self.SLA_FIELDS + self.DELETION_FIELDS
+                and field.attname not in deferred
+            ]
+        with transaction.atomic(using=self._write_db(kwargs.get('using')), savepoint=False):
+            if due_date_moved:
+                # The new due date gets a breach report of its own
+                type(self).objects.filter(pk=self.pk, sla_breached_at__isnull=False).update(sla_breached_at=None)
+                self.sla_breached_at = None
+            super().save(*args, **kwargs)
 
-class IssueComment(models.Model):
+class IssueComment(AtomicWriteMixin, models.Model):
     issue = models.ForeignKey(
         Issue,
         on_delete=models.CASCADE,
@@ -82,11 +200,15 @@ class IssueComment(models.Model):
         ordering = ['created_at']
         verbose_name = _('comment')
         verbose_name_plural = _('comments')
+        indexes = [
+            # Newest-first comment pages of one issue
+            models.Index(fields=['issue', '-created_at', '-id'], name='issues_comment_issue_ts_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.author} on {self.issue}"
 
-class IssueAttachment(models.Model):
+class IssueAttachment(AtomicWriteMixin, models.Model):
     issue = models.ForeignKey(
         Issue,
         on_delete=models.CASCADE,
@@ -126,7 +248,12 @@ class IssueAttachment(models.Model):
             self.file_size = self.file.size
         super().save(*args, **kwargs)
 
-class IssueHistory(models.Model):
+class IssueHistory(AtomicWriteMixin, models.Model):
+    """
+    Legacy per-field history, one row per changed field. No longer written:
+    edits are stored as IssueChangeSet rows, and convert_issue_history
+    moves the remaining rows over.
+    """
     issue = models.ForeignKey(
         Issue,
         on_delete=models.CASCADE,
@@ -149,6 +276,114 @@ class IssueHistory(models.Model):
         ordering = ['-changed_at']
         verbose_name = _('history')
         verbose_name_plural = _('history')
+        indexes = [
+            # Newest-first history pages of one issue
+            models.Index(fields=['issue', '-changed_at', '-id'], name='issues_history_issue_ts_idx'),
+        ]
     
     def __str__(self):
         return f"{self.field} changed by {self.changed_by} at {self.changed_at}"
+
+# One changed field of a change set, shaped like a legacy IssueHistory row
+FieldChange = namedtuple('FieldChange', ['id', 'issue_id', 'changed_by', 'changed_at', 'field', 'old_value', 'new_value'])
+
+class IssueChangeSet(AtomicWriteMixin, models.Model):
+    """One edit of an issue with every field it changed"""
+    issue = models.ForeignKey(
+        Issue,
+        on_delete=models.CASCADE,
+        related_name='change_sets',
+        verbose_name=_('issue')
+    )
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='issue_change_sets',
+        verbose_name=_('changed by')
+    )
+    # A default rather than auto_now_add, so converted history keeps its timestamps
+    changed_at = models.DateTimeField(_('changed at'), default=timezone.now, editable=False)
+    # {field: [old_value, new_value]}
+    changes = models.JSONField(_('changes'), default=dict)
+    
+    class Meta:
+        ordering = ['-changed_at']
+        verbose_name = _('change set')
+        verbose_name_plural = _('change sets')
+        indexes = [
+            # Newest-first history pages of one issue
+            models.Index(fields=['issue', '-changed_at', '-id'], name='issues_changeset_issue_ts_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{', '.join(self.changes)} changed by {self.changed_by} at {self.changed_at}"
+    
+    def entries(self):
+        """The changed fields as per-field history entries"""
+        return [
+            FieldChange(self.pk, self.issue_id, self.changed_by, self.changed_at, field, old_value, new_value)
+            for field, (old_value, new_value) in self.changes.items()
+        ]
+
+class ArchivedIssue(models.Model):
+    """
+    A closed issue moved out of the hot tables by apps.issues.archive, with
+    its comments, attachments and history in one JSON document. It keeps the
+    id it had as an Issue. Only the primary key is indexed.
+    """
+    id = models.BigIntegerField(_('id'), primary_key=True)
+    title = models.CharField(_('title'), max_length=200)
+    description = models.TextField(_('description'), blank=True)
+    location = models.CharField(_('location'), max_length=255, blank=True)
+    priority = models.CharField(_('priority'), max_length=20, choices=Issue.Priority.choices)
+    created_by_id = models.BigIntegerField(_('created by'), null=True)
+    created_at = models.DateTimeField(_('created at'))
+    closed_at = models.DateTimeField(_('closed at'))
+    archived_at = models.DateTimeField(_('archived at'), default=timezone.now)
+    document = models.JSONField(_('document'), encoder=DjangoJSONEncoder)
+    
+    class Meta:
+        ordering = ['-closed_at']
+        verbose_name = _('archived issue')
+        verbose_name_plural = _('archived issues')
+    
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+class IssueDeletion(models.Model):
+    """
+    A deleted issue whose comments, history, attachments and finally the
+    issue itself apps.issues.deletion still has to remove. Removing the
+    issue removes this row too.
+    """
+    issue = models.OneToOneField(
+        Issue,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='deletion',
+        verbose_name=_('issue')
+    )
+    requested_at = models.DateTimeField(_('requested at'), default=timezone.now)
+    # False when the attachment files must stay, e.g. for archived issues
+    delete_files = models.BooleanField(_('delete files'), default=True)
+    
+    class Meta:
+        ordering = ['requested_at']
+        verbose_name = _('issue deletion')
+        verbose_name_plural = _('issue deletions')
+    
+    def __str__(self):
+        return f"Deletion of issue {self.issue_id}"
+
+class SLAWatermark(models.Model):
+    """How far the SLA scanner has swept due dates; one row per scanner"""
+    name = models.CharField(_('name'), max_length=50, unique=True)
+    scanned_until = models.DateTimeField(_('scanned until'), null=True)
+    
+    class Meta:
+        verbose_name = _('SLA watermark')
+        verbose_name_plural = _('SLA watermarks')
+    
+    def __str__(self):
+        return f"{self.name}: {self.scanned_until}"
@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination
+
+from apps.core.pagination import KeysetPagination
+from .models import Issue
+
+
+class CommentCursorPagination(CursorPagination):
+    """
+    Keyset pagination over an issue's comments, newest first.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class HistoryCursorPagination(CursorPagination):
+    """
+    Keyset pagination over an issue's history, newest first.
+    """
+    ordering = ('-changed_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class QueueKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination over a technician's queue, most urgent first.
+    """
+    ordering = Issue.QUEUE_ORDERING
+    page_size = 25
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Issue, IssueComment, IssueAttachment
+from .models import ArchivedIssue, Issue, IssueComment, IssueAttachment
 
 class IssueSerializer(serializers.ModelSerializer):
     """
@@ -9,14 +9,16 @@ class IssueSerializer(serializers.ModelSerializer):
     assigned_to_username = serializers.ReadOnlyField(source='assigned_to.username', allow_null=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     priority_display = serializers.CharField(source='get_priority_display', read_only=True)
+    is_overdue = serializers.BooleanField(read_only=True)
     
     class Meta:
         model = Issue
         fields = [
             'id', 'title', 'description', 'status', 'status_display',
-            'priority', 'priority_display', 'location', 'created_at',
+            'priority', 'priority_display', 'location', 'due_date', 'is_overdue', 'created_at',
             'updated_at', 'created_by', 'created_by_username',
-            'assigned_to', 'assigned_to_username'
+            'assigned_to', 'assigned_to_username', 'comment_count',
+            'attachment_count', 'last_activity_at', 'version'
         ]
         read_only_fields = ['created_at', 'updated_at', 'created_by']
 
@@ -41,3 +43,36 @@ class IssueAttachmentSerializer(serializers.ModelSerializer):
         model = IssueAttachment
         fields = ['id', 'issue', 'file', 'uploaded_at', 'uploaded_by', 'uploaded_by_username']
         read_only_fields = ['uploaded_at', 'uploaded_by', 'issue']
+
+class IssueHistorySerializer(serializers.Serializer):
+    """
+    Serializer for per-field history entries (IssueChangeSet.entries())
+    """
+    id = serializers.IntegerField(read_only=True)
+    field = serializers.CharField(read_only=True)
+    old_value = serializers.CharField(read_only=True, allow_null=True)
+    new_value = serializers.CharField(read_only=True, allow_null=True)
+    changed_at = serializers.DateTimeField(read_only=True)
+    changed_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    changed_by_email = serializers.ReadOnlyField(source='changed_by.email', allow_null=True)
+
+class ArchivedIssueSerializer(serializers.ModelSerializer):
+    """
+    Serializer for archived issues in search results
+    """
+    status = serializers.SerializerMethodField()
+    created_by = serializers.IntegerField(source='created_by_id', read_only=True, allow_null=True)
+    
+    class Meta:
+        model = ArchivedIssue
+        fields = ['id', 'title', 'description', 'status', 'priority', 'location', 'created_by', 'created_at', 'closed_at', 'archived_at']
+    
+    def get_status(self, obj):
+        return Issue.Status.CLOSED
+
+class ArchivedIssueDetailSerializer(ArchivedIssueSerializer):
+    """
+    Serializer for one archived issue with its comments, attachments and history
+    """
+    class Meta(ArchivedIssueSerializer.Meta):
+        fields = ArchivedIssueSerializer.Meta.fields + ['document']
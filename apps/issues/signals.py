@@ -0,0 +1,132 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import events
+from .activity import record_activity
+from .cache import ISSUES_TAG, invalidate_now_and_on_commit, issue_tag, status_tag
+from .deletion import is_purging
+from .models import Issue, IssueAttachment, IssueChangeSet, IssueComment
+from .sla import report_if_overdue
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def invalidate_issue_caches(sender, instance, **kwargs):
+    """Evict cached issue lists, counts and the issue itself in every worker"""
+    tags = {ISSUES_TAG, issue_tag(instance.pk), status_tag(instance.status)}
+    if instance.is_tracked('status'):
+        # Lists of the status the issue left are stale as well
+        tags.add(status_tag(instance.get_loaded_value('status')))
+    invalidate_now_and_on_commit(sorted(tags))
+
+
+@receiver(post_save, sender=Issue)
+def publish_issue_saved(sender, instance, created, update_fields=None, **kwargs):
+    """Publish the creation or the changed fields of an issue, before any event it causes"""
+    if created:
+        events.issue_created(instance)
+        return
+    changed = instance.changed_fields
+    if update_fields is not None:
+        changed &= set(update_fields)
+    events.issue_updated(instance, changed)
+
+
+@receiver(post_delete, sender=Issue)
+def publish_issue_deleted(sender, instance, **kwargs):
+    """Publish the deletion of an issue; issues deleted in the background published it when marked"""
+    if not is_purging():
+        events.issue_deleted(instance.pk)
+
+
+@receiver(post_save, sender=Issue)
+def report_overdue_due_date(sender, instance, created, update_fields=None, **kwargs):
+    """Report issues saved with a due date the SLA scanner may already have swept past"""
+    if created or (
+        (update_fields is None or 'due_date' in update_fields)
+        and instance.is_tracked('due_date') and instance.has_changed('due_date')
+    ):
+        report_if_overdue(instance)
+
+
+@receiver(post_save, sender=IssueChangeSet)
+@receiver(post_delete, sender=IssueChangeSet)
+def invalidate_issue_history_caches(sender, instance, **kwargs):
+    """Evict cached data of the issue whose history changed"""
+    if not is_purging():
+        invalidate_now_and_on_commit([issue_tag(instance.issue_id)])
+
+
+def _deleted_with_issue(origin):
+    # The counters of an issue being deleted need no updates
+    return is_purging() or isinstance(origin, Issue) or getattr(origin, 'model', None) is Issue
+
+
+@receiver(post_save, sender=IssueChangeSet)
+def count_issue_change_set(sender, instance, created, **kwargs):
+    """Move the last activity of the issue to the new change set"""
+    if created:
+        record_activity(instance.issue_id, at=instance.changed_at)
+
+
+@receiver(post_save, sender=IssueComment)
+def count_issue_comment(sender, instance, created, **kwargs):
+    """Count a new comment and move the last activity of its issue"""
+    if created:
+        record_activity(instance.issue_id, comments=1, at=instance.created_at)
+
+
+@receiver(post_delete, sender=IssueComment)
+def uncount_issue_comment(sender, instance, origin=None, **kwargs):
+    """Uncount a deleted comment"""
+    if not _deleted_with_issue(origin):
+        record_activity(instance.issue_id, comments=-1)
+
+
+@receiver(post_save, sender=IssueAttachment)
+def count_issue_attachment(sender, instance, created, **kwargs):
+    """Count a new attachment and move the last activity of its issue"""
+    if created:
+        record_activity(instance.issue_id, attachments=1, at=instance.uploaded_at)
+
+
+@receiver(post_delete, sender=IssueAttachment)
+def uncount_issue_attachment(sender, instance, origin=None, **kwargs):
+    """Uncount a deleted attachment"""
+    if not _deleted_with_issue(origin):
+        record_activity(instance.issue_id, attachments=-1)
+
+
+@receiver(post_save, sender=IssueChangeSet)
+def publish_issue_change_set(sender, instance, created, **kwargs):
+    """Publish a new change set"""
+    if created:
+        events.change_set_created(instance)
+
+
+@receiver(post_save, sender=IssueComment)
+def publish_issue_comment(sender, instance, created, **kwargs):
+    """Publish a new comment"""
+    if created:
+        events.comment_event('created', instance)
+
+
+@receiver(post_delete, sender=IssueComment)
+def publish_issue_comment_deleted(sender, instance, origin=None, **kwargs):
+    """Publish a deleted comment; issue.deleted covers comments deleted with their issue"""
+    if not _deleted_with_issue(origin):
+        events.comment_event('deleted', instance)
+
+
+@receiver(post_save, sender=IssueAttachment)
+def publish_issue_attachment(sender, instance, created, **kwargs):
+    """Publish a new attachment"""
+    if created:
+        events.attachment_event('created', instance)
+
+
+@receiver(post_delete, sender=IssueAttachment)
+def publish_issue_attachment_deleted(sender, instance, origin=None, **kwargs):
+    """Publish a deleted attachment; issue.deleted covers attachments deleted with their issue"""
+    if not _deleted_with_issue(origin):
+        events.attachment_event('deleted', instance)
@@ -0,0 +1,103 @@
+"""
+SLA breach detection.
+
+Every issue gets a due date: the one it was created with, or its creation
+time plus the SLA target for its priority (``ISSUE_SLA_HOURS``).
+``scan_breaches`` sweeps the due_date index from a stored watermark up to
+now, marks the open issues it finds as breached and sends ``sla_breached``
+once per batch after the batch commits. Each run therefore reads only the
+issues that fell due since the previous run, and notification receivers
+get breaches in bulk.
+
+A due date set to a time the scanner has already swept past is reported
+by ``report_if_overdue`` when the issue is saved. Issues that fell due
+behind the watermark while closed and were reopened since are picked up by
+each scan through the issues updated after the watermark.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .events import issues_breached
+from .models import Issue, SLAWatermark
+
+# Sent with ``issues`` (a list of breached issues) and ``breached_at`` after each batch commits
+sla_breached = Signal()
+
+SCANNER = 'sla'
+
+
+def _mark_breached(issues, now):
+    Issue.objects.filter(pk__in=[issue.pk for issue in issues]).update(sla_breached_at=now)
+    for issue in issues:
+        issue.sla_breached_at = now
+    issues_breached(issues, now)
+    transaction.on_commit(lambda: sla_breached.send(sender=Issue, issues=issues, breached_at=now))
+
+
+def scan_reopened(since, now, batch_size):
+    """
+    Report open issues that fell due before ``since`` but were updated after
+    it, such as issues reopened after their due date, and return how many.
+    """
+    reported = 0
+    while True:
+        with transaction.atomic():
+            SLAWatermark.objects.select_for_update().get(name=SCANNER)
+            # Reported issues drop out of the query, so each batch starts from the top again
+            batch = list(
+                Issue.objects.filter(
+                    updated_at__gte=since, sla_breached_at__isnull=True,
+                    due_date__lt=since, status__in=Issue.OPEN_STATUSES
+                ).order_by('updated_at', 'id')[:batch_size]
+            )
+            if batch:
+                _mark_breached(batch, now)
+        reported += len(batch)
+        if len(batch) < batch_size:
+            return reported
+
+
+def scan_breaches(now=None, batch_size=None, since=None):
+    """
+    Report the open issues that fell due, or were reopened overdue, since
+    the last scan and return how many there were. ``since`` replaces the
+    watermark to sweep an older range again; issues already reported are
+    not reported twice.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, 'ISSUE_SLA_SCAN_BATCH_SIZE', 500)
+    # Without a watermark only issues falling due from now on are reported; --since sweeps older ones
+    watermark, _ = SLAWatermark.objects.get_or_create(name=SCANNER, defaults={'scanned_until': now})
+    start = since if since is not None else watermark.scanned_until
+    # Before the sweep moves the watermark past the updates it has to cover
+    breached = scan_reopened(start, now, batch_size) if start is not None else 0
+    while True:
+        with transaction.atomic():
+            # Concurrent scanners wait here instead of reporting the same issues
+            watermark = SLAWatermark.objects.select_for_update().get(name=SCANNER)
+            start = since if since is not None else watermark.scanned_until
+            due = Issue.objects.filter(due_date__lte=now)
+            if start is not None:
+                # gte: issues sharing the due date a full batch ended on come next
+                due = due.filter(due_date__gte=start)
+            batch = list(
+                due.filter(status__in=Issue.OPEN_STATUSES, sla_breached_at__isnull=True)
+                .order_by('due_date', 'id')[:batch_size]
+            )
+            if batch:
+                _mark_breached(batch, now)
+            finished = len(batch) < batch_size
+            watermark.scanned_until = now if finished else batch[-1].due_date
+            watermark.save(update_fields=['scanned_until'])
+        breached += len(batch)
+        since = None
+        if finished:
+            return breached
+
+
+def report_if_overdue(issue):
+    """Report ``issue`` at once if it was saved with a due date that already passed"""
+    if issue.is_overdue and issue.sla_breached_at is None:
+        _mark_breached([issue], timezone.now())
@@ -0,0 +1,832 @@
+from datetime import timedelta
+import os
+import re
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.http import Http404
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.models import ConcurrentUpdateError, OutboxEvent
+from apps.core.identity import get_identity_map, get_mapped_object_or_404
+from apps.core.pagination import decode_cursor
+from .cache import ISSUES_TAG, issue_tag, normalize_list_filters
+from .deletion import mark_deleted
+from .history import record_changes
+from .sla import scan_breaches, sla_breached
+from .models import ArchivedIssue, Issue, IssueAttachment, IssueChangeSet, IssueComment, IssueDeletion, IssueHistory, SLAWatermark
+from .views import IssueDeleteView, IssueListView, IssueUpdateView, update_issue_status
+
+User = get_user_model()
+
+@override_settings(ISSUE_SLA_HOURS={})
+class IdentityMapTests(TestCase):
+    """Test that one request loads each issue and user at most once"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(email='creator@example.com', password='testpass123')
+        self.technician = User.objects.create_user(email='tech@example.com', password='testpass123')
+        self.issue = Issue.objects.create(
+            title='Pothole',
+            description='Deep pothole on Main St',
+            created_by=self.user,
+            assigned_to=self.technician
+        )
+
+    def make_request(self, path, data=None, **extra):
+        request = self.factory.post(path, data or {}, **extra)
+        request.user = User.objects.get(pk=self.user.pk)
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    def issue_selects(self, queries):
+        return [
+            query for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "issues_issue"' in query['sql']
+        ]
+
+    def test_repeated_lookups_share_one_instance(self):
+        """Test repeated lookups in one request return the same instance"""
+        request = self.make_request('/')
+        with self.assertNumQueries(1):
+            first = get_mapped_object_or_404(request, Issue, self.issue.pk)
+            second = get_mapped_object_or_404(request, Issue.objects.all(), str(self.issue.pk))
+            # created_by is wired to request.user instead of being fetched
+            self.assertIs(first.created_by, request.user)
+        self.assertIs(first, second)
+
+    def test_mapped_instances_still_obey_filters(self):
+        """Test a mapped issue is not returned through filters it does not match"""
+        request = self.make_request('/')
+        Issue.objects.filter(pk=self.issue.pk).update(deleted_at=timezone.now())
+        deleted = get_mapped_object_or_404(request, Issue.all_objects.all(), self.issue.pk)
+        with self.assertNumQueries(1), self.assertRaises(Http404):
+            get_mapped_object_or_404(request, Issue, self.issue.pk)
+
+        mine = Issue.all_objects.filter(created_by=self.user)
+        with self.assertNumQueries(1):
+            self.assertIs(get_mapped_object_or_404(request, mine, self.issue.pk), deleted)
+            self.assertIs(get_mapped_object_or_404(request, Issue.all_objects.filter(created_by=self.user), self.issue.pk), deleted)
+        with self.assertRaises(Http404):
+            get_mapped_object_or_404(request, Issue.all_objects.filter(created_by=self.technician), self.issue.pk)
+
+    def test_update_view_loads_issue_once(self):
+        """Test the update view selects the issue once and writes one change set"""
+        request = self.make_request(f'/issues/{self.issue.pk}/update/', {
+            'title': 'Pothole (urgent)',
+            'description': 'Deep pothole on Main St',
+            'status': 'in_progress',
+            'priority': 'medium',
+        })
+        # SELECT issue, SELECT old assignee for the change set, INSERT change set,
+        # UPDATE last activity, INSERT change set event, UPDATE issue, INSERT issue event,
+        # plus the savepoint around the writes (a transaction outside tests)
+        with CaptureQueriesContext(connection) as context:
+            response = IssueUpdateView.as_view()(request, pk=self.issue.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(context.captured_queries), 9)
+        self.assertEqual(len(self.issue_selects(context.captured_queries)), 1)
+
+        self.assertEqual(IssueChangeSet.objects.get().changes, {
+            'title': ['Pothole', 'Pothole (urgent)'],
+            'status': ['open', 'in_progress'],
+            'assigned_to': [str(self.technician), 'None'],
+        })
+
+    def test_delete_view_loads_issue_once(self):
+        """Test the delete view selects the issue once"""
+        request = self.make_request(f'/issues/{self.issue.pk}/delete/')
+        with CaptureQueriesContext(connection) as context:
+            response = IssueDeleteView.as_view(success_url='/issues/')(request, pk=self.issue.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Issue.objects.filter(pk=self.issue.pk).exists())
+        self.assertEqual(len(self.issue_selects(context.captured_queries)), 1)
+
+    def test_status_change_writes_only_status(self):
+        """Test a status change updates only the status columns"""
+        request = self.make_request(
+            f'/issues/{self.issue.pk}/update-status/', {'status': 'resolved'},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        # SELECT issue, UPDATE status, INSERT issue event, INSERT change set,
+        # UPDATE last activity, INSERT change set event, plus the savepoint around the writes
+        with CaptureQueriesContext(connection) as context:
+            response = update_issue_status(request, self.issue.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(context.captured_queries), 8)
+        update = context.captured_queries[2]['sql']
+        self.assertTrue(update.startswith('UPDATE "issues_issue" SET "status"'))
+        self.assertNotIn('"title"', update)
+        self.assertIs(get_identity_map(request).get(Issue, self.issue.pk).created_by, request.user)
+
+
+class CacheInvalidationTests(TestCase):
+    """Test issue writes invalidate tagged cache entries"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.issue = Issue.objects.create(title='Pothole')
+
+    def test_issue_save_invalidates_issue_tags(self):
+        """Test saving an issue invalidates list-wide and per-issue entries"""
+        cache.set('issues:counts', {'open': 1}, 60, tags=[ISSUES_TAG])
+        cache.set('issue:detail', 'cached', 60, tags=[issue_tag(self.issue.pk)])
+        self.issue.status = Issue.Status.RESOLVED
+        self.issue.save(update_fields=['status'])
+        self.assertIsNone(cache.get('issues:counts'))
+        self.assertIsNone(cache.get('issue:detail'))
+
+    def test_history_write_invalidates_only_its_issue(self):
+        """Test a change set invalidates only the entries of its issue"""
+        cache.set('issues:counts', {'open': 1}, 60, tags=[ISSUES_TAG])
+        cache.set('issue:detail', 'cached', 60, tags=[issue_tag(self.issue.pk)])
+        record_changes(self.issue, None, [('comment', None, 'Crew dispatched')])
+        self.assertEqual(cache.get('issues:counts'), {'open': 1})
+        self.assertIsNone(cache.get('issue:detail'))
+
+
+class IssueListCacheTests(TestCase):
+    """Test issue list results are cached per normalized filter set"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(email='dispatcher@example.com', password='testpass123')
+        self.open_issue = Issue.objects.create(title='Pothole', created_by=self.user)
+        self.resolved_issue = Issue.objects.create(title='Broken sign', status=Issue.Status.RESOLVED)
+
+    def list_issues(self, query_count, **params):
+        request = self.factory.get('/issues/', params)
+        request.user = self.user
+        with self.assertNumQueries(query_count):
+            response = IssueListView.as_view()(request)
+        return [issue.title for issue in response.context_data['issues']]
+
+    def test_filters_are_normalized(self):
+        """Test equivalent query strings share one cache key"""
+        self.assertEqual(
+            normalize_list_filters({'q': ' Pothole ', 'status': '', 'created_by_me': 'on'}, self.user),
+            normalize_list_filters({'created_by_me': '1', 'q': 'pothole'}, self.user)
+        )
+
+    def test_repeated_list_skips_filter_query(self):
+        """Test an identical list is served from cache and refreshed by an issue write"""
+        self.assertEqual(self.list_issues(2, q='pothole'), ['Pothole'])
+        # Only the page's rows are fetched by primary key
+        self.assertEqual(self.list_issues(1, q='POTHOLE '), ['Pothole'])
+
+        Issue.objects.create(title='Second pothole')
+        self.assertEqual(self.list_issues(2, q='pothole'), ['Second pothole', 'Pothole'])
+
+    def test_status_lists_invalidated_per_status(self):
+        """Test a write only invalidates lists of the statuses it touches"""
+        self.assertEqual(self.list_issues(2, status='open'), ['Pothole'])
+        self.assertEqual(self.list_issues(2, status='resolved'), ['Broken sign'])
+
+        self.resolved_issue.title = 'Broken stop sign'
+        self.resolved_issue.save()
+        self.assertEqual(self.list_issues(1, status='open'), ['Pothole'])
+        self.assertEqual(self.list_issues(2, status='resolved'), ['Broken stop sign'])
+
+        self.open_issue.status = Issue.Status.RESOLVED
+        self.open_issue.save()
+        self.assertEqual(self.list_issues(1, status='open'), [])
+        self.assertEqual(self.list_issues(2, status='resolved'), ['Broken stop sign', 'Pothole'])
+
+
+class FragmentCacheTests(TestCase):
+    """Test cached template fragments are reused until their issue data changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(email='dispatcher@example.com', password='testpass123')
+        self.client.force_login(self.user)
+        self.issues = [
+            Issue.objects.create(title=f'Pothole {number}', created_by=self.user, assigned_to=self.user)
+            for number in range(3)
+        ]
+
+    def render(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), len(context.captured_queries)
+
+    def test_issue_rows_rerendered_only_when_updated(self):
+        """Test list rows come from cache and a saved issue gets a fresh row"""
+        url = reverse('issues:issue-list')
+        self.render(url)
+        content, queries = self.render(url)
+        # Users are joined into the issue query, cached rows or not
+        self.assertEqual(queries, 1)
+        self.assertIn('Pothole 2', content)
+
+        self.issues[1].title = 'Pothole 1 (patched)'
+        self.issues[1].save()
+        content, queries = self.render(url)
+        self.assertIn('Pothole 1 (patched)', content)
+        self.assertEqual(queries, 1)
+
+    def test_issue_rows_follow_user_changes(self):
+        """Test renaming the reporter or assignee re-renders their cached rows"""
+        url = reverse('issues:issue-list')
+        self.assertIn('dispatcher@example.com', self.render(url)[0])
+
+        self.user.first_name, self.user.last_name = 'Dana', 'Reyes'
+        self.user.save()
+        content, _ = self.render(url)
+        self.assertNotIn('dispatcher@example.com', content)
+        self.assertIn('Dana Reyes', content)
+
+    def test_dashboard_panels_follow_issue_generation(self):
+        """Test dashboard panels are cached until any issue changes"""
+        url = reverse('issues:dashboard')
+        self.render(url)
+        content, cached = self.render(url)
+        self.assertEqual(cached, 0)
+        self.assertIn('Pothole 0', content)
+
+        Issue.objects.create(title='Fallen tree', created_by=self.user)
+        content, _ = self.render(url)
+        self.assertIn('Fallen tree', content)
+
+    def test_dashboard_renders_status_counts(self):
+        """Test the stats cards show the cached status counts"""
+        Issue.objects.create(title='Flooding', status=Issue.Status.IN_PROGRESS, assigned_to=self.user)
+        content, _ = self.render(reverse('issues:dashboard'))
+        counters = re.findall(r'data-counter="(\d+)"', content)
+        self.assertEqual(counters, ['3', '1', '0', '4'])
+
+
+class HtmxPartialTests(TestCase):
+    """Test HTMX requests get only the fragment that changed"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(email='dispatcher@example.com', password='testpass123')
+        self.client.force_login(self.user)
+        self.issue = Issue.objects.create(title='Pothole', created_by=self.user)
+
+    def test_infinite_scroll_pages_by_cursor(self):
+        """Test the list renders one page and HTMX fetches the rows after the cursor"""
+        for number in range(3):
+            Issue.objects.create(title=f'Crack {number}')
+        with mock.patch('apps.issues.views.ISSUE_LIST_PAGE_SIZE', 2):
+            response = self.client.get(reverse('issues:issue-list'))
+            self.assertContains(response, 'Crack 2')
+            self.assertNotContains(response, 'Crack 0')
+            next_cursor = response.context['next_cursor']
+            self.assertIsNotNone(decode_cursor(next_cursor))
+
+            response = self.client.get(
+                reverse('issues:issue-list'), {'cursor': next_cursor}, HTTP_HX_REQUEST='true'
+            )
+            content = response.content.decode()
+            self.assertNotIn('<html', content)
+            self.assertIn('Crack 0', content)
+            self.assertIn('Pothole', content)
+            self.assertNotIn('Crack 1', content)
+            self.assertNotIn('hx-trigger="revealed"', content)
+            self.assertNotIn('No issues found.', content)
+
+    def test_search_returns_matching_rows(self):
+        """Test the navbar search gets only the matching rows"""
+        Issue.objects.create(title='Fallen tree')
+        response = self.client.get(reverse('issues:issue-list'), {'q': 'tree'}, HTTP_HX_REQUEST='true')
+        self.assertContains(response, 'Fallen tree')
+        self.assertNotContains(response, 'Pothole')
+        self.assertNotContains(response, '<table')
+
+    def test_add_comment_returns_comment_fragment(self):
+        """Test an HTMX comment returns just the new comment"""
+        url = reverse('issues:add-comment', args=[self.issue.pk])
+        response = self.client.post(url, {'content': 'Crew on site'}, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content.decode().lstrip().startswith('<li>'))
+        self.assertContains(response, 'Crew on site')
+        self.assertContains(response, '<li id="comments-empty" hx-swap-oob="delete"></li>', html=True)
+        self.assertEqual(IssueComment.objects.get().author, self.user)
+
+        response = self.client.post(url, {'content': 'Patched'})
+        self.assertRedirects(response, reverse('issues:detail', args=[self.issue.pk]))
+
+    def test_status_change_returns_row_fragment(self):
+        """Test an HTMX status change returns only the updated issue row"""
+        response = self.client.post(
+            reverse('issues:update-status', args=[self.issue.pk]), {'status': 'resolved'},
+            HTTP_HX_REQUEST='true'
+        )
+        self.assertContains(response, f'id="issue-{self.issue.pk}"')
+        self.assertContains(response, 'Resolved')
+        self.assertNotContains(response, '<table')
+
+
+class IssueDetailPagingTests(TestCase):
+    """Test the detail page renders bounded pages of comments and history"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='dispatcher@example.com', password='testpass123')
+        self.client.force_login(self.user)
+        self.issue = Issue.objects.create(title='Pothole', created_by=self.user)
+        IssueComment.objects.bulk_create([
+            IssueComment(issue=self.issue, author=self.user, content=f'Update {number}')
+            for number in range(45)
+        ])
+        IssueChangeSet.objects.bulk_create([
+            IssueChangeSet(issue=self.issue, changed_by=self.user, changes={'status': [None, f'state {number}']})
+            for number in range(30)
+        ])
+
+    def detail_queries(self, issue):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('issues:detail', args=[issue.pk]))
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_detail_cost_independent_of_issue_age(self):
+        """Test an old issue renders with the same queries as a new one"""
+        self.detail_queries(self.issue)  # loads the session and user into the cache
+        response, old_issue_queries = self.detail_queries(self.issue)
+        self.assertEqual(len(response.context['comments']), 20)
+        self.assertIsNotNone(response.context['comments_cursor'])
+        self.assertNotContains(response, 'state 0')  # history is fetched lazily
+
+        new_issue = Issue.objects.create(title='Fallen tree', created_by=self.user)
+        IssueComment.objects.create(issue=new_issue, author=self.user, content='Reported')
+        _, new_issue_queries = self.detail_queries(new_issue)
+        self.assertEqual(old_issue_queries, new_issue_queries)
+
+    def test_load_more_walks_all_comments(self):
+        """Test following comment cursors returns every comment exactly once"""
+        response = self.client.get(reverse('issues:detail', args=[self.issue.pk]))
+        seen = [comment.content for comment in response.context['comments']]
+        cursor = response.context['comments_cursor']
+        while cursor:
+            response = self.client.get(reverse('issues:comments', args=[self.issue.pk]), {'cursor': cursor})
+            seen += [comment.content for comment in response.context['comments']]
+            cursor = response.context['comments_cursor']
+        self.assertEqual(seen, [f'Update {number}' for number in reversed(range(45))])
+
+    def test_history_fragment_is_paginated(self):
+        """Test the history section loads newest changes first, one page at a time"""
+        response = self.client.get(reverse('issues:history', args=[self.issue.pk]))
+        self.assertContains(response, 'state 29')
+        self.assertNotContains(response, 'state 9<')
+        self.assertContains(response, 'Load older changes')
+
+    def test_json_endpoints_cursor_paginated(self):
+        """Test the comments and history API return cursor pages"""
+        response = self.client.get(reverse('api-issues:issue-comments', args=[self.issue.pk]))
+        self.assertEqual(len(response.json()['results']), 20)
+        self.assertEqual(response.json()['results'][0]['content'], 'Update 44')
+        self.assertIn('cursor=', response.json()['next'])
+
+        response = self.client.get(
+            reverse('api-issues:issue-history', args=[self.issue.pk]), {'page_size': 50}
+        )
+        self.assertEqual(len(response.json()['results']), 30)
+        self.assertIsNone(response.json()['next'])
+
+class IssueChangeSetTests(TestCase):
+    """Test legacy per-field history converts into change sets and reads the same"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='dispatcher@example.com', password='testpass123')
+        self.client.force_login(self.user)
+        self.issue = Issue.objects.create(title='Pothole', created_by=self.user)
+        self.other = Issue.objects.create(title='Broken light', created_by=self.user)
+
+    def legacy(self, issue, field, old_value, new_value, changed_at, user=None):
+        row = IssueHistory.objects.create(
+            issue=issue, changed_by=user or self.user, field=field, old_value=old_value, new_value=new_value
+        )
+        IssueHistory.objects.filter(pk=row.pk).update(changed_at=changed_at)
+
+    def history(self, issue):
+        response = self.client.get(reverse('api-issues:issue-history', args=[issue.pk]))
+        return [(entry['field'], entry['old_value'], entry['new_value']) for entry in response.json()['results']]
+
+    def test_convert_groups_rows_of_one_edit(self):
+        """Test rows of one edit become one change set and the API lists the same fields"""
+        start = timezone.now() - timedelta(days=1)
+        self.legacy(self.issue, 'title', 'Pothole', 'Deep pothole', start)
+        self.legacy(self.issue, 'status', 'open', 'in_progress', start + timedelta(milliseconds=2))
+        self.legacy(self.issue, 'comment', None, 'Comment added: crew on site', start + timedelta(hours=1))
+        self.legacy(self.issue, 'status', 'in_progress', 'resolved', start + timedelta(hours=1, milliseconds=1))
+        self.legacy(self.other, 'priority', 'medium', 'high', start)
+
+        call_command('convert_issue_history', '--dry-run', stdout=mock.MagicMock())
+        self.assertEqual(IssueHistory.objects.count(), 5)
+
+        call_command('convert_issue_history', '--batch-size', '1', stdout=mock.MagicMock())
+        self.assertFalse(IssueHistory.objects.exists())
+        change_sets = list(self.issue.change_sets.order_by('changed_at'))
+        self.assertEqual([change_set.changes for change_set in change_sets], [
+            {'title': ['Pothole', 'Deep pothole'], 'status': ['open', 'in_progress']},
+            {'comment': [None, 'Comment added: crew on site'], 'status': ['in_progress', 'resolved']},
+        ])
+        self.assertEqual(change_sets[0].changed_at, start)
+        self.assertEqual(self.history(self.issue), [
+            ('comment', None, 'Comment added: crew on site'),
+            ('status', 'in_progress', 'resolved'),
+            ('title', 'Pothole', 'Deep pothole'),
+            ('status', 'open', 'in_progress'),
+        ])
+        self.assertEqual(self.history(self.other), [('priority', 'medium', 'high')])
+
+class IssueActivityCounterTests(TestCase):
+    """Test the denormalized comment, attachment and activity fields of issues"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='inspector@example.com', password='testpass123')
+        self.client.force_login(self.user)
+        self.issue = Issue.objects.create(title='Pothole', created_by=self.user)
+
+    def attach(self, issue, name='photo.jpg'):
+        return IssueAttachment.objects.create(
+            issue=issue, uploaded_by=self.user, file=f'issues/attachments/{name}',
+            file_name=name, file_size=1024, file_type='image/jpeg'
+        )
+
+    def test_write_paths_maintain_counters(self):
+        """Test comments, attachments and history rows update the issue"""
+        self.assertIsNone(self.issue.last_activity_at)
+        self.client.post(reverse('issues:add-comment', args=[self.issue.pk]), {'content': 'Still there'})
+        comment = IssueComment.objects.get()
+        attachment = self.attach(self.issue)
+        self.issue.refresh_from_db()
+        self.assertEqual((self.issue.comment_count, self.issue.attachment_count), (1, 1))
+        self.assertEqual(self.issue.last_activity_at, attachment.uploaded_at)
+
+        change_set = record_changes(self.issue, self.user, [('priority', 'medium', 'high')])
+        comment.delete()
+        attachment.delete()
+        self.issue.refresh_from_db()
+        self.assertEqual((self.issue.comment_count, self.issue.attachment_count), (0, 0))
+        self.assertEqual(self.issue.last_activity_at, change_set.changed_at)
+
+    def test_save_does_not_overwrite_counters(self):
+        """Test saving a stale issue keeps counts written by others meanwhile"""
+        stale = Issue.objects.get(pk=self.issue.pk)
+        IssueComment.objects.create(issue=self.issue, author=self.user, content='First')
+        stale.title = 'Deep pothole'
+        stale.save()
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.title, 'Deep pothole')
+        self.assertEqual(self.issue.comment_count, 1)
+
+    def test_reconcile_repairs_drift(self):
+        """Test the reconcile command recomputes drifted issues in batches"""
+        other = Issue.objects.create(title='Broken light', created_by=self.user)
+        # bulk_create bypasses the signals, so the counters drift
+        comments = IssueComment.objects.bulk_create([
+            IssueComment(issue=other, author=self.user, content=f'Note {number}') for number in range(3)
+        ])
+        self.attach(self.issue)
+        Issue.objects.filter(pk=self.issue.pk).update(attachment_count=7)
+
+        call_command('reconcile_issue_activity', '--dry-run', stdout=mock.MagicMock())
+        other.refresh_from_db()
+        self.assertEqual(other.comment_count, 0)
+
+        call_command('reconcile_issue_activity', '--batch-size', '1', stdout=mock.MagicMock())
+        other.refresh_from_db()
+        self.issue.refresh_from_db()
+        self.assertEqual(other.comment_count, 3)
+        self.assertEqual(other.last_activity_at, max(comment.created_at for comment in comments))
+        self.assertEqual(self.issue.attachment_count, 1)
+
+@override_settings(ISSUE_SLA_HOURS={})
+class TechnicianQueueTests(TestCase):
+    """Test the rank columns and the technician work-queue endpoint"""
+
+    def setUp(self):
+        self.technician = User.objects.create_user(
+            email='tech@example.com', password='testpass123', role=User.Role.TECHNICIAN
+        )
+        self.client.force_login(self.technician)
+        self.now = timezone.now()
+
+    def assign(self, title, priority, due_in=None, status=Issue.Status.OPEN, **extra):
+        return Issue.objects.create(
+            title=title, priority=priority, status=status, assigned_to=self.technician,
+            due_date=self.now + timedelta(days=due_in) if due_in is not None else None, **extra
+        )
+
+    def test_ranks_follow_choices(self):
+        """Test the rank columns track the text fields on every kind of save"""
+        issue = self.assign('Pothole', Issue.Priority.LOW)
+        self.assertEqual((issue.priority_rank, issue.status_rank), (0, 0))
+        issue.status = Issue.Status.CLOSED
+        issue.save(update_fields=['status', 'updated_at'])
+        issue.priority = Issue.Priority.CRITICAL
+        issue.save()
+        issue.refresh_from_db()
+        self.assertEqual((issue.priority_rank, issue.status_rank), (3, 3))
+        self.assertEqual(
+            list(Issue.objects.order_by('-priority_rank').values_list('priority', flat=True)[:1]),
+            ['critical']
+        )
+
+    def test_queue_order_and_pages(self):
+        """Test the queue walks open assigned issues by priority, due date, age"""
+        expected = [
+            self.assign('Sinkhole', Issue.Priority.CRITICAL, due_in=5),
+            self.assign('Flooding', Issue.Priority.HIGH, due_in=1),
+            self.assign('Fallen tree', Issue.Priority.HIGH, due_in=3, status=Issue.Status.IN_PROGRESS),
+            self.assign('Broken sign', Issue.Priority.HIGH),
+            self.assign('Faded lines', Issue.Priority.HIGH),
+            self.assign('Graffiti', Issue.Priority.LOW, due_in=0),
+        ]
+        self.assign('Fixed pothole', Issue.Priority.CRITICAL, status=Issue.Status.RESOLVED)
+        Issue.objects.create(title='Not mine', priority=Issue.Priority.CRITICAL)
+
+        seen = []
+        url = reverse('api-issues:my-queue') + '?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json()['results']), 2)
+            seen += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+        self.assertEqual(seen, [issue.pk for issue in expected])
+
+class SLABreachTests(TestCase):
+    """Test SLA due dates, the overdue flag and the breach scanner"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='supervisor@example.com', password='testpass123')
+        self.now = timezone.now()
+        self.reports = []
+        sla_breached.connect(self.receive, dispatch_uid='sla-test')
+        self.addCleanup(sla_breached.disconnect, dispatch_uid='sla-test')
+
+    def receive(self, sender, issues, breached_at, **kwargs):
+        self.reports.append(sorted(issue.title for issue in issues))
+
+    def due_in(self, title, hours, **extra):
+        return Issue.objects.create(
+            title=title, created_by=self.user, due_date=self.now + timedelta(hours=hours), **extra
+        )
+
+    def test_due_date_defaults_to_sla_target(self):
+        """Test issues created without a due date get one from their priority"""
+        with self.settings(ISSUE_SLA_HOURS={'critical': 4}):
+            issue = Issue.objects.create(title='Sinkhole', priority=Issue.Priority.CRITICAL)
+            no_target = Issue.objects.create(title='Graffiti', priority=Issue.Priority.LOW)
+        self.assertAlmostEqual(issue.due_date, issue.created_at + timedelta(hours=4), delta=timedelta(seconds=1))
+        self.assertIsNone(no_target.due_date)
+        self.assertFalse(issue.is_overdue)
+
+    def test_scan_reports_each_breach_once_in_batches(self):
+        """Test the scanner sweeps forward from its watermark in batches"""
+        self.due_in('Pothole', 1)
+        self.due_in('Flooding', 2)
+        self.due_in('Fallen tree', 3)
+        self.due_in('Fixed sign', 1, status=Issue.Status.RESOLVED)
+        self.due_in('Faded lines', 48)
+
+        later = self.now + timedelta(hours=5)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(scan_breaches(now=later, batch_size=2), 3)
+        self.assertEqual(self.reports, [['Flooding', 'Pothole'], ['Fallen tree']])
+        self.assertEqual(Issue.objects.get(title='Pothole').sla_breached_at, later)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(scan_breaches(now=later, batch_size=2), 0)
+            call_command('scan_sla_breaches', '--since', self.now.isoformat(), stdout=mock.MagicMock())
+            self.assertEqual(scan_breaches(now=self.now + timedelta(days=3)), 1)
+        self.assertEqual(self.reports[-1], ['Faded lines'])
+        self.assertEqual(len(self.reports), 3)
+
+    def test_due_date_moves_are_reported(self):
+        """Test due dates set in the swept past are reported on save, once per due date"""
+        with self.captureOnCommitCallbacks(execute=True):
+            scan_breaches()
+            issue = self.due_in('Pothole', -1)
+        self.assertEqual(self.reports, [['Pothole']])
+        self.assertTrue(issue.is_overdue)
+        self.assertEqual(scan_breaches(), 0)
+
+        issue.due_date = self.now + timedelta(hours=1)
+        issue.save()
+        issue.refresh_from_db()
+        self.assertIsNone(issue.sla_breached_at)
+        self.assertFalse(issue.is_overdue)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            issue.due_date = self.now - timedelta(hours=2)
+            issue.save()
+        self.assertEqual(self.reports, [['Pothole'], ['Pothole']])
+
+    def test_first_scan_starts_from_now(self):
+        """Test a scanner without a watermark does not report the whole history"""
+        issue = self.due_in('Old pothole', -100)
+        Issue.objects.filter(pk=issue.pk).update(sla_breached_at=None)
+        SLAWatermark.objects.all().delete()
+        self.assertEqual(scan_breaches(), 0)
+        self.assertEqual(scan_breaches(since=self.now - timedelta(days=30)), 1)
+
+    def test_issues_reopened_overdue_are_reported(self):
+        """Test an issue closed while it fell due is reported once reopened"""
+        issue = self.due_in('Pothole', 1, status=Issue.Status.CLOSED)
+        later = self.now + timedelta(hours=5)
+        self.assertEqual(scan_breaches(now=later), 0)
+
+        issue.status = Issue.Status.OPEN
+        with mock.patch('django.utils.timezone.now', return_value=later + timedelta(minutes=1)):
+            issue.save(update_fields=['status', 'updated_at'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(scan_breaches(now=later + timedelta(hours=1), batch_size=1), 1)
+        self.assertEqual(self.reports, [['Pothole']])
+        self.assertEqual(scan_breaches(now=later + timedelta(hours=2)), 0)
+
+@override_settings(ISSUE_SLA_HOURS={}, ISSUE_ARCHIVE_AFTER_DAYS=730)
+class IssueArchiveTests(TestCase):
+    """Test long closed issues move to the archive and stay readable"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='archivist@example.com', password='testpass123')
+        self.client.force_login(self.user)
+        self.long_ago = timezone.now() - timedelta(days=800)
+
+    def closed(self, title, at, **extra):
+        issue = Issue.objects.create(title=title, created_by=self.user, status=Issue.Status.CLOSED, **extra)
+        Issue.objects.filter(pk=issue.pk).update(updated_at=at, last_activity_at=at)
+        return issue
+
+    def test_archive_moves_issue_and_related_rows(self):
+        """Test archived issues leave the hot tables, keep their id and can be searched"""
+        issue = self.closed('Pothole on Elm Street', self.long_ago, location='Elm Street')
+        IssueComment.objects.create(issue=issue, author=self.user, content='Filled')
+        IssueAttachment.objects.create(
+            issue=issue, uploaded_by=self.user, file='issues/attachments/after.jpg',
+            file_name='after.jpg', file_size=1024, file_type='image/jpeg'
+        )
+        record_changes(issue, self.user, [('status', 'resolved', 'closed')])
+        Issue.objects.filter(pk=issue.pk).update(updated_at=self.long_ago, last_activity_at=self.long_ago)
+        other = self.closed('Broken light', self.long_ago)
+        recent = self.closed('Faded lines', timezone.now() - timedelta(days=30))
+        stale_open = Issue.objects.create(title='Old crack', created_by=self.user)
+        Issue.objects.filter(pk=stale_open.pk).update(updated_at=self.long_ago)
+
+        call_command('archive_closed_issues', '--dry-run', stdout=mock.MagicMock())
+        self.assertFalse(ArchivedIssue.objects.exists())
+        call_command('archive_closed_issues', '--batch-size', '1', stdout=mock.MagicMock())
+        self.assertEqual(set(Issue.objects.values_list('pk', flat=True)), {recent.pk, stale_open.pk})
+        call_command('run_issue_deletions', '--once', stdout=mock.MagicMock())
+
+        self.assertEqual(set(Issue.all_objects.values_list('pk', flat=True)), {recent.pk, stale_open.pk})
+        self.assertFalse(IssueComment.objects.exists())
+        self.assertFalse(IssueAttachment.objects.exists())
+        self.assertFalse(IssueChangeSet.objects.filter(issue_id=issue.pk).exists())
+        self.assertEqual(set(ArchivedIssue.objects.values_list('pk', flat=True)), {issue.pk, other.pk})
+        topics = OutboxEvent.objects.filter(aggregate_id=str(issue.pk)).values_list('topic', flat=True)
+        self.assertIn('issue.archived', topics)
+        self.assertNotIn('issue.deleted', topics)
+        self.assertNotIn('issue.comment.deleted', topics)
+
+        response = self.client.get(reverse('api-issues:archived-issue-detail', args=[issue.pk]))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['title'], data['status']), ('Pothole on Elm Street', 'closed'))
+        self.assertEqual([comment['content'] for comment in data['document']['comments']], ['Filled'])
+        self.assertEqual(data['document']['attachments'][0]['file'], 'issues/attachments/after.jpg')
+        self.assertEqual(data['document']['change_sets'][0]['changes'], {'status': ['resolved', 'closed']})
+
+        response = self.client.get(reverse('api-issues:archive-search'), {'q': 'elm street'})
+        self.assertEqual([result['id'] for result in response.json()['results']], [issue.pk])
+        self.assertEqual(self.client.get(reverse('api-issues:archived-issue-detail', args=[recent.pk])).status_code, 404)
+
+@override_settings(ISSUE_SLA_HOURS={})
+class IssueDeletionTests(TestCase):
+    """Test deleted issues disappear at once and their rows go in batches"""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=media_root.name))
+        self.user = User.objects.create_user(email='dispatcher@example.com', password='testpass123')
+        self.client.force_login(self.user)
+
+    def issue_with_rows(self, title):
+        issue = Issue.objects.create(title=title, created_by=self.user)
+        for number in range(3):
+            IssueComment.objects.create(issue=issue, author=self.user, content=f'Note {number}')
+            record_changes(issue, self.user, [('priority', 'medium', f'high {number}')])
+        attachments = [
+            IssueAttachment.objects.create(
+                issue=issue, uploaded_by=self.user, file=SimpleUploadedFile(f'photo{number}.jpg', b'jpeg')
+            )
+            for number in range(2)
+        ]
+        return issue, [attachment.file.path for attachment in attachments]
+
+    def test_delete_returns_before_rows_and_files_are_removed(self):
+        """Test the view only marks the issue; the worker removes rows and files"""
+        issue, paths = self.issue_with_rows('Pothole')
+        kept, kept_paths = self.issue_with_rows('Archived crack')
+        mark_deleted([kept], delete_files=False)
+
+        response = self.client.post(reverse('issues:delete', args=[issue.pk]))
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Issue.objects.filter(pk=issue.pk).exists())
+        self.assertEqual(self.client.get(reverse('issues:detail', args=[issue.pk])).status_code, 404)
+        self.assertEqual(IssueComment.objects.filter(issue_id=issue.pk).count(), 3)
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+        call_command('run_issue_deletions', '--once', '--batch-size', '2', stdout=mock.MagicMock())
+        self.assertFalse(Issue.all_objects.exists())
+        self.assertFalse(IssueDeletion.objects.exists())
+        for model in (IssueComment, IssueChangeSet, IssueAttachment):
+            self.assertFalse(model.objects.exists())
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+        self.assertTrue(all(os.path.exists(path) for path in kept_paths))
+
+        topics = list(OutboxEvent.objects.filter(aggregate_id=str(issue.pk)).values_list('topic', flat=True))
+        self.assertEqual(topics.count('issue.deleted'), 1)
+        self.assertNotIn('issue.comment.deleted', topics)
+        self.assertNotIn('issue.attachment.deleted', topics)
+
+@override_settings(ISSUE_SLA_HOURS={})
+class IssueVersionTests(TestCase):
+    """Test edits based on an outdated version of an issue are refused"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='dispatcher@example.com', password='testpass123', is_staff=True)
+        self.client.force_login(self.user)
+        self.issue = Issue.objects.create(title='Pothole', created_by=self.user)
+
+    def test_stale_save_raises_instead_of_overwriting(self):
+        """Test a save from an older copy fails and leaves the newer row alone"""
+        stale = Issue.objects.get(pk=self.issue.pk)
+        self.issue.title = 'Deep pothole'
+        with CaptureQueriesContext(connection) as context:
+            self.issue.save()
+        self.assertIn('"version" = 1', context.captured_queries[0]['sql'])
+        self.assertEqual(self.issue.version, 2)
+
+        stale.priority = Issue.Priority.HIGH
+        with self.assertRaises(ConcurrentUpdateError), transaction.atomic():
+            stale.save(update_fields=['priority'])
+        self.issue.refresh_from_db()
+        self.assertEqual((self.issue.title, self.issue.priority, self.issue.version), ('Deep pothole', 'medium', 2))
+
+    def test_status_change_from_old_version_is_a_conflict(self):
+        """Test the status endpoint answers 409 with the current issue"""
+        url = reverse('api-issues:update-status', args=[self.issue.pk])
+        response = self.client.post(url, {'status': 'in_progress', 'version': 1}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.json()['version'], 2)
+
+        response = self.client.post(url, {'status': 'resolved', 'version': 1}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['issue']['status'], 'in_progress')
+        self.assertEqual(response.json()['issue']['version'], 2)
+        self.assertEqual(IssueChangeSet.objects.count(), 1)
+
+    def test_form_edit_from_old_version_is_a_conflict(self):
+        """Test the edit form shows the current values with a 409"""
+        url = reverse('issues:update', args=[self.issue.pk])
+        data = {'title': 'Deep pothole', 'status': 'open', 'priority': 'medium', 'version': 1}
+        self.assertEqual(self.client.post(url, data).status_code, 302)
+
+        response = self.client.post(url, dict(data, title='Shallow pothole'))
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, 'Deep pothole', status_code=409)
+        self.assertEqual(response.context['form'].initial['version'], 2)
+        self.issue.refresh_from_db()
+        self.assertEqual(self.issue.title, 'Deep pothole')
+
+    def test_api_edit_from_old_version_is_a_conflict(self):
+        """Test the API edit endpoint records the change, then answers 409 with the current issue"""
+        url = reverse('api-issues:issue-update', args=[self.issue.pk])
+        response = self.client.patch(url, {'title': 'Deep pothole', 'version': 1}, content_type='application/json')
+        self.assertEqual((response.status_code, response.json()['version']), (200, 2))
+        self.assertEqual(IssueChangeSet.objects.get().changes, {'title': ['Pothole', 'Deep pothole']})
+
+        response = self.client.patch(url, {'title': 'Shallow pothole', 'version': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['issue']['title'], 'Deep pothole')
+        self.assertEqual(response.json()['issue']['version'], 2)
+        self.assertEqual(IssueChangeSet.objects.count(), 1)
+
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        self.client.force_login(other)
+        response = self.client.patch(url, {'title': 'Mine now', 'version': 2}, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
@@ -16,7 +16,10 @@ urlpatterns = [
     path('issues/map/', views.issue_map, name='map'),  
     path('issues/<int:pk>/update-status/', views.update_issue_status_view, name='update-status'),
     
+    path('issues/<int:pk>/history/', views.issue_history, name='history'),
+    
     # Comments
+    path('issues/<int:pk>/comments/', views.issue_comments, name='comments'),
     path('issues/<int:pk>/comments/add/', views.add_comment, name='add-comment'),
     
     # Attachments
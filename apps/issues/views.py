@@ -2,15 +2,61 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.conf import settings
 from django.contrib import messages
+from django.core.cache import cache
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.db import transaction
 from django.db.models import Count, Q
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 
-from .models import Issue, IssueComment, IssueAttachment, IssueHistory
+from .models import ArchivedIssue, Issue, IssueComment, IssueAttachment, IssueChangeSet
 from .forms import IssueForm, IssueCommentForm, IssueAttachmentForm
-from rest_framework import generics, permissions
-from .serializers import IssueSerializer
+from rest_framework import generics, permissions, status as http_status
+from rest_framework.response import Response
+from .pagination import CommentCursorPagination, HistoryCursorPagination, QueueKeysetPagination
+from .serializers import (
+    ArchivedIssueDetailSerializer, ArchivedIssueSerializer, IssueCommentSerializer,
+    IssueHistorySerializer, IssueSerializer,
+)
+from apps.core.htmx import is_htmx
+from apps.core.models import ConcurrentUpdateError
+from apps.core.identity import IdentityMapObjectMixin, get_identity_map, get_mapped_object_or_404
+from apps.core.pagination import keyset_page
+from apps.core.replicas import use_primary
+from apps.core.throttling import IPTokenBucketThrottle, UserTokenBucketThrottle
+from .archive import search_archive
+from .cache import ISSUES_TAG, cached_issue_ids, issues_generation, with_user_versions
+from .deletion import delete_issue
+from .history import data_changes, form_changes, record_changes
+
+# Issues per infinite-scroll page of the issue list
+ISSUE_LIST_PAGE_SIZE = 25
+# Rows per "load more" page on the issue detail page
+COMMENT_PAGE_SIZE = 20
+HISTORY_PAGE_SIZE = 20
+ATTACHMENT_PAGE_SIZE = 20
+
+# Shown when an edit was based on a version of the issue someone else has since changed
+CONFLICT_MESSAGE = (
+    'Someone else changed this issue while you were editing it. '
+    'These are the current values; apply your changes again.'
+)
+
+def client_version(request):
+    """Version of the issue a POSTed change started from, or None if not sent"""
+    # DRF requests also carry JSON bodies in request.data
+    data = getattr(request, 'data', request.POST)
+    try:
+        return int(data['version'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def reload_issue(request, issue):
+    """The issue as stored now, replacing the stale copy in the identity map"""
+    get_identity_map(request).discard(issue)
+    return get_mapped_object_or_404(request, Issue, issue.pk)
 
 class DashboardView(LoginRequiredMixin, ListView):
     template_name = 'dashboard.html'
@@ -26,17 +72,18 @@ class DashboardView(LoginRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         issues = self.get_queryset()
         
-        # Get counts for dashboard stats
-        context['stats'] = {
+        # Get counts for dashboard stats; only evaluated when the cached stats panel is stale
+        context['stats'] = SimpleLazyObject(lambda: {
             'open': issues.filter(status='open').count(),
             'in_progress': issues.filter(status='in_progress').count(),
             'resolved': issues.filter(status='resolved').count(),
             'assigned_to_me': issues.filter(assigned_to=self.request.user, status__in=['open', 'in_progress']).count(),
             'created_by_me': issues.filter(created_by=self.request.user).count()
-        }
+        })
+        context['issues_generation'] = issues_generation()
         
         # Get recent activity
-        context['recent_activity'] = IssueHistory.objects.filter(
+        context['recent_activity'] = IssueChangeSet.objects.filter(
             Q(issue__created_by=self.request.user) | 
             Q(issue__assigned_to=self.request.user)
         ).select_related('issue', 'changed_by').order_by('-changed_at')[:10]
@@ -83,6 +130,14 @@ class IssueListView(LoginRequiredMixin, ListView):
             
         return queryset.order_by('-created_at')
     
+    def paginate_queryset(self, queryset, page_size):
+        # Filtered ids come from the query cache; only the page's rows are fetched
+        ids = cached_issue_ids(queryset, self.request.GET, self.request.user)
+        paginator, page, page_ids, is_paginated = super().paginate_queryset(ids, page_size)
+        rows = Issue.objects.in_bulk(page_ids)
+        page.object_list = [rows[pk] for pk in page_ids if pk in rows]
+        return paginator, page, page.object_list, is_paginated
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['status_filter'] = self.request.GET.get('status', '')
@@ -90,7 +145,7 @@ class IssueListView(LoginRequiredMixin, ListView):
         context['search_query'] = self.request.GET.get('q', '')
         return context
 
-class IssueDetailView(LoginRequiredMixin, DetailView):
+class IssueDetailView(LoginRequiredMixin, IdentityMapObjectMixin, DetailView):
     model = Issue
     template_name = 'issues/detail.html'
     context_object_name = 'issue'
@@ -99,9 +154,8 @@ class IssueDetailView(LoginRequiredMixin, DetailView):
         context = super().get_context_data(**kwargs)
         context['comment_form'] = IssueCommentForm()
         context['attachment_form'] = IssueAttachmentForm()
-        context['comments'] = self.object.comments.select_related('author').all()
-        context['attachments'] = self.object.attachments.all()
-        context['history'] = self.object.history.select_related('changed_by').order_by('-changed_at')
+        # First pages only; older comments and the history are fetched on demand
+        context.update(detail_pages(self.object))
         return context
 
 class IssueCreateView(LoginRequiredMixin, CreateView):
@@ -124,7 +178,7 @@ class IssueCreateView(LoginRequiredMixin, CreateView):
         context['submit_text'] = 'Create Issue'
         return context
 
-class IssueUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class IssueUpdateView(LoginRequiredMixin, UserPassesTestMixin, IdentityMapObjectMixin, UpdateView):
     model = Issue
     form_class = IssueForm
     template_name = 'issues/form.html'
@@ -134,19 +188,19 @@ class IssueUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return self.request.user == issue.created_by or self.request.user.is_staff
     
     def form_valid(self, form):
-        # Create history for changed fields
+        # Create history for changed fields; the form has already updated
+        # the (identity-mapped) issue, so old values come from its snapshot
         issue = self.get_object()
-        for field in form.changed_data:
-            if field not in ['updated_at', 'created_at']:  # Skip these fields
-                IssueHistory.objects.create(
-                    issue=issue,
-                    changed_by=self.request.user,
-                    field=field,
-                    old_value=str(getattr(issue, field)),
-                    new_value=str(form.cleaned_data[field])
-                )
-        
-        response = super().form_valid(form)
+        try:
+            with transaction.atomic():
+                record_changes(issue, self.request.user, form_changes(issue, form, get_identity_map(self.request)))
+                response = super().form_valid(form)
+        except ConcurrentUpdateError:
+            # 409 with a form holding the current values
+            self.object = reload_issue(self.request, issue)
+            messages.error(self.request, CONFLICT_MESSAGE)
+            form = self.get_form_class()(instance=self.object)
+            return self.render_to_response(self.get_context_data(form=form), status=409)
         messages.success(self.request, 'Issue updated successfully.')
         return response
     
@@ -159,7 +213,7 @@ class IssueUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         context['submit_text'] = 'Update Issue'
         return context
 
-class IssueDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class IssueDeleteView(LoginRequiredMixin, UserPassesTestMixin, IdentityMapObjectMixin, DeleteView):
     model = Issue
     template_name = 'issues/confirm_delete.html'
     success_url = reverse_lazy('issues:list')
@@ -168,9 +222,11 @@ class IssueDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         issue = self.get_object()
         return self.request.user == issue.created_by or self.request.user.is_staff
     
-    def delete(self, request, *args, **kwargs):
-        messages.success(request, 'Issue deleted successfully.')
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        # Comments, history and attachments are removed by run_issue_deletions
+        delete_issue(self.object)
+        messages.success(self.request, 'Issue deleted successfully.')
+        return redirect(self.get_success_url())
 
 class CommentCreateView(LoginRequiredMixin, CreateView):
     model = IssueComment
@@ -183,12 +239,9 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         
         # Create history entry
         issue = self.object.issue
-        IssueHistory.objects.create(
-            issue=issue,
-            changed_by=self.request.user,
-            field='comment',
-            new_value=f'Comment added: {form.cleaned_data["content"][:50]}...'
-        )
+        record_changes(issue, self.request.user, [
+            ('comment', None, f'Comment added: {form.cleaned_data["content"][:50]}...')
+        ])
         
         if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
@@ -208,7 +261,7 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         return reverse_lazy('issues:detail', kwargs={'pk': self.kwargs['pk']})
 
 def upload_attachment(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
+    issue = get_mapped_object_or_404(request, Issue, pk)
     
     if request.method == 'POST':
         form = IssueAttachmentForm(request.POST, request.FILES)
@@ -219,12 +272,7 @@ def upload_attachment(request, pk):
             attachment.save()
             
             # Create history entry
-            IssueHistory.objects.create(
-                issue=issue,
-                changed_by=request.user,
-                field='attachment',
-                new_value=f'File uploaded: {attachment.file_name}'
-            )
+            record_changes(issue, request.user, [('attachment', None, f'File uploaded: {attachment.file_name}')])
             
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({
@@ -246,34 +294,54 @@ def upload_attachment(request, pk):
 
 def update_issue_status(request, pk):
     if request.method == 'POST' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        issue = get_object_or_404(Issue, pk=pk)
+        issue = get_mapped_object_or_404(request, Issue, pk)
         status = request.POST.get('status')
         
         if status in dict(Issue.Status.choices):
             old_status = issue.status
+            version = client_version(request)
+            if version is not None:
+                issue.version = version
             issue.status = status
-            issue.save()
-            
-            # Create history entry
-            IssueHistory.objects.create(
-                issue=issue,
-                changed_by=request.user,
-                field='status',
-                old_value=old_status,
-                new_value=status
-            )
+            try:
+                with transaction.atomic():
+                    issue.save(update_fields=['status', 'updated_at'])
+                    # Create history entry
+                    record_changes(issue, request.user, [('status', old_status, status)])
+            except ConcurrentUpdateError:
+                issue = reload_issue(request, issue)
+                return JsonResponse({
+                    'success': False,
+                    'error': 'conflict',
+                    'issue': IssueSerializer(issue).data
+                }, status=409)
             
             return JsonResponse({
                 'success': True,
                 'status': issue.get_status_display(),
-                'status_class': status.replace('_', '-')
+                'status_class': status.replace('_', '-'),
+                'version': issue.version
             })
     
     return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
 
 def issue_list(request):
-    issues = Issue.objects.all().order_by('-created_at')
-    return render(request, 'issues/issue_list.html', {'issues': issues})
+    # Keyset pages; HTMX infinite scroll asks for the rows after ?cursor= only
+    cursor = request.GET.get('cursor')
+    issues = Issue.objects.select_related('created_by', 'assigned_to')
+    # The navbar search swaps the rows of #issues-list
+    search = request.GET.get('q', '').strip()
+    if search:
+        issues = issues.filter(
+            Q(title__icontains=search) |
+            Q(description__icontains=search) |
+            Q(location__icontains=search)
+        )
+    page = keyset_page(issues, cursor, ISSUE_LIST_PAGE_SIZE)
+    context = {'issues': with_user_versions(page.rows), 'cursor': cursor, 'next_cursor': page.next_cursor, 'search_query': search}
+    if is_htmx(request):
+        return render(request, 'issues/includes/issue_rows.html', context)
+    return render(request, 'issues/issue_list.html', context)
 
 def issue_create(request):
     if request.method == 'POST':
@@ -288,64 +356,115 @@ def issue_create(request):
         form = IssueForm()
     return render(request, 'issues/form.html', {'form': form, 'title': 'Create Issue'})
 
+def detail_pages(issue):
+    """First comment and attachment pages of ``issue``; bounded however old the issue is"""
+    comments = comment_page(issue, None)
+    attachments = keyset_page(issue.attachments.all(), None, ATTACHMENT_PAGE_SIZE, ('-uploaded_at', '-id'))
+    return {
+        'comments': comments.rows,
+        'comments_cursor': comments.next_cursor,
+        'attachments': attachments.rows,
+        'more_attachments': attachments.next_cursor is not None,
+    }
+
+def comment_page(issue, cursor):
+    return keyset_page(issue.comments.select_related('author'), cursor, COMMENT_PAGE_SIZE)
+
+def history_page(issue, cursor):
+    """A page of change sets of ``issue``, as per-field history entries"""
+    page = keyset_page(
+        issue.change_sets.select_related('changed_by'), cursor, HISTORY_PAGE_SIZE, ('-changed_at', '-id')
+    )
+    return page._replace(rows=[entry for change_set in page.rows for entry in change_set.entries()])
+
 def issue_detail(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
-    comments = issue.comments.all()
-    attachments = issue.attachments.all()
+    issue = get_mapped_object_or_404(request, Issue, pk)
     
     if request.method == 'POST':
         comment_form = IssueCommentForm(request.POST)
         if comment_form.is_valid():
             comment = comment_form.save(commit=False)
             comment.issue = issue
-            comment.created_by = request.user
+            comment.author = request.user
             comment.save()
-            return redirect('issues:issue-detail', pk=issue.pk)
+            return redirect('issues:detail', pk=issue.pk)
     else:
         comment_form = IssueCommentForm()
     
     return render(request, 'issues/issue_detail.html', {
         'issue': issue,
-        'comments': comments,
-        'attachments': attachments,
         'comment_form': comment_form,
-        'attachment_form': IssueAttachmentForm()
+        'attachment_form': IssueAttachmentForm(),
+        **detail_pages(issue)
+    })
+
+def issue_comments(request, pk):
+    """Next page of comments for the "load more" button"""
+    issue = get_mapped_object_or_404(request, Issue, pk)
+    page = comment_page(issue, request.GET.get('cursor'))
+    return render(request, 'issues/includes/comment_page.html', {
+        'issue': issue,
+        'comments': page.rows,
+        'comments_cursor': page.next_cursor
+    })
+
+def issue_history(request, pk):
+    """A page of history, loaded once the section is scrolled into view"""
+    issue = get_mapped_object_or_404(request, Issue, pk)
+    page = history_page(issue, request.GET.get('cursor'))
+    return render(request, 'issues/includes/history_page.html', {
+        'issue': issue,
+        'history': page.rows,
+        'history_cursor': page.next_cursor
     })
 
 def issue_update(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
+    issue = get_mapped_object_or_404(request, Issue, pk)
     if request.method == 'POST':
         form = IssueForm(request.POST, request.FILES, instance=issue)
         if form.is_valid():
-            form.save()
+            try:
+                with transaction.atomic():
+                    form.save()
+            except ConcurrentUpdateError:
+                issue = reload_issue(request, issue)
+                messages.error(request, CONFLICT_MESSAGE)
+                return render(request, 'issues/form.html', {
+                    'form': IssueForm(instance=issue), 'title': 'Update Issue'
+                }, status=409)
             messages.success(request, 'Issue updated successfully.')
-            return redirect('issues:issue-detail', pk=issue.pk)
+            return redirect('issues:detail', pk=issue.pk)
     else:
         form = IssueForm(instance=issue)
-    return render(request, 'issues/issue_form.html', {'form': form, 'title': 'Update Issue'})
+    return render(request, 'issues/form.html', {'form': form, 'title': 'Update Issue'})
 
 def issue_delete(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
+    issue = get_mapped_object_or_404(request, Issue, pk)
     if request.method == 'POST':
-        issue.delete()
+        delete_issue(issue)
         messages.success(request, 'Issue deleted successfully.')
         return redirect('issues:issue-list')
     return render(request, 'issues/issue_confirm_delete.html', {'issue': issue})
 
 def add_comment(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
+    issue = get_mapped_object_or_404(request, Issue, pk)
     if request.method == 'POST':
         form = IssueCommentForm(request.POST)
         if form.is_valid():
             comment = form.save(commit=False)
             comment.issue = issue
-            comment.created_by = request.user
+            comment.author = request.user
             comment.save()
+            if is_htmx(request):
+                # Prepended to the comment list in place of a full detail re-render
+                return render(request, 'issues/includes/comment_added.html', {'comment': comment})
             messages.success(request, 'Comment added successfully.')
-    return redirect('issues:issue-detail', pk=issue.pk)
+        elif is_htmx(request):
+            return HttpResponse(status=422)
+    return redirect('issues:detail', pk=issue.pk)
 
 def upload_attachment_view(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
+    issue = get_mapped_object_or_404(request, Issue, pk)
     if request.method == 'POST':
         form = IssueAttachmentForm(request.POST, request.FILES)
         if form.is_valid():
@@ -364,27 +483,56 @@ def delete_attachment(request, pk):
     return redirect('issues:issue-detail', pk=issue_pk)
 
 def update_issue_status_view(request, pk):
-    issue = get_object_or_404(Issue, pk=pk)
+    issue = get_mapped_object_or_404(request, Issue, pk)
     if request.method == 'POST':
         new_status = request.POST.get('status')
         if new_status in dict(Issue.Status.choices):
+            version = client_version(request)
+            if version is not None:
+                issue.version = version
             issue.status = new_status
-            issue.save()
+            try:
+                with transaction.atomic():
+                    issue.save(update_fields=['status', 'updated_at'])
+            except ConcurrentUpdateError:
+                issue = reload_issue(request, issue)
+                if is_htmx(request):
+                    with_user_versions([issue])
+                    return render(request, 'issues/includes/issue_row.html', {'issue': issue}, status=409)
+                messages.error(request, CONFLICT_MESSAGE)
+                return redirect('issues:detail', pk=issue.pk)
+            if is_htmx(request):
+                with_user_versions([issue])
+                return render(request, 'issues/includes/issue_row.html', {'issue': issue})
             messages.success(request, f'Issue status updated to {issue.get_status_display()}')
-    return redirect('issues:issue-detail', pk=issue.pk)
+    return redirect('issues:detail', pk=issue.pk)
+
+def _status_counts():
+    counts = dict.fromkeys(dict(Issue.Status.choices).keys(), 0)
+    # Cached until the next issue write, so read from the primary
+    with use_primary():
+        counts.update(Issue.objects.order_by().values_list('status').annotate(count=Count('id')))
+    return counts
 
 def dashboard(request):
-    # Get counts for different statuses
-    status_counts = {}
-    for status in dict(Issue.Status.choices).keys():
-        status_counts[status] = Issue.objects.filter(status=status).count()
+    # Get counts for different statuses (one worker recomputes them when they expire)
+    status_counts = cache.get_or_set(
+        'issues:dashboard:status-counts',
+        _status_counts,
+        getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60),
+        tags=[ISSUES_TAG]
+    )
     
     # Get recent issues
     recent_issues = Issue.objects.all().order_by('-created_at')[:5]
     
     context = {
         'status_counts': status_counts,
+        # A bound count() is only called when the stats fragment is re-rendered
+        'assigned_to_me': Issue.objects.filter(assigned_to=request.user).count
+        if request.user.is_authenticated else 0,
         'recent_issues': recent_issues,
+        'issues_generation': issues_generation(),
         'user_full_name': request.user.get_full_name() if request.user.is_authenticated else 'Guest',
     }
     return render(request, 'dashboard.html', context)
@@ -411,6 +559,14 @@ class IssueListCreateAPIView(generics.ListCreateAPIView):
     queryset = Issue.objects.all()
     serializer_class = IssueSerializer
     permission_classes = [permissions.AllowAny]  # Allow all requests for development
+    throttle_classes = [IPTokenBucketThrottle, UserTokenBucketThrottle]
+    throttle_scope = 'issue_create'
+    
+    def get_throttles(self):
+        # Only creating issues is throttled; listing stays unlimited
+        if self.request.method in permissions.SAFE_METHODS:
+            return []
+        return super().get_throttles()
     
     def perform_create(self, serializer):
         # Set the created_by field to the current user if authenticated, or None if not
@@ -420,3 +576,109 @@ class IssueListCreateAPIView(generics.ListCreateAPIView):
             # For development, you might want to set a default user or handle this differently
             # For now, we'll save without a user
             serializer.save()
+
+class IsCreatorOrStaff(permissions.BasePermission):
+    """Issues are edited by the user who reported them, or by staff"""
+
+    def has_object_permission(self, request, view, obj):
+        return obj.created_by_id == request.user.pk or request.user.is_staff
+
+class IssueUpdateAPIView(generics.UpdateAPIView):
+    """
+    Edit an issue with PUT or PATCH. Send the ``version`` the edit started
+    from: if someone changed the issue since, nothing is saved and the
+    answer is 409 with the issue as it is now.
+    """
+    queryset = Issue.objects.all()
+    serializer_class = IssueSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCreatorOrStaff]
+
+    def get_object(self):
+        issue = get_mapped_object_or_404(self.request, self.get_queryset(), self.kwargs['pk'])
+        self.check_object_permissions(self.request, issue)
+        return issue
+
+    def update(self, request, *args, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().update(request, *args, **kwargs)
+        except ConcurrentUpdateError as exc:
+            issue = reload_issue(request, exc.instance)
+            return Response(
+                {'detail': CONFLICT_MESSAGE, 'issue': IssueSerializer(issue).data},
+                status=http_status.HTTP_409_CONFLICT
+            )
+
+    def perform_update(self, serializer):
+        issue = serializer.instance
+        # version is read-only in the serializer: it is what the edit started from, not a new value
+        version = client_version(self.request)
+        if version is not None:
+            issue.version = version
+        changes = data_changes(issue, serializer.validated_data, get_identity_map(self.request))
+        serializer.save()
+        record_changes(issue, self.request.user, changes)
+
+class IssueCommentListAPIView(generics.ListAPIView):
+    """
+    Comments of an issue, newest first, cursor paginated.
+    """
+    serializer_class = IssueCommentSerializer
+    pagination_class = CommentCursorPagination
+    
+    def get_queryset(self):
+        issue = get_mapped_object_or_404(self.request, Issue, self.kwargs['pk'])
+        return issue.comments.select_related('author')
+
+class IssueHistoryListAPIView(generics.ListAPIView):
+    """
+    History of an issue, newest first, cursor paginated. Pages hold change
+    sets, listed as one entry per changed field; entries of one change set
+    share its id.
+    """
+    serializer_class = IssueHistorySerializer
+    pagination_class = HistoryCursorPagination
+    
+    def get_queryset(self):
+        issue = get_mapped_object_or_404(self.request, Issue, self.kwargs['pk'])
+        return issue.change_sets.select_related('changed_by')
+    
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        entries = [entry for change_set in page for entry in change_set.entries()]
+        return self.get_paginated_response(self.get_serializer(entries, many=True).data)
+
+class IssueQueueAPIView(generics.ListAPIView):
+    """
+    The requesting technician's open assigned issues: highest priority
+    first, then earliest due date, then oldest. Served from the partial
+    queue index with keyset pagination.
+    """
+    serializer_class = IssueSerializer
+    pagination_class = QueueKeysetPagination
+    
+    def get_queryset(self):
+        return Issue.objects.filter(
+            assigned_to=self.request.user, status__in=Issue.OPEN_STATUSES
+        ).select_related('created_by', 'assigned_to')
+
+class ArchivedIssueSearchAPIView(generics.ListAPIView):
+    """
+    Archived issues whose title, description or location contain ``q``,
+    most recently closed first. The archive is only indexed by id, so this
+    scans it; use the detail endpoint when the id is known.
+    """
+    serializer_class = ArchivedIssueSerializer
+    
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            return ArchivedIssue.objects.none()
+        return search_archive(query)
+
+class ArchivedIssueDetailAPIView(generics.RetrieveAPIView):
+    """
+    An archived issue by the id it had as an issue
+    """
+    queryset = ArchivedIssue.objects.all()
+    serializer_class = ArchivedIssueDetailSerializer
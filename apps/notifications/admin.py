@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Notification
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'kind', 'message', 'issue', 'created_at', 'sent_at')
+    list_filter = ('kind', 'created_at', 'sent_at')
+    search_fields = ('message', 'recipient__email')
+    raw_id_fields = ('recipient', 'issue')
+    readonly_fields = ('created_at',)
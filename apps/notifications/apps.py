@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+class NotificationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.notifications'
+    verbose_name = 'Notifications'
+    
+    def ready(self):
+        # Import signals to register them
+        import apps.notifications.signals  # noqa
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.mail import get_connection
+
+from apps.core.background import BackgroundQueue
+
+
+def send_messages(messages, batch_size=None, connection=None):
+    """
+    Send ``messages`` in batches over one backend connection, opened once
+    for all of them. Return the number of messages sent.
+    """
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_EMAIL_BATCH_SIZE', 100)
+    connection = connection or get_connection()
+    sent = 0
+    with connection:
+        for start in range(0, len(messages), batch_size):
+            sent += connection.send_messages(messages[start:start + batch_size]) or 0
+    return sent
+
+
+class MailQueue(BackgroundQueue):
+    """
+    In-process queue for emails that cannot wait for a digest.
+
+    Each message wakes the background thread, which sends everything queued
+    over one connection, so a request only ever appends to a list. With
+    ``flush_interval`` 0 messages are sent inline instead.
+    """
+
+    thread_name = 'mail-sender'
+    failure_message = 'Failed to send %d queued emails'
+
+    def __init__(self, flush_interval=None):
+        if flush_interval is None:
+            flush_interval = getattr(settings, 'NOTIFICATION_MAIL_FLUSH_INTERVAL', 1)
+        super().__init__(flush_interval)
+
+    def enqueue(self, message):
+        """Queue one EmailMessage for sending"""
+        self.put(message)
+
+    def handle(self, items):
+        return send_messages(items)
+
+
+mail_queue = MailQueue()
+mail_queue.register_process_hooks()
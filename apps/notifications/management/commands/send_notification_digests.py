@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.notifications.pipeline import send_digests
+
+
+class Command(BaseCommand):
+    """Django command to email pending notifications as one digest per recipient"""
+
+    help = (
+        'Send every recipient whose oldest unsent notification has waited the digest window '
+        'one email with all their pending notifications, in batches over a single email '
+        'backend connection. Meant to be run every minute or so from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window', type=int,
+            default=getattr(settings, 'NOTIFICATION_DIGEST_WINDOW', 300),
+            help='Seconds a notification waits for others to join its digest'
+        )
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        sent = send_digests(window=options['window'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} notification digests'))
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+class Notification(models.Model):
+    """One event for one recipient, waiting to go out in their next digest email"""
+    class Kind(models.TextChoices):
+        ASSIGNED = 'assigned', _('Assigned')
+        STATUS_CHANGED = 'status_changed', _('Status changed')
+        COMMENTED = 'commented', _('Commented')
+        SLA_BREACHED = 'sla_breached', _('SLA breached')
+    
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name=_('recipient')
+    )
+    issue = models.ForeignKey(
+        'issues.Issue',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='notifications',
+        verbose_name=_('issue')
+    )
+    kind = models.CharField(_('kind'), max_length=20, choices=Kind.choices)
+    message = models.CharField(_('message'), max_length=255)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('sent at'), null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('notification')
+        verbose_name_plural = _('notifications')
+        indexes = [
+            # Unsent notifications grouped by recipient, oldest first
+            models.Index(
+                fields=['recipient', 'created_at'],
+                condition=Q(sent_at__isnull=True),
+                name='notifications_pending_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.recipient}: {self.message}"
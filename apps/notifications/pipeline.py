@@ -0,0 +1,99 @@
+"""
+Notification pipeline.
+
+Events are queued as ``Notification`` rows when the transaction that caused
+them commits. ``send_digests`` then coalesces each recipient's unsent rows
+into one email, once the oldest of them has waited ``NOTIFICATION_DIGEST_WINDOW``
+seconds, and sends the digests in batches over a single connection. It runs
+from the ``send_notification_digests`` command, so no request ever waits on
+the email backend.
+"""
+from datetime import timedelta
+from itertools import groupby
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.translation import ngettext
+
+from .models import Notification
+
+
+def queue(notifications):
+    """Insert ``notifications`` with one INSERT once the current transaction commits"""
+    notifications = list(notifications)
+    if notifications:
+        transaction.on_commit(lambda: Notification.objects.bulk_create(notifications))
+
+
+def notify(recipient_ids, kind, message, issue=None, exclude=None):
+    """Queue ``message`` for each distinct user in ``recipient_ids`` except ``exclude``"""
+    recipient_ids = {pk for pk in recipient_ids if pk is not None and pk != exclude}
+    queue(
+        Notification(recipient_id=pk, kind=kind, message=message[:255], issue=issue)
+        for pk in sorted(recipient_ids)
+    )
+
+
+def digest_message(recipient, notifications):
+    """One email listing ``notifications`` for ``recipient``"""
+    subject = ngettext(
+        '%(count)d update on your issues', '%(count)d updates on your issues', len(notifications)
+    ) % {'count': len(notifications)}
+    body = render_to_string('notifications/digest_email.txt', {
+        'recipient': recipient,
+        'notifications': notifications,
+    })
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [recipient.email])
+
+
+def due_recipients(now, window):
+    """Ids of the users whose oldest unsent notification is at least ``window`` old"""
+    return list(
+        Notification.objects.filter(sent_at__isnull=True).order_by()
+        .values('recipient_id').annotate(oldest=Min('created_at'))
+        .filter(oldest__lte=now - window)
+        .values_list('recipient_id', flat=True)
+    )
+
+
+def send_digests(now=None, window=None, batch_size=None, connection=None):
+    """
+    Send one digest to every recipient who is due one and return how many
+    were sent. Recipients are handled ``batch_size`` at a time; each batch is
+    marked sent in the transaction that locked it, so concurrent runs skip it.
+    """
+    now = now or timezone.now()
+    if window is None:
+        window = getattr(settings, 'NOTIFICATION_DIGEST_WINDOW', 300)
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_EMAIL_BATCH_SIZE', 100)
+    recipient_ids = due_recipients(now, timedelta(seconds=window))
+    if not recipient_ids:
+        return 0
+
+    sent = 0
+    connection = connection or get_connection()
+    with connection:
+        for start in range(0, len(recipient_ids), batch_size):
+            with transaction.atomic():
+                pending = list(
+                    Notification.objects.filter(
+                        recipient_id__in=recipient_ids[start:start + batch_size],
+                        sent_at__isnull=True, created_at__lte=now
+                    ).select_related('recipient')
+                    .select_for_update(skip_locked=True, of=('self',))
+                    .order_by('recipient_id', 'created_at', 'id')
+                )
+                messages = [
+                    digest_message(recipient, list(items))
+                    for recipient, items in groupby(pending, key=attrgetter('recipient'))
+                    if recipient.is_active
+                ]
+                if messages:
+                    sent += connection.send_messages(messages) or 0
+                Notification.objects.filter(pk__in=[item.pk for item in pending]).update(sent_at=now)
+    return sent
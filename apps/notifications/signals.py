@@ -0,0 +1,75 @@
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django_rest_passwordreset.signals import reset_password_token_created
+
+from apps.issues.models import Issue, IssueComment
+from apps.issues.sla import sla_breached
+from .mail import mail_queue
+from .models import Notification
+from .pipeline import notify, queue
+
+
+def _saved_change(instance, field_name, update_fields):
+    """True if this save wrote a new value of ``field_name``"""
+    return (
+        (update_fields is None or field_name in update_fields)
+        and instance.is_tracked(field_name)
+        and instance.has_changed(field_name)
+    )
+
+
+@receiver(post_save, sender=Issue)
+def notify_issue_changes(sender, instance, created, update_fields=None, **kwargs):
+    """Tell the new assignee about an assignment and the people involved about status changes"""
+    if created or _saved_change(instance, 'assigned_to', update_fields):
+        if instance.assigned_to_id:
+            notify(
+                [instance.assigned_to_id], Notification.Kind.ASSIGNED,
+                f'You were assigned "{instance.title}"', instance
+            )
+    if not created and _saved_change(instance, 'status', update_fields):
+        notify(
+            [instance.created_by_id, instance.assigned_to_id], Notification.Kind.STATUS_CHANGED,
+            f'"{instance.title}" is now {instance.get_status_display()}', instance
+        )
+
+
+@receiver(post_save, sender=IssueComment)
+def notify_issue_comment(sender, instance, created, **kwargs):
+    """Tell the reporter and the assignee about comments by others"""
+    if created:
+        issue = instance.issue
+        notify(
+            [issue.created_by_id, issue.assigned_to_id], Notification.Kind.COMMENTED,
+            f'New comment on "{issue.title}"', issue, exclude=instance.author_id
+        )
+
+
+@receiver(sla_breached)
+def notify_sla_breaches(sender, issues, **kwargs):
+    """Queue one notification per breached issue with a single INSERT for the whole batch"""
+    queue(
+        Notification(
+            recipient_id=issue.assigned_to_id or issue.created_by_id, issue=issue,
+            kind=Notification.Kind.SLA_BREACHED, message=f'"{issue.title}" is overdue'
+        )
+        for issue in issues
+        if issue.assigned_to_id or issue.created_by_id
+    )
+
+
+@receiver(reset_password_token_created)
+def send_password_reset_email(sender, instance, reset_password_token, **kwargs):
+    """Hand the reset email to the background sender instead of sending it in the request"""
+    user = reset_password_token.user
+    body = render_to_string('notifications/password_reset_email.txt', {
+        'user': user,
+        'token': reset_password_token.key,
+        'confirm_url': instance.request.build_absolute_uri(reverse('password_reset:reset-password-confirm')),
+    })
+    message = EmailMessage('Reset your password', body, None, [user.email])
+    transaction.on_commit(lambda: mail_queue.enqueue(message))
@@ -0,0 +1,107 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.issues.models import Issue, IssueComment
+from apps.issues.sla import scan_breaches
+from .mail import MailQueue
+from .models import Notification
+from .pipeline import send_digests
+
+User = get_user_model()
+
+class NotificationQueueTests(TestCase):
+    """Test issue events queue notifications for the right people"""
+
+    def setUp(self):
+        self.reporter = User.objects.create_user(email='reporter@example.com', password='testpass123')
+        self.technician = User.objects.create_user(email='tech@example.com', password='testpass123')
+
+    def kinds(self, user):
+        return list(Notification.objects.filter(recipient=user).order_by('id').values_list('kind', flat=True))
+
+    def test_assignment_status_and_comments(self):
+        """Test assignments, status changes and comments by others are queued"""
+        with self.captureOnCommitCallbacks(execute=True):
+            issue = Issue.objects.create(title='Pothole', created_by=self.reporter, assigned_to=self.technician)
+            issue.status = Issue.Status.IN_PROGRESS
+            issue.save(update_fields=['status', 'updated_at'])
+            IssueComment.objects.create(issue=issue, author=self.technician, content='On my way')
+        self.assertEqual(self.kinds(self.technician), ['assigned', 'status_changed'])
+        self.assertEqual(self.kinds(self.reporter), ['status_changed', 'commented'])
+
+    def test_sla_breaches_arrive_in_one_insert(self):
+        """Test a batch of breaches is queued with a single INSERT"""
+        with self.captureOnCommitCallbacks(execute=True):
+            for number in range(3):
+                Issue.objects.create(
+                    title=f'Pothole {number}', created_by=self.reporter,
+                    due_date=timezone.now() + timedelta(hours=1)
+                )
+        with CaptureQueriesContext(connection) as context, self.captureOnCommitCallbacks(execute=True):
+            scan_breaches(now=timezone.now() + timedelta(hours=2))
+        inserts = [query for query in context.captured_queries if query['sql'].startswith('INSERT INTO "notifications')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(self.kinds(self.reporter), ['sla_breached'] * 3)
+
+class DigestTests(TestCase):
+    """Test notifications are coalesced into digests sent over one connection"""
+
+    def setUp(self):
+        self.first = User.objects.create_user(email='first@example.com', password='testpass123')
+        self.second = User.objects.create_user(email='second@example.com', password='testpass123')
+        self.issue = Issue.objects.create(title='Pothole')
+        for user, count in ((self.first, 3), (self.second, 1)):
+            Notification.objects.bulk_create([
+                Notification(recipient=user, issue=self.issue, kind=Notification.Kind.COMMENTED, message=f'Update {number}')
+                for number in range(count)
+            ])
+
+    def test_one_digest_per_recipient(self):
+        """Test each recipient gets one email with all their notifications"""
+        later = timezone.now() + timedelta(minutes=10)
+        with mock.patch('apps.notifications.pipeline.get_connection', wraps=mail.get_connection) as connect:
+            self.assertEqual(send_digests(now=later, window=300, batch_size=1), 2)
+        connect.assert_called_once()
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['first@example.com', 'second@example.com'])
+        digest = next(message for message in mail.outbox if message.to == ['first@example.com'])
+        self.assertEqual(digest.subject, '3 updates on your issues')
+        self.assertIn('Update 2', digest.body)
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+
+        self.assertEqual(send_digests(now=later, window=300), 0)
+
+    def test_window_holds_recent_notifications(self):
+        """Test nothing is sent before the oldest notification has waited the window"""
+        self.assertEqual(send_digests(window=300), 0)
+        self.assertEqual(mail.outbox, [])
+
+class PasswordResetEmailTests(TestCase):
+    """Test the password reset email is sent outside the request"""
+
+    def test_reset_email_goes_through_mail_queue(self):
+        """Test the request only queues the email"""
+        User.objects.create_user(email='forgetful@example.com', password='testpass123')
+        queue = MailQueue(flush_interval=60)
+        with mock.patch('apps.notifications.signals.mail_queue', queue):
+            with mock.patch.object(queue, '_ensure_worker'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(
+                        reverse('password_reset:reset-password-request'),
+                        data=json.dumps({'email': 'forgetful@example.com'}),
+                        content_type='application/json'
+                    )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((len(queue), mail.outbox), (1, []))
+
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(mail.outbox[0].to, ['forgetful@example.com'])
+        self.assertIn('/api/password_reset/confirm/', mail.outbox[0].body)
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import WebhookDelivery, WebhookSubscription
+
+@admin.register(WebhookSubscription)
+class WebhookSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'url', 'events', 'statuses', 'priorities', 'assignee', 'max_concurrency', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('name', 'url')
+    raw_id_fields = ('assignee',)
+    readonly_fields = ('created_at',)
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('subscription', 'event', 'event_id', 'attempts', 'last_status', 'next_attempt_at', 'delivered_at', 'failed_at')
+    list_filter = ('event', 'delivered_at', 'failed_at')
+    search_fields = ('subscription__name', 'subscription__url')
+    raw_id_fields = ('subscription',)
+    readonly_fields = ('created_at',)
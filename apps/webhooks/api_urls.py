@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'api-webhooks'
+
+urlpatterns = [
+    path('', views.WebhookSubscriptionListCreateAPIView.as_view(), name='subscription-list'),
+    path('<int:pk>/', views.WebhookSubscriptionDetailAPIView.as_view(), name='subscription-detail'),
+]
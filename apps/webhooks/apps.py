@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+class WebhooksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.webhooks'
+    verbose_name = 'Webhooks'
+
+    def ready(self):
+        # Import handlers to register them with the outbox
+        import apps.webhooks.handlers  # noqa
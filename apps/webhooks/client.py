@@ -0,0 +1,230 @@
+"""
+A small pooled HTTP/1.1 client on asyncio streams.
+
+Connections are kept alive and reused per origin, so a worker posting many
+batches to one contractor opens a handful of connections instead of one
+per request. Only what webhook delivery needs is supported: requests with
+a body, and responses delimited by Content-Length, chunked encoding or the
+connection closing. Interim 1xx responses are skipped. A response head over
+``max_header_bytes`` is an error; a body is read up to ``max_body_bytes``
+and the rest dropped with the connection.
+"""
+import asyncio
+import ssl
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+
+class HTTPError(Exception):
+    pass
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncHTTPClient:
+    """
+    Pooled client; use it as an async context manager. At most
+    ``max_connections`` requests are in flight at once and at most
+    ``max_idle_per_origin`` idle connections are kept per origin.
+    """
+
+    def __init__(self, max_connections=50, max_idle_per_origin=10, timeout=10,
+                 max_header_bytes=64 * 1024, max_body_bytes=1024 * 1024):
+        self.timeout = timeout
+        self.max_idle_per_origin = max_idle_per_origin
+        self.max_header_bytes = max_header_bytes
+        self.max_body_bytes = max_body_bytes
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle = defaultdict(list)
+        self._ssl_context = None
+        self.connections_opened = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        for connections in self._idle.values():
+            for connection in connections:
+                connection.close()
+        self._idle.clear()
+
+    async def request(self, method, url, body=b'', headers=None):
+        """Send one request and return its Response; raises HTTPError, OSError or TimeoutError"""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise HTTPError(f'Unsupported URL: {url}')
+        origin = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        head = [f'{method} {target} HTTP/1.1', f'Host: {parts.netloc}', f'Content-Length: {len(body)}']
+        head += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        message = ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+        async with self._slots:
+            return await asyncio.wait_for(self._send(origin, message), self.timeout)
+
+    async def post(self, url, body, headers=None):
+        return await self.request('POST', url, body, headers)
+
+    async def _send(self, origin, message):
+        connection = await self._checkout(origin)
+        try:
+            response, keep_alive = await self._exchange(connection, message)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            if not connection.reused:
+                raise
+            # The server closed the idle connection meanwhile; try once on a fresh one
+            connection = await self._open(origin)
+            response, keep_alive = await self._exchange(connection, message)
+        self._checkin(origin, connection, keep_alive)
+        return response
+
+    async def _exchange(self, connection, message):
+        try:
+            connection.writer.write(message)
+            await connection.writer.drain()
+            return await self._read_response(connection.reader)
+        except BaseException:
+            connection.close()
+            raise
+
+    async def _checkout(self, origin):
+        idle = self._idle[origin]
+        while idle:
+            connection = idle.pop()
+            if not connection.reader.at_eof():
+                connection.reused = True
+                return connection
+            connection.close()
+        return await self._open(origin)
+
+    def _checkin(self, origin, connection, keep_alive):
+        if keep_alive and len(self._idle[origin]) < self.max_idle_per_origin:
+            connection.reused = False
+            self._idle[origin].append(connection)
+        else:
+            connection.close()
+
+    async def _open(self, origin):
+        scheme, host, port = origin
+        context = None
+        if scheme == 'https':
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            context = self._ssl_context
+        reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def _read_line(self, reader):
+        try:
+            return await reader.readuntil(b'\r\n')
+        except asyncio.LimitOverrunError:
+            raise HTTPError('Response line too long')
+
+    async def _read_head(self, reader):
+        """Read a status line and headers; return ``(version, status, headers)``"""
+        budget = self.max_header_bytes
+        lines = []
+        while not lines or lines[-1] != b'\r\n':
+            lines.append(await self._read_line(reader))
+            budget -= len(lines[-1])
+            if budget < 0:
+                raise HTTPError(f'Response head over {self.max_header_bytes} bytes')
+        status_line = lines[0].decode('latin-1')
+        try:
+            version, status = status_line.split(' ', 2)[:2]
+            status = int(status)
+        except ValueError:
+            raise HTTPError(f'Malformed status line: {status_line!r}')
+        headers = {}
+        for line in lines[1:-1]:
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return version, status, headers
+
+    async def _read_response(self, reader):
+        while True:
+            version, status, headers = await self._read_head(reader)
+            if status == 101:
+                raise HTTPError('Unexpected protocol switch')
+            # 100 Continue, 103 Early Hints...: the final response follows
+            if status >= 200:
+                break
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            body, complete = await self._read_chunked(reader)
+        elif 'content-length' in headers:
+            try:
+                length = int(headers['content-length'])
+            except ValueError:
+                length = -1
+            if length < 0:
+                raise HTTPError(f"Malformed Content-Length: {headers['content-length']!r}")
+            body = await reader.readexactly(min(length, self.max_body_bytes))
+            complete = length <= self.max_body_bytes
+        elif status in (204, 304):
+            body, complete = b'', True
+        else:
+            body, complete = await self._read_to_eof(reader)
+            keep_alive = False
+        # The rest of a body over the limit is never read, so the connection cannot be reused
+        return Response(status, headers, body), keep_alive and complete
+
+    async def _read_to_eof(self, reader):
+        body = b''
+        while len(body) <= self.max_body_bytes:
+            data = await reader.read(64 * 1024)
+            if not data:
+                return body, True
+            body += data
+        return body[:self.max_body_bytes], False
+
+    async def _read_chunked(self, reader):
+        """Return ``(body, complete)``; ``complete`` is False if the body was cut at max_body_bytes"""
+        chunks = []
+        room = self.max_body_bytes
+        while True:
+            line = await self._read_line(reader)
+            try:
+                size = int(line.split(b';')[0], 16)
+            except ValueError:
+                size = -1
+            if size < 0:
+                raise HTTPError(f'Malformed chunk size: {line!r}')
+            if not size:
+                # Trailers, then the blank line ending the body
+                budget = self.max_header_bytes
+                while (line := await self._read_line(reader)) != b'\r\n':
+                    budget -= len(line)
+                    if budget < 0:
+                        raise HTTPError(f'Response trailers over {self.max_header_bytes} bytes')
+                return b''.join(chunks), True
+            if size > room:
+                chunks.append(await reader.readexactly(room))
+                return b''.join(chunks), False
+            chunks.append(await reader.readexactly(size))
+            room -= size
+            await reader.readexactly(2)
@@ -0,0 +1,158 @@
+"""
+Webhook delivery.
+
+Outbox handlers queue one ``WebhookDelivery`` per matching subscription.
+``deliver_due`` claims due deliveries with ``SELECT ... FOR UPDATE SKIP
+LOCKED`` and leases them by moving ``next_attempt_at`` forward, so other
+workers skip them and a crashed worker's claims come back. It then posts
+them outside any transaction through one pooled async HTTP client: each
+subscription's deliveries go out in batches of ``WEBHOOK_EVENTS_PER_REQUEST``
+with at most ``max_concurrency`` requests in flight to its endpoint. Failed
+batches are retried with exponential backoff until ``WEBHOOK_MAX_ATTEMPTS``.
+
+Every request is signed: ``X-Webhook-Signature`` is ``sha256=`` followed by
+the hex HMAC-SHA256, keyed with the subscription secret, of
+``<X-Webhook-Timestamp>.<body>``.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from .client import AsyncHTTPClient
+from .models import WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+
+def sign(secret, timestamp, body):
+    """Signature header value of ``body`` sent at ``timestamp``"""
+    message = f'{timestamp}.'.encode() + body
+    return 'sha256=' + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt: 30s, 1m, 2m... up to WEBHOOK_MAX_RETRY_DELAY"""
+    return timedelta(seconds=min(15 * 2 ** attempts, getattr(settings, 'WEBHOOK_MAX_RETRY_DELAY', 3600)))
+
+
+def claim(now, batch_size):
+    """Lock due deliveries of active subscriptions and lease them to this worker"""
+    lease = timedelta(seconds=getattr(settings, 'WEBHOOK_LEASE_SECONDS', 60))
+    with transaction.atomic():
+        deliveries = list(
+            WebhookDelivery.objects.filter(
+                delivered_at__isnull=True, failed_at__isnull=True,
+                next_attempt_at__lte=now, subscription__is_active=True
+            ).select_related('subscription')
+            .select_for_update(skip_locked=True, of=('self',))
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        WebhookDelivery.objects.filter(pk__in=[delivery.pk for delivery in deliveries]).update(
+            next_attempt_at=now + lease
+        )
+    return deliveries
+
+
+def request_body(deliveries):
+    return json.dumps({
+        'deliveries': [
+            dict(delivery.payload, id=delivery.pk, event=delivery.event) for delivery in deliveries
+        ]
+    }, cls=DjangoJSONEncoder).encode()
+
+
+async def post_batch(client, subscription, deliveries):
+    """Post one signed batch; return ``(status, error)``"""
+    body = request_body(deliveries)
+    timestamp = str(int(time.time()))
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'road-maintenance-webhooks',
+        'X-Webhook-Timestamp': timestamp,
+        'X-Webhook-Signature': sign(subscription.secret, timestamp, body),
+    }
+    try:
+        response = await client.post(subscription.url, body, headers)
+    except Exception as exc:
+        return None, repr(exc)
+    if response.ok:
+        return response.status, ''
+    return response.status, f"HTTP {response.status}: {response.body[:500].decode('utf-8', 'replace')}"
+
+
+async def post_all(deliveries, client=None):
+    """
+    Post ``deliveries`` (ordered by subscription) concurrently and return
+    ``[(batch, status, error)]``.
+    """
+    events_per_request = getattr(settings, 'WEBHOOK_EVENTS_PER_REQUEST', 20)
+    own_client = client is None
+    if own_client:
+        client = AsyncHTTPClient(
+            max_connections=getattr(settings, 'WEBHOOK_MAX_CONNECTIONS', 50),
+            timeout=getattr(settings, 'WEBHOOK_TIMEOUT', 10),
+        )
+
+    async def limited(limit, subscription, batch):
+        async with limit:
+            status, error = await post_batch(client, subscription, batch)
+        return batch, status, error
+
+    tasks = []
+    for subscription, items in groupby(deliveries, key=lambda delivery: delivery.subscription):
+        items = list(items)
+        # Requests in flight to this endpoint at once
+        limit = asyncio.Semaphore(max(subscription.max_concurrency, 1))
+        for start in range(0, len(items), events_per_request):
+            tasks.append(limited(limit, subscription, items[start:start + events_per_request]))
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+def record_results(results, now):
+    """Mark delivered batches and schedule, or give up on, failed ones"""
+    max_attempts = getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 8)
+    updated = []
+    for batch, status, error in results:
+        for delivery in batch:
+            delivery.attempts += 1
+            delivery.last_status = status
+            delivery.last_error = error
+            if not error:
+                delivery.delivered_at = now
+            elif delivery.attempts >= max_attempts:
+                delivery.failed_at = now
+            else:
+                delivery.next_attempt_at = now + retry_delay(delivery.attempts)
+            updated.append(delivery)
+    WebhookDelivery.objects.bulk_update(
+        updated, ['attempts', 'last_status', 'last_error', 'delivered_at', 'failed_at', 'next_attempt_at']
+    )
+
+
+def deliver_due(batch_size=None, now=None):
+    """Post up to ``batch_size`` due deliveries and return how many succeeded"""
+    batch_size = batch_size or getattr(settings, 'WEBHOOK_BATCH_SIZE', 200)
+    deliveries = claim(now or timezone.now(), batch_size)
+    if not deliveries:
+        return 0
+    deliveries.sort(key=lambda delivery: (delivery.subscription_id, delivery.pk))
+    results = asyncio.run(post_all(deliveries))
+    for batch, status, error in results:
+        if error:
+            logger.warning('Webhook %s failed for %d deliveries: %s', batch[0].subscription.url, len(batch), error)
+    record_results(results, timezone.now())
+    return sum(len(batch) for batch, status, error in results if not error)
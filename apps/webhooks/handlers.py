@@ -0,0 +1,40 @@
+from apps.core.outbox import register
+from .models import WebhookDelivery, WebhookSubscription
+
+
+def webhook_events(event):
+    """Webhook events an ``issue.created``/``issue.updated`` outbox event stands for"""
+    issue = event.payload
+    if event.topic == 'issue.created':
+        return [WebhookSubscription.Event.ASSIGNED] if issue['assigned_to'] else []
+    changed = issue.get('changed', ())
+    events = []
+    if 'assigned_to' in changed and issue['assigned_to']:
+        events.append(WebhookSubscription.Event.ASSIGNED)
+    if 'status' in changed:
+        events.append(WebhookSubscription.Event.STATUS_CHANGED)
+    return events
+
+
+@register('issue.created')
+@register('issue.updated')
+def fan_out_issue_event(event):
+    """Queue one delivery per matching subscription; redelivered outbox events are ignored"""
+    events = webhook_events(event)
+    if not events:
+        return
+    issue = event.payload
+    body = {
+        'issue': {key: value for key, value in issue.items() if key != 'changed'},
+        'occurred_at': event.created_at.isoformat(),
+    }
+    deliveries = [
+        WebhookDelivery(
+            subscription=subscription, event_id=event.pk, event=name,
+            payload=dict(body, changed=issue.get('changed', []))
+        )
+        for subscription in WebhookSubscription.objects.filter(is_active=True)
+        for name in events
+        if subscription.matches(name, issue)
+    ]
+    WebhookDelivery.objects.bulk_create(deliveries, ignore_conflicts=True)
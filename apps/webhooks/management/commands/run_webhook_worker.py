@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.webhooks.delivery import deliver_due
+
+
+class Command(BaseCommand):
+    """Django command to post due webhook deliveries to their endpoints"""
+
+    help = (
+        'Claim due webhook deliveries with SELECT ... FOR UPDATE SKIP LOCKED and post them '
+        'in signed batches through a pooled async HTTP client, retrying failures with '
+        'exponential backoff. Several workers can run side by side.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--once', action='store_true', help='Post what is due and exit')
+
+    def handle(self, *args, **options):
+        interval = getattr(settings, 'WEBHOOK_POLL_INTERVAL', 1)
+        total = 0
+        while True:
+            close_old_connections()
+            delivered = deliver_due(batch_size=options['batch_size'])
+            total += delivered
+            if options['once']:
+                break
+            if not delivered:
+                time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS(f'Delivered {total} webhook events'))
@@ -0,0 +1,98 @@
+import secrets
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+def generate_secret():
+    return secrets.token_hex(32)
+
+
+class WebhookSubscription(models.Model):
+    """An external endpoint that is sent the issue events matching its filters"""
+    class Event(models.TextChoices):
+        ASSIGNED = 'assigned', _('Assigned')
+        STATUS_CHANGED = 'status_changed', _('Status changed')
+
+    name = models.CharField(_('name'), max_length=100)
+    url = models.URLField(_('url'), max_length=500)
+    # Payloads are signed with HMAC-SHA256 of this secret
+    secret = models.CharField(_('secret'), max_length=128, default=generate_secret)
+    # Filters: an empty list matches everything
+    events = models.JSONField(_('events'), default=list, blank=True)
+    statuses = models.JSONField(_('statuses'), default=list, blank=True)
+    priorities = models.JSONField(_('priorities'), default=list, blank=True)
+    assignee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='webhook_subscriptions',
+        verbose_name=_('assignee')
+    )
+    # Requests in flight to this endpoint at once
+    max_concurrency = models.PositiveSmallIntegerField(_('max concurrency'), default=4)
+    is_active = models.BooleanField(_('active'), default=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = _('webhook subscription')
+        verbose_name_plural = _('webhook subscriptions')
+
+    def __str__(self):
+        return f"{self.name} ({self.url})"
+
+    def matches(self, event, issue):
+        """True if ``event`` about the ``issue`` payload passes every filter"""
+        return (
+            (not self.events or event in self.events)
+            and (not self.statuses or issue['status'] in self.statuses)
+            and (not self.priorities or issue['priority'] in self.priorities)
+            and (self.assignee_id is None or issue['assigned_to'] == self.assignee_id)
+        )
+
+
+class WebhookDelivery(models.Model):
+    """One event waiting to be posted, or posted, to one subscription"""
+    subscription = models.ForeignKey(
+        WebhookSubscription,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+        verbose_name=_('subscription')
+    )
+    # The outbox event this delivery came from; fan-out is idempotent on it
+    event_id = models.BigIntegerField(_('event id'))
+    event = models.CharField(_('event'), max_length=20, choices=WebhookSubscription.Event.choices)
+    payload = models.JSONField(_('payload'), default=dict)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    # Claimed deliveries and retries are pushed back by moving this forward
+    next_attempt_at = models.DateTimeField(_('next attempt at'), default=timezone.now)
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    last_status = models.PositiveSmallIntegerField(_('last status'), null=True, blank=True)
+    last_error = models.TextField(_('last error'), blank=True)
+    delivered_at = models.DateTimeField(_('delivered at'), null=True, blank=True)
+    # Set once WEBHOOK_MAX_ATTEMPTS attempts have failed
+    failed_at = models.DateTimeField(_('failed at'), null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('webhook delivery')
+        verbose_name_plural = _('webhook deliveries')
+        constraints = [
+            models.UniqueConstraint(fields=['subscription', 'event_id', 'event'], name='webhooks_delivery_once'),
+        ]
+        indexes = [
+            # Deliveries still to be attempted, soonest first
+            models.Index(
+                fields=['next_attempt_at', 'id'],
+                condition=Q(delivered_at__isnull=True, failed_at__isnull=True),
+                name='webhooks_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_display()} #{self.event_id} to {self.subscription}"
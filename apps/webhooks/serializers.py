@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+from apps.issues.models import Issue
+from .models import WebhookSubscription
+
+class WebhookSubscriptionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the WebhookSubscription model
+    """
+    events = serializers.ListField(
+        child=serializers.ChoiceField(choices=WebhookSubscription.Event.choices), required=False
+    )
+    statuses = serializers.ListField(child=serializers.ChoiceField(choices=Issue.Status.choices), required=False)
+    priorities = serializers.ListField(child=serializers.ChoiceField(choices=Issue.Priority.choices), required=False)
+    
+    class Meta:
+        model = WebhookSubscription
+        fields = [
+            'id', 'name', 'url', 'secret', 'events', 'statuses', 'priorities',
+            'assignee', 'max_concurrency', 'is_active', 'created_at'
+        ]
+        read_only_fields = ['secret', 'created_at']
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.models import OutboxEvent
+from apps.core.outbox import dispatch_batch
+from apps.issues.models import Issue
+from .client import AsyncHTTPClient, HTTPError
+from .delivery import deliver_due, sign
+from .handlers import fan_out_issue_event
+from .models import WebhookDelivery, WebhookSubscription
+
+User = get_user_model()
+
+class StubEndpoint:
+    """A local HTTP/1.1 server recording the webhook requests it receives"""
+
+    def __init__(self, statuses=(), delay=0):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.requests = []
+        self.connections = set()
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                with stub.lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    stub.connections.add(self.client_address)
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.in_flight -= 1
+                    stub.requests.append((dict(self.headers), body))
+                    status = stub.statuses.pop(0) if stub.statuses else 200
+                self.send_response(status)
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'ok')
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/hook'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def events(self):
+        return [delivery for _headers, body in self.requests for delivery in json.loads(body)['deliveries']]
+
+
+@override_settings(ISSUE_SLA_HOURS={})
+class WebhookFanOutTests(TestCase):
+    """Test outbox events become deliveries for the matching subscriptions"""
+
+    def setUp(self):
+        self.technician = User.objects.create_user(email='tech@example.com', password='testpass123')
+        self.everything = WebhookSubscription.objects.create(name='All', url='http://contractor.test/a')
+        self.critical_assignments = WebhookSubscription.objects.create(
+            name='Critical', url='http://contractor.test/b',
+            events=['assigned'], priorities=['critical'], assignee=self.technician
+        )
+        self.closed = WebhookSubscription.objects.create(
+            name='Closed', url='http://contractor.test/c', events=['status_changed'], statuses=['closed']
+        )
+
+    def deliveries(self, subscription):
+        return sorted(subscription.deliveries.values_list('event', flat=True))
+
+    def test_filters_on_event_status_priority_and_assignee(self):
+        """Test each subscription only receives the events passing its filters"""
+        issue = Issue.objects.create(title='Pothole', priority='critical', assigned_to=self.technician)
+        issue.status = Issue.Status.CLOSED
+        issue.save(update_fields=['status', 'updated_at'])
+        Issue.objects.create(title='Crack', priority='low', assigned_to=self.technician)
+        dispatch_batch()
+        # Redelivered outbox events are not queued twice
+        for event in OutboxEvent.objects.filter(topic__in=['issue.created', 'issue.updated']):
+            fan_out_issue_event(event)
+
+        self.assertEqual(self.deliveries(self.everything), ['assigned', 'assigned', 'status_changed'])
+        self.assertEqual(self.deliveries(self.critical_assignments), ['assigned'])
+        self.assertEqual(self.deliveries(self.closed), ['status_changed'])
+        payload = self.closed.deliveries.get().payload
+        self.assertEqual((payload['issue']['id'], payload['changed']), (issue.pk, ['status']))
+
+
+@override_settings(WEBHOOK_EVENTS_PER_REQUEST=2)
+class WebhookDeliveryTests(TestCase):
+    """Test deliveries are posted signed, batched, pooled and retried"""
+
+    def endpoint(self, **options):
+        stub = StubEndpoint(**options)
+        self.addCleanup(stub.close)
+        return stub
+
+    def queue(self, subscription, count):
+        WebhookDelivery.objects.bulk_create([
+            WebhookDelivery(subscription=subscription, event_id=number, event='assigned', payload={'issue': {'id': number}})
+            for number in range(count)
+        ])
+
+    def test_signed_batches_over_pooled_connections(self):
+        """Test events go out two per signed request over reused connections"""
+        stub = self.endpoint()
+        subscription = WebhookSubscription.objects.create(name='Contractor', url=stub.url, max_concurrency=1)
+        self.queue(subscription, 5)
+
+        self.assertEqual(deliver_due(), 5)
+        self.assertEqual(len(stub.requests), 3)
+        self.assertEqual(len(stub.connections), 1)
+        self.assertEqual(sorted(event['issue']['id'] for event in stub.events()), [0, 1, 2, 3, 4])
+        headers, body = stub.requests[0]
+        self.assertEqual(
+            headers['X-Webhook-Signature'], sign(subscription.secret, headers['X-Webhook-Timestamp'], body)
+        )
+        self.assertFalse(WebhookDelivery.objects.filter(delivered_at__isnull=True).exists())
+        self.assertEqual(deliver_due(), 0)
+
+    def test_per_endpoint_concurrency_limit(self):
+        """Test no more requests are in flight to an endpoint than it allows"""
+        slow = self.endpoint(delay=0.05)
+        subscription = WebhookSubscription.objects.create(name='Slow', url=slow.url, max_concurrency=2)
+        self.queue(subscription, 10)
+
+        self.assertEqual(deliver_due(), 10)
+        self.assertEqual(len(slow.requests), 5)
+        self.assertEqual(slow.max_in_flight, 2)
+
+    @override_settings(WEBHOOK_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_give_up(self):
+        """Test a failed batch is retried later and given up after the last attempt"""
+        stub = self.endpoint(statuses=[500, 503])
+        subscription = WebhookSubscription.objects.create(name='Flaky', url=stub.url)
+        self.queue(subscription, 1)
+
+        self.assertEqual(deliver_due(), 0)
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.attempts, delivery.last_status), (1, 500))
+        self.assertGreater(delivery.next_attempt_at, timezone.now() + timedelta(seconds=20))
+        self.assertEqual(deliver_due(), 0)
+
+        self.assertEqual(deliver_due(now=timezone.now() + timedelta(minutes=5)), 0)
+        delivery.refresh_from_db()
+        self.assertEqual((delivery.attempts, delivery.last_status), (2, 503))
+        self.assertIsNotNone(delivery.failed_at)
+        self.assertEqual(len(stub.requests), 2)
+
+    def test_unreachable_endpoint_is_retried(self):
+        """Test connection errors count as failed attempts"""
+        stub = self.endpoint()
+        url = stub.url
+        stub.close()
+        subscription = WebhookSubscription.objects.create(name='Down', url=url)
+        self.queue(subscription, 1)
+        self.assertEqual(deliver_due(), 0)
+        delivery = WebhookDelivery.objects.get()
+        self.assertEqual((delivery.attempts, delivery.last_status, delivery.failed_at), (1, None, None))
+        self.assertTrue(delivery.last_error)
+
+
+class AsyncHTTPClientTests(TestCase):
+    """Test the client skips interim responses and bounds what it reads"""
+
+    def exchange(self, replies, requests=1, **options):
+        """Serve ``replies`` raw, one per request, and return the client's responses (or errors)"""
+
+        async def scenario():
+            replies_left = list(replies)
+
+            async def serve(reader, writer):
+                while replies_left:
+                    try:
+                        await reader.readuntil(b'\r\n\r\n')
+                        await reader.readexactly(2)
+                    except asyncio.IncompleteReadError:
+                        break
+                    writer.write(replies_left.pop(0))
+                    await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(serve, '127.0.0.1', 0)
+            url = f'http://127.0.0.1:{server.sockets[0].getsockname()[1]}/hook'
+            results = []
+            async with server, AsyncHTTPClient(timeout=5, **options) as client:
+                for _ in range(requests):
+                    try:
+                        results.append(await client.post(url, b'{}'))
+                    except HTTPError as exc:
+                        results.append(exc)
+                return results, client.connections_opened
+
+        return asyncio.run(scenario())
+
+    def test_interim_responses_are_skipped(self):
+        """Test 100 Continue and 103 Early Hints are not taken for the final status"""
+        (first, second), opened = self.exchange([
+            b'HTTP/1.1 100 Continue\r\n\r\nHTTP/1.1 103 Early Hints\r\nLink: </a>\r\n\r\n'
+            b'HTTP/1.1 500 Internal Server Error\r\nContent-Length: 4\r\n\r\noops',
+            b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n2\r\nok\r\n0\r\n\r\n',
+        ], requests=2)
+        self.assertEqual((first.status, first.ok, first.body), (500, False, b'oops'))
+        self.assertEqual((second.status, second.ok, second.body), (200, True, b'ok'))
+        self.assertEqual(opened, 1)
+
+    def test_header_and_body_sizes_are_bounded(self):
+        """Test an oversized head is an error and an oversized body is cut off with its connection"""
+        (error,), _ = self.exchange(
+            [b'HTTP/1.1 200 OK\r\n' + b'X-Filler: 0123456789\r\n' * 20 + b'\r\n'], max_header_bytes=256
+        )
+        self.assertIsInstance(error, HTTPError)
+
+        (first, second), opened = self.exchange([
+            b'HTTP/1.1 200 OK\r\nContent-Length: 1000\r\n\r\n' + b'x' * 1000,
+            b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n3e8\r\n' + b'y' * 1000 + b'\r\n0\r\n\r\n',
+        ], requests=2, max_body_bytes=10)
+        self.assertEqual((first.status, first.body, second.body), (200, b'x' * 10, b'y' * 10))
+        self.assertEqual(opened, 2)
+
+
+class WebhookSubscriptionAPITests(TestCase):
+    """Test admins manage subscriptions through the API"""
+
+    def test_create_validates_filters(self):
+        """Test filters must be valid choices and the secret is generated"""
+        admin = User.objects.create_superuser(email='admin@example.com', password='testpass123')
+        self.client.force_login(admin)
+        url = reverse('api-webhooks:subscription-list')
+        response = self.client.post(url, {
+            'name': 'Contractor', 'url': 'https://contractor.test/hook', 'statuses': ['closed'], 'priorities': ['urgent']
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('priorities', response.json())
+
+        response = self.client.post(url, {
+            'name': 'Contractor', 'url': 'https://contractor.test/hook', 'statuses': ['closed']
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['secret']), 64)
@@ -0,0 +1,20 @@
+from rest_framework import generics, permissions
+
+from .models import WebhookSubscription
+from .serializers import WebhookSubscriptionSerializer
+
+class WebhookSubscriptionListCreateAPIView(generics.ListCreateAPIView):
+    """
+    Webhook subscriptions; the generated signing secret is returned with each one.
+    """
+    queryset = WebhookSubscription.objects.all()
+    serializer_class = WebhookSubscriptionSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+class WebhookSubscriptionDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+    """
+    One webhook subscription.
+    """
+    queryset = WebhookSubscription.objects.all()
+    serializer_class = WebhookSubscriptionSerializer
+    permission_classes = [permissions.IsAdminUser]
@@ -37,11 +37,15 @@ INSTALLED_APPS = [
     'apps.accounts',
     'apps.issues',
     'apps.core',
+    'apps.notifications',
+    'apps.webhooks',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Above SessionMiddleware, so session saves pin the client to the primary
+    'apps.core.replicas.PrimaryStickinessMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,6 +99,20 @@ else:
         }
     }
 
+# Read replicas (apps.core.replicas): comma-separated database URLs, added as replica_1, replica_2...
+DATABASE_REPLICAS = []
+if os.getenv('DATABASE_REPLICA_URLS'):
+    import dj_database_url
+    for number, url in enumerate(os.getenv('DATABASE_REPLICA_URLS').split(','), 1):
+        alias = f'replica_{number}'
+        DATABASES[alias] = dj_database_url.parse(url.strip(), conn_max_age=600, conn_health_checks=True)
+        # Tests read the test primary through every replica alias
+        DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+        DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['apps.core.replicas.ReplicaRouter']
+# Seconds a client that wrote keeps reading from the primary, so it sees its own changes
+DATABASE_PRIMARY_STICKY_SECONDS = int(os.getenv('DATABASE_PRIMARY_STICKY_SECONDS', '10'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -125,10 +143,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Authentication
+AUTHENTICATION_BACKENDS = ['apps.accounts.backends.CachedModelBackend']
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Seconds an authenticated user stays cached (invalidated early by any user save)
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', '300'))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
@@ -138,6 +162,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Reverse proxies that append to X-Forwarded-For; unset, throttles key on REMOTE_ADDR only
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES')) if os.getenv('NUM_PROXIES') else None,
+    # Token buckets (apps.core.throttling): burst size / refill period per scope
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.getenv('THROTTLE_LOGIN', '10/min'),
+        'register': os.getenv('THROTTLE_REGISTER', '5/min'),
+        'password_reset': os.getenv('THROTTLE_PASSWORD_RESET', '5/min'),
+        'issue_create': os.getenv('THROTTLE_ISSUE_CREATE', '20/min'),
+        'issue_create_user': os.getenv('THROTTLE_ISSUE_CREATE_USER', '60/min'),
+    },
 }
 
 # JWT Settings
@@ -152,6 +186,71 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+REDIS_URL = os.getenv('REDIS_URL')
+
+# Caching: a per-process LRU in front of a tier shared by all workers
+# (Redis when REDIS_URL is set, else an in-process stand-in)
+CACHES = {
+    'default': {
+        'BACKEND': 'apps.core.cache.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': int(os.getenv('CACHE_LOCAL_MAX_ENTRIES', '1000')),
+            # Max seconds one worker serves a value another worker has replaced
+            'LOCAL_TIMEOUT': float(os.getenv('CACHE_LOCAL_TIMEOUT', '5')),
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+    },
+}
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '60'))
+# Issue list results are also invalidated by any issue write, so this is only a backstop
+ISSUE_LIST_CACHE_TIMEOUT = int(os.getenv('ISSUE_LIST_CACHE_TIMEOUT', '300'))
+
+# SLA: hours from creation until an issue of each priority is due (when no due date is given)
+ISSUE_SLA_HOURS = {
+    'critical': int(os.getenv('ISSUE_SLA_HOURS_CRITICAL', '4')),
+    'high': int(os.getenv('ISSUE_SLA_HOURS_HIGH', '24')),
+    'medium': int(os.getenv('ISSUE_SLA_HOURS_MEDIUM', '72')),
+    'low': int(os.getenv('ISSUE_SLA_HOURS_LOW', '168')),
+}
+# Issues marked breached per transaction by the scan_sla_breaches command
+ISSUE_SLA_SCAN_BATCH_SIZE = int(os.getenv('ISSUE_SLA_SCAN_BATCH_SIZE', '500'))
+# Days a closed issue stays in the hot tables before archive_closed_issues moves it out
+ISSUE_ARCHIVE_AFTER_DAYS = int(os.getenv('ISSUE_ARCHIVE_AFTER_DAYS', '730'))
+ISSUE_ARCHIVE_BATCH_SIZE = int(os.getenv('ISSUE_ARCHIVE_BATCH_SIZE', '100'))
+# Background issue deletion (apps.issues.deletion): rows removed per transaction,
+# threads deleting attachment files, seconds between polls of run_issue_deletions
+ISSUE_DELETION_BATCH_SIZE = int(os.getenv('ISSUE_DELETION_BATCH_SIZE', '500'))
+ISSUE_DELETION_FILE_WORKERS = int(os.getenv('ISSUE_DELETION_FILE_WORKERS', '8'))
+ISSUE_DELETION_POLL_INTERVAL = float(os.getenv('ISSUE_DELETION_POLL_INTERVAL', '1'))
+
+# Transactional outbox (apps.core.outbox): events per dispatcher batch, seconds between polls
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '1'))
+# Longest backoff in seconds before a failed event is retried
+OUTBOX_MAX_RETRY_DELAY = int(os.getenv('OUTBOX_MAX_RETRY_DELAY', '300'))
+# Hours delivered events are kept before run_outbox_dispatcher --purge deletes them
+OUTBOX_RETENTION_HOURS = int(os.getenv('OUTBOX_RETENTION_HOURS', '72'))
+
+# Refresh tokens revoked on rotation (Redis when REDIS_URL is set, else in-process)
+TOKEN_REVOCATION_BLOOM_BITS = 2 ** 20
+TOKEN_REVOCATION_BLOOM_HASHES = 7
+# Max seconds before a worker sees a Bloom filter update made by another worker
+TOKEN_REVOCATION_BLOOM_REFRESH = float(os.getenv('TOKEN_REVOCATION_BLOOM_REFRESH', '1'))
+
+# User activity logging (rows are buffered per process and bulk inserted)
+ACTIVITY_LOG_BATCH_SIZE = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', '100'))
+ACTIVITY_LOG_FLUSH_INTERVAL = float(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', '5'))
+# Months kept in the live table by the rotate_user_activity command
+ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv('ACTIVITY_LOG_RETENTION_MONTHS', '6'))
+ACTIVITY_LOG_ARCHIVE_DIR = os.getenv('ACTIVITY_LOG_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive', 'activity'))
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
@@ -166,6 +265,26 @@ if ENV == 'development':
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@roadmaintenance.local')
 
+# Notifications are coalesced per recipient into one digest email per window
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv('NOTIFICATION_DIGEST_WINDOW', '300'))
+# Emails sent per batch over one backend connection
+NOTIFICATION_EMAIL_BATCH_SIZE = int(os.getenv('NOTIFICATION_EMAIL_BATCH_SIZE', '100'))
+# Seconds between background sends of immediate emails such as password resets (0: send inline)
+NOTIFICATION_MAIL_FLUSH_INTERVAL = float(os.getenv('NOTIFICATION_MAIL_FLUSH_INTERVAL', '1'))
+
+# Webhooks (apps.webhooks.delivery): deliveries claimed per worker round, events per request
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', '200'))
+WEBHOOK_EVENTS_PER_REQUEST = int(os.getenv('WEBHOOK_EVENTS_PER_REQUEST', '20'))
+# Connections one worker keeps open across all endpoints, and seconds per request
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '50'))
+WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', '10'))
+# Failed deliveries back off exponentially up to this many seconds and give up after this many attempts
+WEBHOOK_MAX_RETRY_DELAY = int(os.getenv('WEBHOOK_MAX_RETRY_DELAY', '3600'))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv('WEBHOOK_MAX_ATTEMPTS', '8'))
+# Seconds a claimed delivery is hidden from other workers (a crashed worker's claims come back after it)
+WEBHOOK_LEASE_SECONDS = int(os.getenv('WEBHOOK_LEASE_SECONDS', '60'))
+WEBHOOK_POLL_INTERVAL = float(os.getenv('WEBHOOK_POLL_INTERVAL', '1'))
+
 # DRF Spectacular Settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Road Maintenance API',
@@ -5,6 +5,7 @@ from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from django.views.generic import TemplateView
 from .views import WelcomeView
+from apps.core.views import OutboxMetricsView, ThrottleMetricsView
 
 urlpatterns = [
     # Home page
@@ -21,10 +22,13 @@ urlpatterns = [
     # API Endpoints
     path('api/auth/', include(('apps.accounts.urls', 'accounts'), namespace='accounts')),
     path('api/password_reset/', include('django_rest_passwordreset.urls')),
+    path('api/throttle-metrics/', ThrottleMetricsView.as_view(), name='throttle-metrics'),
+    path('api/outbox-metrics/', OutboxMetricsView.as_view(), name='outbox-metrics'),
     
     # Issues URLs - both API and frontend
     path('issues/', include('apps.issues.urls', namespace='issues')),  # Frontend URLs
     path('api/issues/', include('apps.issues.api_urls', namespace='api-issues')),  # API URLs
+    path('api/webhooks/', include('apps.webhooks.api_urls', namespace='api-webhooks')),
 ]
 
 # Serve media files in development